@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  activation.py
+#
+import heapq
+
+# ======================================================================
+# ActivationQueue class
+# ======================================================================
+# Holds entities that have been spawned but can't be seen yet, keyed by
+# the tick they are due to come into play. Each entry remembers the tick
+# it was pushed on (so the caller can catch the entity up) and the name
+# of the group it belongs in. Entries due on the same tick come out in
+# the order they went in, which keeps replays deterministic.
+
+class ActivationQueue():
+
+    def __init__(self):
+
+        self.heap     = []
+        self.counts   = {}      # group -> entries waiting
+        self.sequence = 0       # entries pushed so far
+
+    def push(self, due_tick, spawn_tick, entity, group):
+
+        # the sequence number also stops heapq ever comparing entities
+        heapq.heappush(self.heap, (due_tick, self.sequence, spawn_tick, entity, group))
+        self.sequence += 1
+        self.counts[group] = self.counts.get(group, 0) + 1
+
+    def popDue(self, tick):
+
+        # returns [(spawn_tick, entity, group), ...] for everything due by tick
+        due = []
+        while self.heap and self.heap[0][0] <= tick:
+            due_tick, n, spawn_tick, entity, group = heapq.heappop(self.heap)
+            self.counts[group] -= 1
+            due.append((spawn_tick, entity, group))
+        return due
+
+    def copy(self, cloneEntity):
+
+        # a queue with the same entries, each entity copied with
+        # cloneEntity(entity). A heap copied in order is still a heap
+        queue = ActivationQueue()
+        queue.heap = [(due_tick, n, spawn_tick, cloneEntity(entity), group) for due_tick, n, spawn_tick, entity, group in self.heap]
+        queue.counts = dict(self.counts)
+        queue.sequence = self.sequence
+        return queue
+
+    def entities(self):
+
+        # everything waiting, in no particular order
+        return [entry[3] for entry in self.heap]
+
+    def count(self, group):
+
+        return self.counts.get(group, 0)
+
+    def clear(self):
+
+        self.heap = []
+        self.counts = {}
+
+    def __len__(self):
+
+        return len(self.heap)
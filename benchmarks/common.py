@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  common.py
+#
+# shared helpers for the headless benchmarks. The game opens its window
+# at init(), so point SDL at the dummy drivers first, and chdir to a
+# scratch directory so what the game saves (high scores, replays, stats,
+# telemetry, memory logs) stays out of the checkout. Assets are found
+# from the package, wherever it runs. The benchmarks never play a sound,
+# so the mixer is left off.
+
+import os
+import sys
+import atexit
+import random
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR_ENV = 'CANNON_BENCH_DIR'
+
+def workDir():
+
+    # one per run. Worker processes find it through the environment, so
+    # call this before starting them, and the process that made it
+    # removes it on exit
+    path = os.environ.get(WORKDIR_ENV)
+    if path is None:
+        path = tempfile.mkdtemp(prefix='cannon-bench-')
+        os.environ[WORKDIR_ENV] = path
+        atexit.register(shutil.rmtree, path, True)
+    return path
+
+def loadGame():
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    os.chdir(workDir())
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import cannon
+    cannon.init(audio=False)
+    return cannon
+
+# ======================================================================
+# AimPolicy class
+# ======================================================================
+# scripted player: aims at the closest on-screen enemy and fires every
+# few ticks. Uses its own Random so it never disturbs the game's seed.
+# With nothing on screen it fires at random, unless hold_fire: those
+# balls can come down on its own bases, which is load for a benchmark
+# but no measure of how hard a wave is.
+
+class AimPolicy():
+
+    def __init__(self, cannon, fire_every=12, seed=1, hold_fire=False):
+
+        self.cannon = cannon
+        self.fire_every = fire_every
+        self.hold_fire = hold_fire
+        self.random = random.Random(seed)
+        self.tick = 0
+
+    def pickTarget(self, game):
+
+        best = None
+        best_d = 0
+        for group in (game.brutes, game.bombers, game.targets):
+            for e in group:
+                if 0 < e.pos.x < self.cannon.SCREEN_WIDTH and 0 < e.pos.y < self.cannon.SCREEN_HEIGHT:
+                    dx = e.pos.x - game.cannon_pos_x
+                    dy = e.pos.y - game.cannon_pos_y
+                    d = dx * dx + dy * dy
+                    if best is None or d < best_d:
+                        best = e
+                        best_d = d
+        return best
+
+    def next(self, game):
+
+        self.tick += 1
+        target = self.pickTarget(game)
+        if target is None:
+            mousex = self.random.randint(200, self.cannon.SCREEN_WIDTH)
+            mousey = self.random.randint(0, 300)
+        else:
+            mousex = int(target.pos.x + target.width // 2)
+            mousey = int(target.pos.y)
+        click = self.tick % self.fire_every == 0
+        if target is None and self.hold_fire:
+            click = False
+        return mousex, mousey, click
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  difficulty.py
+#
+# Monte Carlo wave difficulty. Plays each wave many times headlessly with
+# the scripted AimPolicy, a different spawn seed per trial, spread over a
+# process pool, and reports per wave:
+#
+#   survive    share of trials that ended the wave with a base left
+#   clear      share that killed every target before the clock ran out
+#   clear_s    seconds to clear (p50/p90, cleared trials only)
+#   shots      balls fired (mean)
+#   base_loss  share of trials that lost at least one base
+#   self_hits  balls that came down on a base (mean)
+#
+# The policy's own balls don't destroy bases in a trial, they're counted
+# in self_hits instead. It aims straight at enemies, not allowing for the
+# drop, so its misses land on the bases often enough to swamp what the
+# wave itself does to them.
+#
+#   python benchmarks/difficulty.py -w 1-20 -n 1000
+#   python benchmarks/difficulty.py -w 12 -n 5000 --bases 1 -o wave12.json
+#
+# A trial is one wave from the start, with --bases bases standing (brute
+# waves only come with a single base left). Gameplay randomness all
+# happens when a wave spawns, so a (wave, seed) pair always plays the same.
+
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+from common import loadGame, workDir, AimPolicy
+
+# set in each worker by startWorker()
+_cannon = None
+_game = None
+
+def startWorker():
+
+    global _cannon, _game
+    _cannon = loadGame()
+    _game = _cannon.Game()
+    # particles are cosmetic, keep them cheap
+    _game.governor.reset(0)
+    _game.applyQuality()
+
+def runTrial(task):
+
+    wave, seed, bases, fire_every = task
+    cannon = _cannon
+    game = _game
+
+    game.random_seed = seed
+    game.friendly_fire = False
+    game.startGame()
+    game.bases = game.bases[:bases]
+    # spawnWave() increments wave_number before spawning
+    game.wave_number = wave - 1
+    game.spawnWave()
+    game.gamestate = cannon.GAME_STATE_IN_PROGRESS
+
+    # only shoots at enemies, a ball fired at nothing can take out a base
+    policy = AimPolicy(cannon, fire_every, seed, hold_fire=True)
+    while game.gamestate == cannon.GAME_STATE_IN_PROGRESS:
+        mousex, mousey, click = policy.next(game)
+        game.update(mousex, mousey, click)
+        game.updateGameState()
+
+    ticks = game.current_tick - game.wave_start_tick
+    return {
+        'wave'       : wave,
+        'survived'   : len(game.bases) > 0,
+        'cleared'    : len(game.bases) > 0 and game.targetsLeft() == 0,
+        'seconds'    : ticks / game.fps,
+        'shots'      : game.shots_fired,
+        'bases_lost' : bases - len(game.bases),
+        'self_hits'  : game.friendly_hits,
+    }
+
+def percentile(values, pct):
+
+    if len(values) == 0:
+        return 0.0
+    s = sorted(values)
+    return s[int(round((len(s) - 1) * pct))]
+
+def summarise(trials):
+
+    n = len(trials)
+    clear_times = [t['seconds'] for t in trials if t['cleared']]
+    return {
+        'trials'         : n,
+        'survival_rate'  : sum(t['survived'] for t in trials) / n,
+        'clear_rate'     : len(clear_times) / n,
+        'clear_p50_s'    : percentile(clear_times, 0.5),
+        'clear_p90_s'    : percentile(clear_times, 0.9),
+        'shots_mean'     : sum(t['shots'] for t in trials) / n,
+        'base_loss_prob' : sum(t['bases_lost'] > 0 for t in trials) / n,
+        'bases_lost_mean': sum(t['bases_lost'] for t in trials) / n,
+        'self_hits_mean' : sum(t['self_hits'] for t in trials) / n,
+    }
+
+def parseWaves(text):
+
+    # "12", "1-20" or "1,5,10-12"
+    waves = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            waves.extend(range(int(first), int(last) + 1))
+        else:
+            waves.append(int(part))
+    return waves
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Monte Carlo wave difficulty for cannon.py')
+    parser.add_argument('-w', '--waves', default='1-20', help='waves to test, e.g. 12, 1-20 or 1,5,10-12')
+    parser.add_argument('-n', '--trials', type=int, default=1000, help='trials per wave')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='worker processes')
+    parser.add_argument('--bases', type=int, default=4, choices=[1, 2, 3, 4], help='bases standing at the start of the wave')
+    parser.add_argument('--fire-every', type=int, default=12, help='ticks between shots for the aim policy')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the first trial, trials use seed, seed + 1, ...')
+    parser.add_argument('-o', '--output', help='write results JSON here as well')
+    args = parser.parse_args()
+
+    waves = parseWaves(args.waves)
+    tasks = [(wave, args.seed + n, args.bases, args.fire_every) for wave in waves for n in range(0, args.trials)]
+
+    results = {wave: [] for wave in waves}
+    start = time.perf_counter()
+    workDir()
+    pool = multiprocessing.Pool(args.jobs, initializer=startWorker)
+    for n, trial in enumerate(pool.imap_unordered(runTrial, tasks, chunksize=8)):
+        results[trial['wave']].append(trial)
+        if (n + 1) % 100 == 0:
+            print('{}/{} trials'.format(n + 1, len(tasks)), end='\r', file=sys.stderr)
+    # close() rather than the with block's terminate(), SDL catches the
+    # SIGTERM terminate() sends and the workers never exit
+    pool.close()
+    pool.join()
+    elapsed = time.perf_counter() - start
+    print('{} trials in {:.1f}s on {} processes'.format(len(tasks), elapsed, args.jobs), file=sys.stderr)
+
+    summary = {wave: summarise(results[wave]) for wave in waves}
+
+    print('wave  survive  clear  clear_s p50/p90  shots  base_loss  self_hits')
+    for wave in waves:
+        s = summary[wave]
+        print('{:4}  {:7.1%}  {:5.1%}  {:6.1f} /{:5.1f}  {:5.1f}  {:9.1%}  {:9.1f}'.format(
+            wave, s['survival_rate'], s['clear_rate'], s['clear_p50_s'], s['clear_p90_s'], s['shots_mean'],
+            s['base_loss_prob'], s['self_hits_mean']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'bases': args.bases, 'fire_every': args.fire_every, 'seed': args.seed,
+                       'waves': {str(wave): summary[wave] for wave in waves}}, f, indent=2)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  encode.py
+#
+# replay export throughput against core count. Renders a replay's frames
+# once (a given replay, or a game played by the scripted aim policy), then
+# times exporting them as PNGs and as Y4M with 0 (encode in this process),
+# 1, 2 ... up to the core count worker processes, and prints frames per
+# second for each as JSON. The rendering cost is reported on its own, an
+# export from a replay pays both.
+#
+#   python benchmarks/encode.py
+#   python benchmarks/encode.py replays/replay-20200101-120000.json -n 200
+#   python benchmarks/encode.py -j 8 --scale 0.5 -f y4m
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import itertools
+import tempfile
+import multiprocessing
+
+from common import loadGame, AimPolicy
+
+def recordReplay(cannon, ticks, seed):
+
+    # a replay played by the aim policy, in the shape export.loadReplay gives
+    game = cannon.Game()
+    game.random_seed = seed
+    game.gamemode = cannon.GAME_MODE_LIVE
+    game.startGame()
+    game.gamestate = cannon.GAME_STATE_IN_PROGRESS
+    policy = AimPolicy(cannon)
+    for tick in range(0, ticks):
+        # stepInput() records the tick. Stopping at game over means
+        # update() never finish()es the bot's score into the high scores
+        mousex, mousey, click = game.stepInput(*policy.next(game))
+        if game.gamestate == cannon.GAME_STATE_OVER:
+            break
+        game.update(mousex, mousey, click)
+    assert len(game.recording) > 0, 'the aim policy recorded no input'
+    replay = {'seed' : seed, 'swarm' : False, 'masks' : game.mask_collisions,
+              'flow' : game.brute_flow_field,
+              'recording' : [list(tick) for tick in game.recording]}
+    game.io.stop()
+    game.scoreboard.store.close()
+    return replay
+
+def main():
+
+    parser = argparse.ArgumentParser(description='replay export frames per second against core count')
+    parser.add_argument('replay', nargs='?', help='default a game played by the aim policy')
+    parser.add_argument('-n', '--frames', type=int, default=300, help='frames to export')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='most worker processes to try')
+    parser.add_argument('-f', '--format', choices=['png', 'y4m'], default=None, help='default both')
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--level', type=int, default=None, help='PNG compression level')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    replay_path = os.path.abspath(args.replay) if args.replay else None
+    cannon = loadGame()
+    import export
+
+    if replay_path is not None:
+        replay = export.loadReplay(replay_path)
+    else:
+        replay = recordReplay(cannon, args.frames, args.seed)
+
+    game = cannon.Game()
+    start = time.perf_counter()
+    frames = list(itertools.islice(export.renderFrames(cannon, game, replay, args.scale), args.frames))
+    render_seconds = time.perf_counter() - start
+    game.io.stop()
+    game.scoreboard.store.close()
+    if len(frames) == 0:
+        print('nothing to export')
+        return 1
+
+    level = args.level if args.level is not None else export.PNG_LEVEL
+    formats = [args.format] if args.format else [export.FORMAT_PNG, export.FORMAT_Y4M]
+    # spawned workers only import export, not the game
+    context = multiprocessing.get_context('spawn')
+    workdir = tempfile.mkdtemp(prefix='cannon-encode-')
+    results = {}
+    try:
+        for fmt in formats:
+            out = workdir if fmt == export.FORMAT_PNG else os.devnull
+            for jobs in range(0, args.jobs + 1):
+                pool = context.Pool(jobs) if jobs > 0 else None
+                try:
+                    if pool is not None:
+                        # start the workers before the clock does
+                        pool.map(len, [b''] * jobs)
+                    start = time.perf_counter()
+                    count = export.export(frames, fmt, out, pool, max(2, jobs * 2), game.fps, 1, level)
+                    seconds = time.perf_counter() - start
+                finally:
+                    if pool is not None:
+                        pool.close()
+                        pool.join()
+                results['{}_j{}'.format(fmt, jobs)] = count / seconds
+    finally:
+        shutil.rmtree(workdir)
+
+    width, height = frames[0][1], frames[0][2]
+    result = {
+        'frames'       : len(frames),
+        'size'         : '{}x{}'.format(width, height),
+        'cores'        : multiprocessing.cpu_count(),
+        'render_fps'   : len(frames) / render_seconds,
+        'encode_fps'   : results,
+    }
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
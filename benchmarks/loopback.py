@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  loopback.py
+#
+# co-op netplay test over loopback. Two processes each run a headless
+# game in real time, one hosting and one joining, both played by the
+# scripted aim policy. Latency, jitter and loss are added to every
+# datagram each end sends. Prints rollback counts and cost, stalls and
+# ping for both ends, and compares the two ends' checksums of the
+# confirmed game state (any mismatch is a desync, exit status 1).
+#
+#   python benchmarks/loopback.py
+#   python benchmarks/loopback.py -d 60 --latency 100 --jitter 30 --loss 0.05
+#   python benchmarks/loopback.py --delay 0 --fire-every 4
+
+import sys
+import json
+import time
+import socket
+import argparse
+import multiprocessing
+
+from common import loadGame, workDir, AimPolicy
+
+def percentile(values, pct):
+
+    if len(values) == 0:
+        return 0.0
+    s = sorted(values)
+    return s[int(round((len(s) - 1) * pct))]
+
+def freePort():
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def play(player, port, args, results):
+
+    # always answers, so the parent isn't left waiting
+    try:
+        results.put((player, playGame(player, port, args)))
+    except Exception as e:
+        results.put((player, {'error' : repr(e)}))
+        raise
+
+def playGame(player, port, args):
+
+    cannon = loadGame()
+    import netplay
+
+    options = {'latency'    : args.latency / 1000.0,
+               'jitter'     : args.jitter / 1000.0,
+               'loss'       : args.loss,
+               'noise_seed' : player}
+    if player == 0:
+        channel = netplay.hostGame(port, args.seed, False, timeout=10, **options)
+        seed = args.seed
+    else:
+        joined = netplay.joinGame('127.0.0.1', port, timeout=10, **options)
+        channel, seed, swarm = joined if joined is not None else (None, None, None)
+    if channel is None:
+        return {'error' : 'no connection'}
+
+    game = cannon.Game()
+    game.startNetplay(seed, False)
+    session = netplay.RollbackSession(game, channel, player, args.delay)
+    policy = AimPolicy(cannon, fire_every=args.fire_every, seed=player + 1)
+
+    frames = int(args.duration * game.fps)
+    tick_time = 1.0 / game.fps
+    next_tick = time.perf_counter()
+    give_up = next_tick + args.duration * 3 + 10
+    finished = None
+
+    # keep answering for a while after the last frame so the other end
+    # can confirm its own last frames too
+    while time.perf_counter() < give_up:
+        if session.frame < frames:
+            session.advance(policy.next(game))
+        else:
+            session.poll()
+        if finished is None and session.confirmed() >= frames:
+            finished = time.perf_counter()
+        if finished is not None and time.perf_counter() - finished > 1.0:
+            break
+
+        next_tick += tick_time
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    channel.close()
+    game.io.stop()
+    game.scoreboard.store.close()
+
+    times = [t * 1000.0 for t in session.rollback_times]
+    return {
+        'frames'            : session.frame,
+        'confirmed'         : session.confirmed(),
+        'rollbacks'         : session.rollbacks,
+        'resimulated'       : session.resimulated,
+        'deepest_rollback'  : session.max_depth,
+        'rollback_ms_p50'   : percentile(times, 0.5),
+        'rollback_ms_p99'   : percentile(times, 0.99),
+        'rollback_ms_max'   : max(times) if times else 0.0,
+        'snapshot_us_mean'  : session.snapshot_time / max(1, session.frame) * 1e6,
+        'stalls'            : session.stalls,
+        'ping_ms'           : session.ping * 1000.0,
+        'checksums_checked' : session.checked,
+        'desyncs'           : session.desyncs,
+        'score'             : game.scoreboard.targetscore,
+        'wave'              : game.wave_number,
+        'checksums'         : session.checksum_log,
+    }
+
+def main():
+
+    parser = argparse.ArgumentParser(description='co-op rollback netplay over loopback')
+    parser.add_argument('-d', '--duration', type=float, default=20.0, help='seconds of play')
+    parser.add_argument('--latency', type=float, default=60.0, help='ms added each way')
+    parser.add_argument('--jitter', type=float, default=10.0, help='up to this many ms more, at random')
+    parser.add_argument('--loss', type=float, default=0.0, help='fraction of datagrams dropped')
+    parser.add_argument('--delay', type=int, default=2, help='input delay in ticks')
+    parser.add_argument('--fire-every', type=int, default=12, help='ticks between each player\'s shots')
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    port = freePort()
+    results = multiprocessing.Queue()
+    workDir()
+    players = [multiprocessing.Process(target=play, args=(player, port, args, results)) for player in (0, 1)]
+    for process in players:
+        process.start()
+        # let the host get its socket open before the joiner says hello
+        time.sleep(0.5)
+
+    ends = dict([results.get() for process in players])
+    for process in players:
+        process.join()
+
+    if 'error' in ends[0] or 'error' in ends[1]:
+        print(json.dumps(ends, indent=2))
+        return 1
+
+    # the two ends' checksums of the same confirmed frames
+    host = dict(ends[0].pop('checksums'))
+    joiner = dict(ends[1].pop('checksums'))
+    common = [frame for frame in host if frame in joiner]
+    mismatched = [frame for frame in common if host[frame] != joiner[frame]]
+
+    result = {
+        'seconds'            : args.duration,
+        'latency_ms'         : args.latency,
+        'jitter_ms'          : args.jitter,
+        'loss'               : args.loss,
+        'input_delay'        : args.delay,
+        'host'               : ends[0],
+        'joiner'             : ends[1],
+        'frames_compared'    : len(common),
+        'frames_mismatched'  : len(mismatched),
+        'first_mismatch'     : min(mismatched) if mismatched else None,
+    }
+    print(json.dumps(result, indent=2))
+    return 1 if mismatched else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  run.py
+#
+# headless scenario benchmarks for cannon.py
+#
+#   python benchmarks/run.py                         run everything, print JSON
+#   python benchmarks/run.py -s wave50 -t 2000       one scenario
+#   python benchmarks/run.py --save-baseline         store benchmarks/baseline.json
+#   python benchmarks/run.py --compare               flag regressions against it
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+from common import loadGame, ROOT
+from scenarios import SCENARIOS
+
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+def measure(cannon, name, ticks):
+
+    # timing pass, a fresh profiler so setup work isn't counted
+    game, step = SCENARIOS[name](cannon)
+    profiler = cannon.FrameProfiler(cannon.PROFILER_PHASES, cannon.PROFILER_COLOURS, 1)
+    game.profiler = profiler
+    phase_totals = [0.0] * len(profiler.phases)
+    busy = []
+
+    start = time.perf_counter()
+    for n in range(0, ticks):
+        profiler.startFrame()
+        step()
+        profiler.endFrame()
+        number, phases, frame_busy, wall = profiler.frames[-1]
+        for i, ms in enumerate(phases):
+            phase_totals[i] += ms
+        busy.append(frame_busy)
+    elapsed = time.perf_counter() - start
+
+    # memory pass, tracemalloc slows everything down so it gets its own run
+    game, step = SCENARIOS[name](cannon)
+    tracemalloc.start()
+    for n in range(0, ticks):
+        step()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'ticks'         : ticks,
+        'ticks_per_sec' : ticks / elapsed,
+        'phase_ms'      : {p: phase_totals[i] / ticks for i, p in enumerate(profiler.phases)},
+        'p50_ms'        : profiler.percentile(busy, 0.5),
+        'p99_ms'        : profiler.percentile(busy, 0.99),
+        'peak_kb'       : peak / 1024.0,
+    }
+
+def compare(results, baseline, tolerance):
+
+    # returns a list of human readable regressions
+    regressions = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+
+        if current['ticks_per_sec'] < base['ticks_per_sec'] * (1 - tolerance):
+            regressions.append('{}: ticks/sec {:.1f} -> {:.1f}'.format(name, base['ticks_per_sec'], current['ticks_per_sec']))
+
+        for phase, ms in current['phase_ms'].items():
+            was = base['phase_ms'].get(phase, 0.0)
+            # ignore noise on phases that cost next to nothing
+            if ms > was * (1 + tolerance) and ms - was > 0.05:
+                regressions.append('{}: {} {:.3f}ms -> {:.3f}ms'.format(name, phase, was, ms))
+
+        if current['p99_ms'] > base['p99_ms'] * (1 + tolerance) and current['p99_ms'] - base['p99_ms'] > 0.1:
+            regressions.append('{}: p99 {:.2f}ms -> {:.2f}ms'.format(name, base['p99_ms'], current['p99_ms']))
+
+        if current['peak_kb'] > base['peak_kb'] * (1 + tolerance):
+            regressions.append('{}: peak memory {:.0f}KB -> {:.0f}KB'.format(name, base['peak_kb'], current['peak_kb']))
+
+    return regressions
+
+def main():
+
+    parser = argparse.ArgumentParser(description='headless cannon benchmarks')
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS), help='scenario to run, repeatable (default all)')
+    parser.add_argument('-t', '--ticks', type=int, default=3000)
+    parser.add_argument('-o', '--output', help='write results JSON here as well as stdout')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, help='compare with a baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed slowdown before flagging, 0.10 = 10%%')
+    args = parser.parse_args()
+
+    # loadGame() moves to a scratch directory
+    output = os.path.abspath(args.output) if args.output else None
+    compare_file = os.path.abspath(args.compare) if args.compare else None
+    cannon = loadGame()
+
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        results[name] = measure(cannon, name, args.ticks)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    print(text)
+
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w') as f:
+            f.write(text)
+
+    if compare_file:
+        with open(compare_file) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print('REGRESSION ' + line, file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  scenarios.py
+#
+# each scenario builds a game in a known state and returns it with a
+# step function that advances it by one tick. The runner owns the timing
+# and swaps in its own profiler, step functions only mark phases.
+
+import random
+from common import AimPolicy
+
+def liveStep(cannon, game, policy):
+
+    def step():
+
+        mousex, mousey, click = policy.next(game)
+        game.profiler.mark('input')
+        game.update(mousex, mousey, click)
+        cannon.screen.fill(cannon.COLOUR_BLACK)
+        game.draw()
+        game.profiler.mark('draw')
+
+    return step
+
+def startAtWave(cannon, wave):
+
+    game = cannon.Game()
+    game.spacebarPressed()
+    if wave > 1:
+        # spawnWave() increments wave_number before spawning
+        game.wave_number = wave - 1
+        game.spawnWave()
+    return game
+
+def wave1(cannon):
+
+    game = startAtWave(cannon, 1)
+    return game, liveStep(cannon, game, AimPolicy(cannon))
+
+def wave50(cannon):
+
+    game = startAtWave(cannon, 50)
+    return game, liveStep(cannon, game, AimPolicy(cannon, fire_every=6))
+
+def bruteWave(cannon):
+
+    game = cannon.Game()
+    game.spacebarPressed()
+    # spawnBrutes() only fires when a single base is left
+    game.bases = game.bases[:1]
+    game.wave_number = cannon.MAX_BRUTES - 1
+    game.spawnWave()
+    return game, liveStep(cannon, game, AimPolicy(cannon, fire_every=8))
+
+def swarm(cannon):
+
+    game = cannon.Game()
+    game.swarm = True
+    game.spacebarPressed()
+    return game, liveStep(cannon, game, AimPolicy(cannon, fire_every=6))
+
+def particleStorm(cannon):
+
+    game = cannon.Game()
+    psc = game.psc
+    rnd = random.Random(7)
+    state = {'tick': 0}
+
+    def step():
+
+        # a pair of base-sized explosions every fifth tick, bursts die off
+        # within a second or so, so this settles at a few thousand particles
+        state['tick'] += 1
+        game.profiler.mark('input')
+        for n in range(0, 2 if state['tick'] % 5 == 0 else 0):
+            x = rnd.randint(0, cannon.SCREEN_WIDTH)
+            y = rnd.randint(0, cannon.SCREEN_HEIGHT)
+            psc.spawnBurstDirection(x, y, 270, 20, 200)
+            psc.spawnBurstCircle(x, y, 50, cannon.COLOUR_YELLOW)
+            psc.spawnScoreBurst(x, y, cannon.SCOREFONT_BRUTE_HIT)
+        psc.update()
+        game.profiler.mark('particles')
+        cannon.screen.fill(cannon.COLOUR_BLACK)
+        psc.draw()
+        game.profiler.mark('draw')
+
+    return game, step
+
+def longReplay(cannon, ticks=6000):
+
+    # play a scripted game to build a recording, then replay it from the
+    # start the same way Game.run() does
+    game = startAtWave(cannon, 1)
+    policy = AimPolicy(cannon, fire_every=10)
+    for n in range(0, ticks):
+        mousex, mousey, click = game.stepInput(*policy.next(game))
+        game.update(mousex, mousey, click)
+
+    game.gamestate = cannon.GAME_STATE_OVER
+    game.startReplay()
+
+    def step():
+
+        mousex, mousey, click = game.stepInput(0, 0, False)
+        game.profiler.mark('input')
+        game.update(mousex, mousey, click)
+        cannon.screen.fill(cannon.COLOUR_BLACK)
+        game.draw()
+        game.profiler.mark('draw')
+
+    return game, step
+
+SCENARIOS = {
+    'wave1'          : wave1,
+    'wave50'         : wave50,
+    'brute_wave'     : bruteWave,
+    'swarm'          : swarm,
+    'particle_storm' : particleStorm,
+    'long_replay'    : longReplay,
+}
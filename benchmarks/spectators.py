@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  spectators.py
+#
+# localhost load test for the spectator broadcast. A headless game plays
+# itself in real time on a thread and publishes to a BroadcastServer,
+# while spectator clients (half of them joining late, to exercise the
+# catch-up backlog) read it. Prints latency (receive time less the time
+# the oldest tick in a batch was published) and bandwidth per spectator.
+#
+#   python benchmarks/spectators.py
+#   python benchmarks/spectators.py -c 50 -d 30
+#   python benchmarks/spectators.py -d 60 --speed 10 --verify
+#
+# --verify re-simulates what the first spectator received once the run
+# is over and checks it ends on the same score as the player.
+
+import sys
+import time
+import json
+import asyncio
+import argparse
+import threading
+
+from common import loadGame, AimPolicy
+
+def percentile(values, pct):
+
+    if len(values) == 0:
+        return 0.0
+    s = sorted(values)
+    return s[int(round((len(s) - 1) * pct))]
+
+# ======================================================================
+# Player class
+# ======================================================================
+# plays at the game's real tick rate and publishes every tick, starting
+# a new game whenever one ends
+
+class Player():
+
+    def __init__(self, cannon, broadcaster, speed=1.0):
+
+        self.cannon      = cannon
+        self.broadcaster = broadcaster
+        self.game        = cannon.Game()
+        self.policy      = AimPolicy(cannon, fire_every=8)
+        self.speed       = speed
+        self.running     = True
+        self.finished    = {}   # game number -> (seed, swarm, recording, score)
+
+    def run(self):
+
+        cannon = self.cannon
+        game = self.game
+        game.spacebarPressed()
+        tick_time = 1.0 / (game.fps * self.speed)
+        next_tick = time.perf_counter()
+
+        while self.running:
+            if game.gamestate == cannon.GAME_STATE_OVER:
+                self.finished[game.game_number] = (game.random_seed, game.swarm, list(game.recording), game.scoreboard.targetscore)
+                game.spacebarPressed()
+
+            mousex, mousey, click = game.stepInput(*self.policy.next(game))
+            game.update(mousex, mousey, click)
+            game.publishBroadcast()
+
+            next_tick += tick_time
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+# ======================================================================
+# Recorder class
+# ======================================================================
+# callbacks for a SpectatorClient that keep what arrived, per game
+
+class Recorder():
+
+    def __init__(self):
+
+        self.games = {}
+        self.gaps = 0
+
+    def onGame(self, info):
+
+        self.games[info['game']] = (info, [])
+
+    def onInputs(self, game, start, inputs):
+
+        if game not in self.games:
+            return
+        recording = self.games[game][1]
+        if start != len(recording):
+            self.gaps += 1
+            return
+        recording.extend(inputs)
+
+def resimulate(cannon, seed, swarm, recording):
+
+    # plays recording back the way spectate.py does, returns the score
+    game = cannon.Game()
+    game.random_seed = seed
+    game.swarm = swarm
+    game.gamemode = cannon.GAME_MODE_REPLAY
+    game.recording = recording
+    game.replay_length = len(recording)
+    game.startGame()
+    game.gamestate = cannon.GAME_STATE_IN_PROGRESS
+    while game.gamestate != cannon.GAME_STATE_OVER:
+        mousex, mousey, click = game.stepInput(0, 0, False)
+        game.update(mousex, mousey, click)
+    return game.scoreboard.targetscore
+
+async def watch(broadcast, clients, duration):
+
+    from broadcast import SpectatorClient
+
+    spectators = []
+    tasks = []
+    for n in range(0, clients):
+        recorder = Recorder()
+        client = SpectatorClient(recorder.onGame, recorder.onInputs)
+        client.recorder = recorder
+        spectators.append(client)
+
+    # half join at the start, half half way through
+    early = spectators[:(clients + 1) // 2]
+    late = spectators[(clients + 1) // 2:]
+    joined = {}
+    for client in early:
+        joined[client] = time.perf_counter()
+        tasks.append(asyncio.ensure_future(client.run('127.0.0.1', broadcast.port)))
+    await asyncio.sleep(duration / 2)
+    for client in late:
+        joined[client] = time.perf_counter()
+        tasks.append(asyncio.ensure_future(client.run('127.0.0.1', broadcast.port)))
+    await asyncio.sleep(duration / 2)
+
+    end = time.perf_counter()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return spectators, joined, end
+
+def main():
+
+    parser = argparse.ArgumentParser(description='spectator broadcast load test')
+    parser.add_argument('-c', '--clients', type=int, default=10)
+    parser.add_argument('-d', '--duration', type=float, default=20.0, help='seconds')
+    parser.add_argument('--interval', type=float, default=None, help='batch interval in seconds')
+    parser.add_argument('--speed', type=float, default=1.0, help='play this many times faster than real time')
+    parser.add_argument('--verify', action='store_true', help='re-simulate and compare scores afterwards')
+    args = parser.parse_args()
+
+    cannon = loadGame()
+    from broadcast import BroadcastServer, BATCH_INTERVAL
+
+    broadcast = BroadcastServer('127.0.0.1', 0, args.interval or BATCH_INTERVAL)
+    broadcast.start()
+    player = Player(cannon, broadcast, args.speed)
+    player.game.broadcaster = broadcast
+    thread = threading.Thread(target=player.run, name='player', daemon=True)
+    thread.start()
+
+    spectators, joined, end = asyncio.run(watch(broadcast, args.clients, args.duration))
+
+    player.running = False
+    thread.join()
+    broadcast.stop()
+
+    latencies = [l * 1000.0 for client in spectators for l in client.latencies]
+    rates = [client.bytes / (end - joined[client]) for client in spectators]
+    ticks = sum(client.ticks for client in spectators)
+    result = {
+        'clients'          : args.clients,
+        'seconds'          : args.duration,
+        'batch_interval_s' : broadcast.interval,
+        'speed'            : args.speed,
+        'latency_p50_ms'   : percentile(latencies, 0.5),
+        'latency_p99_ms'   : percentile(latencies, 0.99),
+        'latency_max_ms'   : max(latencies) if latencies else 0.0,
+        'bytes_per_sec'    : sum(rates) / len(rates),
+        'bytes_per_tick'   : sum(client.bytes for client in spectators) / max(1, ticks),
+        'server_bytes'     : broadcast.bytes_sent,
+        'dropped_clients'  : broadcast.dropped,
+        'gaps'             : sum(client.recorder.gaps for client in spectators),
+    }
+
+    if args.verify:
+        # the player's current game never finished, check the ones that did
+        recorder = spectators[0].recorder
+        checked = 0
+        mismatched = 0
+        for number, (seed, swarm, recording, score) in player.finished.items():
+            if number not in recorder.games:
+                continue
+            received = recorder.games[number][1]
+            checked += 1
+            if received != recording or resimulate(cannon, seed, swarm, received) != score:
+                mismatched += 1
+        result['games_verified'] = checked
+        result['games_mismatched'] = mismatched
+
+    print(json.dumps(result, indent=2))
+    return 1 if result.get('games_mismatched') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  trig.py
+#
+# microbenchmark, the sin/cos tables in vector.py against calling math
+# directly, for the ways the game uses them
+#
+#   python benchmarks/trig.py
+#   python benchmarks/trig.py -n 2000000
+
+import os
+import sys
+import math
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vector import Vector2, SIN_TABLE, COS_TABLE, sinDeg, cosDeg
+
+# each case is (name, direct math, table), timed per angle
+CASES = [
+    ('cos of a whole degree',
+     'for a in angles: math.cos(math.radians(a))',
+     'for a in angles: COS_TABLE[a]'),
+    ('sin + cos (brute wobble)',
+     'for a in angles: x = math.cos(math.radians(a)); y = math.sin(math.radians(a))',
+     'for a in angles: x = COS_TABLE[a]; y = SIN_TABLE[a]'),
+    ('any whole degree',
+     'for a in wangles: math.cos(math.radians(a))',
+     'for a in wangles: cosDeg(a)'),
+    ('float angle via int()',
+     'for a in fangles: math.cos(math.radians(a))',
+     'for a in fangles: cosDeg(int(a))'),
+    ('Vector2 from angle (particles)',
+     'for a in angles: v.setFromAngle(a)',
+     'for a in angles: v.setFromDegrees(a)'),
+    ('Vector2 rotate',
+     'for a in angles: v.rotate_degrees(a)',
+     'for a in angles: v.rotateWholeDegrees(a)'),
+]
+
+def main():
+
+    parser = argparse.ArgumentParser(description='trig table microbenchmark')
+    parser.add_argument('-n', '--number', type=int, default=1000000, help='calls per case')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='best of this many runs')
+    args = parser.parse_args()
+
+    loops = max(1, args.number // 361)
+    env = {
+        'math'      : math,
+        'SIN_TABLE' : SIN_TABLE,
+        'COS_TABLE' : COS_TABLE,
+        'sinDeg'    : sinDeg,
+        'cosDeg'    : cosDeg,
+        'angles'    : list(range(0, 361)),
+        'wangles'   : list(range(-720, -359)),
+        'fangles'   : [a + 0.25 for a in range(0, 361)],
+        'v'         : Vector2(1, 0),
+    }
+
+    print('{:<32} {:>10} {:>10} {:>8}'.format('case', 'math ns', 'table ns', 'speedup'))
+    for name, direct, table in CASES:
+        calls = loops * 361
+        t_direct = min(timeit.repeat(direct, globals=env, number=loops, repeat=args.repeat)) / calls * 1e9
+        t_table = min(timeit.repeat(table, globals=env, number=loops, repeat=args.repeat)) / calls * 1e9
+        print('{:<32} {:>10.1f} {:>10.1f} {:>7.2f}x'.format(name, t_direct, t_table, t_direct / t_table))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  broadcast.py
+#
+import json
+import time
+import queue
+import struct
+import asyncio
+import threading
+
+# Spectators re-simulate the game from the same seed and the same per
+# tick (mousex, mousey, click) input a replay uses, so all that goes over
+# the wire is the input.
+#
+# Every message is a 5 byte header (type, payload length) then the payload:
+#
+#   MSG_GAME   JSON {version, game, seed, swarm, masks, flow}, a new game started
+#   MSG_INPUT  game (u32), first tick index (u32), tick count (u16),
+#              send time of the oldest tick in it (double, unix time,
+#              0 for a catch-up backlog) then the ticks
+#
+# Each tick is two varints: the change in mousex since the previous tick
+# (zigzag encoded, shifted up one with click in the low bit) and the
+# change in mousey, and a tick with a click has a third, the click's lead
+# (clicks from low latency input are 1 + how far before the tick they
+# came, a plain click is 0). A still mouse costs 2 bytes a tick. Ticks
+# are batched, BATCH_INTERVAL seconds at a time.
+
+PROTOCOL_VERSION = 2
+MSG_GAME         = 1
+MSG_INPUT        = 2
+HEADER           = struct.Struct('!BI')
+INPUT_HEADER     = struct.Struct('!IIHd')
+BATCH_INTERVAL   = 0.1
+MAX_BATCH_TICKS  = 65535
+MAX_CLIENT_BUFFER = 1024 * 1024   # a spectator this far behind is dropped
+
+def zigzag(n):
+
+    if n >= 0:
+        return n << 1
+    return ((-n) << 1) - 1
+
+def unzigzag(n):
+
+    if n & 1:
+        return -((n + 1) >> 1)
+    return n >> 1
+
+def appendVarint(out, n):
+
+    while n > 0x7f:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def readVarint(data, i):
+
+    # returns (value, index after it)
+    n = 0
+    shift = 0
+    while True:
+        b = data[i]
+        i += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+def encodeInputs(inputs, base):
+
+    # base is the (mousex, mousey) of the tick before inputs[0]
+    out = bytearray()
+    px, py = base
+    for x, y, click in inputs:
+        appendVarint(out, (zigzag(x - px) << 1) | (1 if click else 0))
+        appendVarint(out, zigzag(y - py))
+        if click:
+            appendVarint(out, 0 if click is True else click - 1)
+        px, py = x, y
+    return bytes(out)
+
+def decodeInputs(data, count, base):
+
+    inputs = []
+    px, py = base
+    i = 0
+    for n in range(0, count):
+        v, i = readVarint(data, i)
+        dy, i = readVarint(data, i)
+        px += unzigzag(v >> 1)
+        py += unzigzag(dy)
+        click = False
+        if v & 1:
+            lead, i = readVarint(data, i)
+            click = 1 + lead if lead else True
+        inputs.append((px, py, click))
+    return inputs
+
+def packMessage(kind, payload):
+
+    return HEADER.pack(kind, len(payload)) + payload
+
+def packGame(info):
+
+    return packMessage(MSG_GAME, json.dumps(info).encode('utf-8'))
+
+def packInputs(game, start, inputs, base, sent_time):
+
+    body = encodeInputs(inputs, base)
+    return packMessage(MSG_INPUT, INPUT_HEADER.pack(game, start, len(inputs), sent_time) + body)
+
+# ======================================================================
+# BroadcastServer class
+# ======================================================================
+# Runs an asyncio server on its own thread. The game calls publish() once
+# a frame from its main loop with the live recording, which never blocks:
+# new ticks are handed to the server thread and go out in the next batch,
+# encoded once and written to every spectator. A spectator that joins
+# mid game gets the game info and everything so far in one message and
+# catches up by simulating it fast.
+
+class BroadcastServer():
+
+    def __init__(self, host='0.0.0.0', port=5050, interval=BATCH_INTERVAL):
+
+        self.host      = host
+        self.port      = port
+        self.interval  = interval
+        self.loop      = None
+        self.server    = None
+        self.thread    = None
+        self.clients   = set()
+        self.info      = None
+        self.inputs    = []
+        self.times     = []     # unix time each tick was published
+        self.sent      = 0      # inputs[:sent] have gone out
+        self.published = 0      # main thread, ticks handed over so far
+        self.game      = None   # main thread, game number handed over
+        self.bytes_sent = 0
+        self.dropped   = 0
+
+    def start(self):
+
+        # returns once the socket is listening
+        ready = queue.Queue()
+        self.thread = threading.Thread(target=self.serve, args=(ready,), name='broadcast', daemon=True)
+        self.thread.start()
+        error = ready.get()
+        if error is not None:
+            raise error
+
+    def serve(self, ready):
+
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(self.connected, self.host, self.port))
+        except OSError as e:
+            ready.put(e)
+            return
+        if self.port == 0:
+            self.port = self.server.sockets[0].getsockname()[1]
+        ready.put(None)
+
+        flusher = self.loop.create_task(self.flushEvery())
+        self.loop.run_forever()
+
+        flusher.cancel()
+        self.server.close()
+        for writer in list(self.clients):
+            writer.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    def stop(self):
+
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop = None
+
+    def publish(self, game, seed, swarm, recording, masks=False, flow=False):
+
+        # main thread. game is a number that changes with each new game,
+        # recording the live input list for it
+        if game != self.game:
+            self.game = game
+            self.published = 0
+            info = {'version': PROTOCOL_VERSION, 'game': game, 'seed': seed, 'swarm': swarm, 'masks': masks, 'flow': flow}
+            self.loop.call_soon_threadsafe(self.newGame, info)
+
+        if len(recording) > self.published:
+            ticks = recording[self.published:]
+            self.published += len(ticks)
+            self.loop.call_soon_threadsafe(self.addInputs, game, ticks, time.time())
+
+    # everything below runs on the server thread
+
+    def newGame(self, info):
+
+        self.flush()
+        self.info = info
+        self.inputs = []
+        self.times = []
+        self.sent = 0
+        self.sendAll(packGame(info))
+
+    def addInputs(self, game, ticks, now):
+
+        if self.info is None or self.info['game'] != game:
+            return
+        self.inputs.extend(ticks)
+        self.times.extend([now] * len(ticks))
+
+    async def flushEvery(self):
+
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+
+        while self.sent < len(self.inputs):
+            start = self.sent
+            end = min(len(self.inputs), start + MAX_BATCH_TICKS)
+            self.sendAll(packInputs(self.info['game'], start, self.inputs[start:end], self.base(start), self.times[start]))
+            self.sent = end
+
+    def base(self, start):
+
+        if start == 0:
+            return (0, 0)
+        return self.inputs[start - 1][:2]
+
+    def sendAll(self, message):
+
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                # not keeping up, it can reconnect and catch up
+                self.dropped += 1
+                self.clients.discard(writer)
+                writer.close()
+                continue
+            writer.write(message)
+            self.bytes_sent += len(message)
+
+    async def connected(self, reader, writer):
+
+        if self.info is not None:
+            writer.write(packGame(self.info))
+            # the backlog, its latency means nothing so no send time
+            for start in range(0, self.sent, MAX_BATCH_TICKS):
+                end = min(self.sent, start + MAX_BATCH_TICKS)
+                writer.write(packInputs(self.info['game'], start, self.inputs[start:end], self.base(start), 0.0))
+        self.clients.add(writer)
+
+        # spectators never send anything, wait for them to hang up
+        try:
+            await reader.read()
+        except ConnectionError:
+            pass
+        self.clients.discard(writer)
+        writer.close()
+
+# ======================================================================
+# SpectatorClient class
+# ======================================================================
+# Reads a broadcast and calls onGame(info) for each new game and
+# onInputs(game, start, inputs) for each batch, from the asyncio loop
+# it runs on. Keeps byte counts and per batch latency (receive time less
+# the send time of the oldest tick in it) for measuring.
+
+class SpectatorClient():
+
+    def __init__(self, onGame, onInputs):
+
+        self.onGame    = onGame
+        self.onInputs  = onInputs
+        self.last      = (0, 0)
+        self.bytes     = 0
+        self.messages  = 0
+        self.ticks     = 0
+        self.latencies = []
+
+    async def run(self, host, port):
+
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                kind, length = HEADER.unpack(header)
+                payload = await reader.readexactly(length)
+                self.received(kind, payload)
+        finally:
+            writer.close()
+
+    def received(self, kind, payload):
+
+        now = time.time()
+        self.bytes += HEADER.size + len(payload)
+        self.messages += 1
+
+        if kind == MSG_GAME:
+            info = json.loads(payload.decode('utf-8'))
+            if info.get('version') != PROTOCOL_VERSION:
+                # the inputs that follow would be read wrong
+                raise ConnectionError('broadcast is protocol version {}, expected {}'.format(info.get('version'), PROTOCOL_VERSION))
+            self.last = (0, 0)
+            self.onGame(info)
+
+        elif kind == MSG_INPUT:
+            game, start, count, sent_time = INPUT_HEADER.unpack_from(payload)
+            inputs = decodeInputs(payload[INPUT_HEADER.size:], count, self.last)
+            if count > 0:
+                self.last = inputs[-1][:2]
+            self.ticks += count
+            if sent_time > 0:
+                self.latencies.append(now - sent_time)
+            self.onInputs(game, start, inputs)
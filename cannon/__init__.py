@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  cannon/__init__.py
+#
+# the game, as a package that's safe to import: nothing opens a window,
+# starts the mixer or loads an asset until init() runs, and the first
+# Game() calls that itself. Everything lives in cannon.game, cannon.X is
+# looked up there each time so the fonts, images and sounds init() sets
+# are seen once it has run.
+#
+#   python -m cannon
+
+from cannon import game
+
+def __getattr__(name):
+
+    return getattr(game, name)
@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  cannon/__main__.py
+#
+#   python -m cannon
+
+import sys
+from cannon.game import main
+
+sys.exit(main())
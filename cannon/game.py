@@ -0,0 +1,3064 @@
+import pygame
+import math
+import random
+import os
+import sys
+import json
+import time
+import pathlib
+import pickle
+import queue
+import threading
+import itertools
+import zlib
+from vector import Vector2, SIN_TABLE, COS_TABLE
+from profiler import FrameProfiler
+from governor import QualityGovernor
+from highscores import HighScoreStore
+from ioworker import IOWorker, writeFileAtomic, appendLine
+from render import RenderTarget
+from activation import ActivationQueue
+from contacts import ContactManager, CONTACT_STAY
+from telemetry import (TelemetryLog, EVENT_SHOT, EVENT_DRYFIRE, EVENT_HIT, EVENT_BASE_LOST,
+                       EVENT_WAVE_END, EVENT_GAME_OVER, HIT_TARGET, HIT_BOMBER, HIT_BRUTE,
+                       HIT_BLOCKER, FORMAT_JSONL)
+from broadcast import BroadcastServer
+from sampler import StackSampler, writeReport
+from atlas import SpriteAtlas
+from flowfield import FlowField, DIRECTION_VECTORS, NO_DIRECTION
+from latency import EventClock, LatencyMeter
+from memory import (MemoryUsage, LeakTracker, groupBytes, tupleBytes, surfaceBytes,
+                    soundBytes, writeRecord, writeGrowth)
+
+  
+# ======================================================================
+# constants to help code readability
+# ======================================================================
+
+RANDOM_SEED               = 3
+GAME_MODE_LIVE            = 0
+GAME_MODE_REPLAY          = 1
+GAME_MODE_NETPLAY         = 2
+GAME_STATE_INTRO          = 0
+GAME_STATE_IN_PROGRESS    = 1
+GAME_STATE_WAVE_OVER      = 2
+GAME_STATE_LAST_BASE_LOST = 3
+GAME_STATE_OVER           = 4
+SCORE_PARTICAL_LIMIT      = 3
+
+# hard cap on live particals across every particle system, when a new
+# burst doesn't fit the oldest lowest priority systems are evicted
+PARTICLE_BUDGET           = 3000
+PARTICLE_PRIORITY_LOW     = 0
+PARTICLE_PRIORITY_NORMAL  = 1
+PARTICLE_PRIORITY_HIGH    = 2
+
+# the logical playfield, everything in the game is positioned in these
+# coordinates whatever size it is actually rendered at
+SCREEN_WIDTH = 1200
+SCREEN_HEIGHT = 600
+ORIGINX = SCREEN_WIDTH // 2
+ORIGINY = SCREEN_HEIGHT // 2
+SCREEN_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+COLOUR_BLACK      = (0, 0, 0)
+COLOUR_DARKBLUE   = (29, 43, 83)
+COLOUR_PURPLE     = (126, 37, 83)
+COLOUR_DARKGREEN  = (0, 135, 81)
+COLOUR_BROWN      = (171, 82, 54)
+COLOUR_DARKGREY   = (95, 87, 79)
+COLOUR_LIGHTGREY  = (194, 195, 199)
+COLOUR_WHITE      = (255, 241, 232)
+COLOUR_RED        = (255, 0, 77)
+COLOUR_ORANGE     = (255, 163, 0)
+COLOUR_YELLOW     = (255, 236, 39)
+COLOUR_GREEN      = (0, 228, 54)
+COLOUR_BLUE       = (41, 173, 255)
+COLOUR_LAVENDER   = (131, 118, 156)
+COLOUR_PINK       = (255, 119, 168)
+COLOUR_LIGHTPEACH = (255, 204, 170)
+
+IDX_COLOUR_BLACK      = 0
+IDX_COLOUR_DARKBLUE   = 1
+IDX_COLOUR_PURPLE     = 2
+IDX_COLOUR_DARKGREEN  = 3
+IDX_COLOUR_BROWN      = 4
+IDX_COLOUR_DARKGREY   = 5
+IDX_COLOUR_LIGHTGREY  = 6
+IDX_COLOUR_WHITE      = 7
+IDX_COLOUR_RED        = 8
+IDX_COLOUR_ORANGE     = 9
+IDX_COLOUR_YELLOW     = 10
+IDX_COLOUR_GREEN      = 11
+IDX_COLOUR_BLUE       = 12
+IDX_COLOUR_LAVENDER   = 13
+IDX_COLOUR_PINK       = 14
+IDX_COLOUR_LIGHTPEACH = 15
+
+COLOUR_PALETTE = [COLOUR_BLACK    ,
+                  COLOUR_DARKBLUE ,
+                  COLOUR_PURPLE   ,
+                  COLOUR_DARKGREEN,
+                  COLOUR_BROWN    ,
+                  COLOUR_DARKGREY ,
+                  COLOUR_LIGHTGREY,
+                  COLOUR_WHITE    ,
+                  COLOUR_RED      ,
+                  COLOUR_ORANGE   ,
+                  COLOUR_YELLOW   ,
+                  COLOUR_GREEN    ,
+                  COLOUR_BLUE     ,
+                  COLOUR_LAVENDER ,
+                  COLOUR_PINK     ,
+                  COLOUR_LIGHTPEACH]
+
+# internal render resolution as a fraction of the playfield, scaled to
+# the window once per frame. H cycles RENDER_SCALES, F toggles fullscreen
+RENDER_SCALE      = 1.0
+RENDER_SCALES     = [1.0, 0.75, 0.5]
+RENDER_FULLSCREEN = False
+
+# run the simulation on its own thread a tick ahead of drawing, T toggles
+# it while playing. Keys in RENDER_KEYS are handled on the draw thread
+PIPELINE_RENDER = False
+PIPELINE_PHASES = ['input', 'draw', 'flip']
+PIPELINE_COLOURS = [COLOUR_BLUE, COLOUR_LAVENDER, COLOUR_LIGHTGREY]
+
+# low latency input (latency.py), L toggles it and turns the pipelined
+# loop off. While waiting for the next frame the loop reads events every
+# INPUT_POLL_INTERVAL seconds and stamps them. A click aims where it was
+# made and its ball starts as far on as the time since the click, in
+# 1/CLICK_LEAD_STEPS of a tick. The lead is recorded in the click so
+# replays and spectators fire the same ball. The reticule moves
+# RETICULE_SMOOTHING of the way to the mouse a tick, LOW_LATENCY_SMOOTHING
+# in low latency mode (1 puts it on the mouse)
+LOW_LATENCY_INPUT     = False
+INPUT_POLL_INTERVAL   = 0.001
+CLICK_LEAD_STEPS      = 16
+RETICULE_SMOOTHING    = 0.2
+LOW_LATENCY_SMOOTHING = 1.0
+LATENCY_SAMPLES       = 300
+# replay playback speeds, - and = step through them and S switches
+# between 1x and the slowest. Above 1x several ticks are simulated for
+# each frame drawn, below it some frames don't simulate at all
+REPLAY_SPEEDS = [0.25, 0.5, 1, 2, 4, 8, 16]
+REPLAY_SPEED_DOWN = [pygame.K_MINUS, pygame.K_KP_MINUS]
+REPLAY_SPEED_UP   = [pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS]
+
+RENDER_KEYS = [pygame.K_t, pygame.K_h, pygame.K_f, pygame.K_p, pygame.K_c, pygame.K_q, pygame.K_b, pygame.K_k, pygame.K_m, pygame.K_l]
+
+# wave limits
+MAX_BOMBERS   = 8
+MAX_BLOCKERS  = 10
+MAX_BRUTES    = 10
+MAX_WAVE_TIME = 120 # length of wave in seconds
+
+# swarm mode ignores the wave limits above, W toggles it on the intro
+# screen. Used as a load test so the counts are deliberately silly.
+SWARM_TARGETS  = 2000
+SWARM_BLOCKERS = 300
+SWARM_BOMBERS  = 500
+SWARM_BRUTES   = 500
+
+# enemies spawned off screen wait in a queue until they are about to come
+# into view, then are caught up and start getting update()d. This many
+# ticks early, so rounding in the arrival estimate never makes one late
+ACTIVATION_LEAD = 2
+BRUTE_MARGIN    = 48    # brutes are drawn up to ~40px off their position
+
+# ticks each animation frame is shown, the whole group flashes together
+# off the game tick
+TARGET_FLASH_TICKS = 4
+BOMBER_FLASH_TICKS = 11
+BRUTE_FLASH_TICKS  = 21
+
+# ball hits on targets, bombers and brutes are checked against the sprite
+# frame's mask once the rects overlap, so the transparent corners don't
+# count. Saved with replays, which play back the way they were recorded
+MASK_COLLISIONS = True
+
+# brutes steer round blockers to the nearest base by a flow field over
+# the playfield, rebuilt when the bases change and every FLOW_FIELD_TICKS
+# as the blockers drift. Off the playfield they keep going the way they
+# were. Saved with replays like MASK_COLLISIONS
+BRUTE_FLOW_FIELD = True
+FLOW_FIELD_CELL  = 24
+FLOW_FIELD_TICKS = 25
+BRUTE_SPEED      = 0.6
+BRUTE_STEER      = 0.1      # how much of the way to the field's direction a tick
+
+# scores
+SCORE_TARGET_HIT  = 250
+SCORE_BOMBER_HIT  = 500
+SCORE_BRUTE_HIT   = 1000
+
+# high score table
+HIGHSCORE_STORE   = 'highscores'      # highscores.db + highscores.journal
+HIGHSCORE_LEGACY  = 'highscores.pkl'  # imported once if the store is empty
+HIGHSCORE_PLAYER  = 'PLAYER 1'
+HIGHSCORE_ROWS    = 10
+
+# everything below is written by the io worker, off the frame loop
+REPLAY_DIR        = 'replays'
+STATS_FILE        = 'stats.jsonl'
+IO_QUEUE_SIZE     = 64
+
+# game event log (telemetry.py), live games only. One file per run,
+# FORMAT_JSONL or FORMAT_BINARY, written a batch of events at a time
+TELEMETRY         = True
+TELEMETRY_DIR     = 'telemetry'
+TELEMETRY_FORMAT  = FORMAT_JSONL
+TELEMETRY_RING    = 4096
+TELEMETRY_BATCH   = 256
+
+# frame spike capture (sampler.py), K toggles it. While it's on a thread
+# samples the game loop's stack every millisecond, and any frame busier
+# than SPIKE_THRESHOLD_MS is written to SPIKE_DIR with its samples and
+# the game state. Set SPIKE_CAPTURE to have it on from the start
+SPIKE_CAPTURE      = False
+SPIKE_THRESHOLD_MS = 30.0
+SPIKE_DIR          = 'spikes'
+SPIKE_COOLDOWN     = 1.0     # seconds after a capture before the next
+SPIKE_MAX_REPORTS  = 100     # per run, a slow machine mustn't fill the disk
+
+# memory accounting (memory.py), M shows it over the game. A usage
+# record goes to MEMORY_DIR every MEMORY_DUMP_SECONDS, one file per run.
+# With MEMORY_TRACE on tracemalloc runs from the start (slowing every
+# allocation down) and what grew between waves is written there too
+MEMORY_DIR             = 'memory'
+MEMORY_DUMP_SECONDS    = 60.0
+MEMORY_OVERLAY_SECONDS = 0.5
+MEMORY_TRACE           = False
+MEMORY_TRACE_FRAMES    = 1
+MEMORY_TRACE_TOP       = 20
+
+# spectators (spectate.py) connect here while B has broadcasting on
+BROADCAST_HOST    = '0.0.0.0'
+BROADCAST_PORT    = 5050
+
+# two player co-op over the network (coop.py, netplay.py). Player 2's
+# cannon sits bottom right, both defend the same bases
+NETPLAY_PORT      = 5060
+COOP_TANK_X       = SCREEN_WIDTH - 46
+COOP_CANNON_X     = SCREEN_WIDTH - 38
+COOP_CANNON_Y     = 550
+
+# what Game.snapshot() keeps for rolling back: these attributes as they
+# are, and copies of the entities in these lists
+SNAPSHOT_FIELDS = ['gamestate', 'gamestate_delay', 'current_tick', 'wave_start_tick', 'wave_seconds',
+                   'wave_number', 'maxballs', 'shots_fired', 'shots_fired_total', 'shot_accuracy',
+                   'targets_killed', 'bombers_killed', 'brutes_killed', 'blockers_hit', 'bullet_bonus',
+                   'targets_killed_this_wave', 'bombers_killed_this_wave', 'brutes_killed_this_wave',
+                   'shot_accuracy_this_wave', 'flow_field']
+SNAPSHOT_GROUPS = ['balls', 'bases', 'targets', 'blockers', 'bombers', 'brutes']
+
+# frame profiler, P toggles the overlay and C exports the ring buffer
+PROFILER_PHASES  = ['input', 'entities', 'collisions', 'particles', 'draw', 'flip']
+PROFILER_COLOURS = [COLOUR_BLUE, COLOUR_GREEN, COLOUR_ORANGE, COLOUR_PINK, COLOUR_LAVENDER, COLOUR_LIGHTGREY]
+PROFILER_FRAMES  = 300
+PROFILER_CSV     = 'profile.csv'
+
+# quality levels the governor picks from, cheapest first. Q switches the
+# governor off (full quality) and back on
+QUALITY_LEVELS = [
+    {'name' : 'low',    'particles' : 0.2, 'stars' : 10, 'score_bursts' : False},
+    {'name' : 'medium', 'particles' : 0.5, 'stars' : 25, 'score_bursts' : True},
+    {'name' : 'high',   'particles' : 1.0, 'stars' : 40, 'score_bursts' : True},
+]
+
+
+# ======================================================================
+# setup pygame
+# ======================================================================
+# nothing here runs on import. init() starts pygame, opens the window and
+# loads the assets, and the first Game() calls it if nothing has yet.
+# Tools that only simulate can call init(audio=False) first, then the
+# mixer is never started and no sound or music is decoded (images still
+# need a display, they're converted to its pixel format, so headless
+# tools point SDL at its dummy video driver).
+
+screen = RenderTarget(SCREEN_WIDTH, SCREEN_HEIGHT)
+clock = pygame.time.Clock()
+initialised = False
+
+# particles and stars draw from their own generator, so the module one is
+# only used by gameplay (seeded each wave). How many of them are made
+# follows the quality governor, which follows frame times, and the room
+# left in the particle pool, and a rollback skips them. None of that may
+# change what gameplay draws
+effects_random = random.Random()
+
+# every cannonball and blocker gets a uid from here, the contact manager
+# tracks touching pairs by them and they survive a snapshot copy
+entity_ids = itertools.count()
+
+def init(audio=True, scale=RENDER_SCALE, fullscreen=RENDER_FULLSCREEN):
+    
+    global initialised
+    if initialised:
+        return
+    if audio:
+        # set mixer to 512 value to stop buffering causing sound delay
+        # this must be called before anything else using mixer.pre_init()
+        pygame.mixer.pre_init(44100, -16, 2, 512)
+        pygame.init()
+        pygame.mixer.init()
+    else:
+        pygame.display.init()
+        pygame.font.init()
+    pygame.display.set_caption("Cannon")
+    pygame.mouse.set_visible(False)
+    screen.configure(scale, fullscreen)
+    loadFonts()
+    loadImages()
+    if audio:
+        loadSounds()
+    initialised = True
+
+# ======================================================================
+# load images and sounds
+# ======================================================================
+# from beside the package, wherever the game is run from. Sounds stay
+# None without audio, Game.playSound() and the songs check for that
+
+FILEPATH = pathlib.Path(__file__).resolve().parent.parent
+
+sound_boom = sound_big_boom = sound_gunfire = sound_dryfire = sound_blocker = sound_base_boom = None
+sound_track_main = sound_track_main_game_over = None
+
+def loadSounds():
+    
+    global sound_boom, sound_big_boom, sound_gunfire, sound_dryfire, sound_blocker, sound_base_boom
+    global sound_track_main, sound_track_main_game_over
+    
+    # load sound effects
+    sound_boom      = pygame.mixer.Sound(str(FILEPATH.joinpath('sounds' ,'boom.ogg')))
+    sound_big_boom  = pygame.mixer.Sound(str(FILEPATH.joinpath('sounds' ,'big_boom.ogg')))
+    sound_gunfire   = pygame.mixer.Sound(str(FILEPATH.joinpath('sounds' ,'gunfire.ogg')))
+    sound_dryfire   = pygame.mixer.Sound(str(FILEPATH.joinpath('sounds' ,'dryfire.ogg')))
+    sound_blocker   = pygame.mixer.Sound(str(FILEPATH.joinpath('sounds' ,'blocker.ogg')))
+    sound_base_boom = pygame.mixer.Sound(str(FILEPATH.joinpath('sounds' ,'base_explode.ogg')))
+    
+    # load background music
+    sound_track_main           = pygame.mixer.Sound(str(FILEPATH.joinpath('sounds' ,'rolemusic_the_black_frame.ogg')))
+    sound_track_main_game_over = pygame.mixer.Sound(str(FILEPATH.joinpath('sounds' ,'rolemusic_yellow_dust.ogg')))
+
+myfont10 = myfont20 = myfont30 = myfont80 = None
+SCOREFONT_TARGET_HIT = SCOREFONT_BOMBER_HIT = SCOREFONT_BRUTE_HIT = None
+
+def loadFonts():
+    
+    global myfont10, myfont20, myfont30, myfont80
+    global SCOREFONT_TARGET_HIT, SCOREFONT_BOMBER_HIT, SCOREFONT_BRUTE_HIT
+    
+    myfont10 = pygame.font.Font(str(FILEPATH.joinpath('assets' ,'digitalix.ttf')), 10)
+    myfont20 = pygame.font.Font(str(FILEPATH.joinpath('assets' ,'digitalix.ttf')), 20)
+    myfont30 = pygame.font.Font(str(FILEPATH.joinpath('assets' ,'digitalix.ttf')), 30)
+    myfont80 = pygame.font.Font(str(FILEPATH.joinpath('assets' ,'digitalix.ttf')), 80)
+    
+    SCOREFONT_TARGET_HIT  = myfont10.render(str(SCORE_TARGET_HIT) , 0, COLOUR_PALETTE[IDX_COLOUR_YELLOW])
+    SCOREFONT_BOMBER_HIT  = myfont10.render(str(SCORE_BOMBER_HIT) , 0, COLOUR_PALETTE[IDX_COLOUR_YELLOW])
+    SCOREFONT_BRUTE_HIT   = myfont10.render(str(SCORE_BRUTE_HIT)  , 0, COLOUR_PALETTE[IDX_COLOUR_YELLOW])
+
+sprites = None
+image_target = image_target_flash = image_bomber = image_bomber_flash = None
+image_brute = image_brute_flash = image_blocker = image_base_horz = image_base_vert = None
+image_reticule = image_tank = image_tank2 = image_bunny1 = None
+mask_ball = None
+
+def loadImages():
+    
+    global sprites
+    global image_target, image_target_flash, image_bomber, image_bomber_flash
+    global image_brute, image_brute_flash, image_blocker, image_base_horz, image_base_vert
+    global image_reticule, image_tank, image_tank2, image_bunny1, mask_ball
+    
+    # every sprite goes in the atlas, black is the transparent colour
+    sprites = SpriteAtlas(COLOUR_BLACK)
+    png = lambda name: sprites.load(FILEPATH.joinpath('png', name))
+    
+    sprites.add('target' , [png('target.png'), png('target_flash.png')], TARGET_FLASH_TICKS)
+    sprites.add('bomber' , [png('bomber.png'), png('bomber_flash.png')], BOMBER_FLASH_TICKS)
+    sprites.add('brute'  , [png('brute.png'), png('brute_flash.png')], BRUTE_FLASH_TICKS)
+    sprites.add('blocker', [png('blocker.png')])
+    sprites.add('base_horizontal', [png('base_horizontal.png')])
+    sprites.add('base_vertical'  , [png('base_vertical.png')])
+    sprites.add('reticule', [png('reticule.png')])
+    sprites.add('bunny1'  , [png('bunny1.png')])
+    tank = png('tank.png')
+    sprites.add('tank' , [tank])
+    # player 2's tank faces the other way
+    sprites.add('tank2', [pygame.transform.flip(tank, True, False)])
+    sprites.build()
+    
+    image_target       = sprites.image('target')
+    image_target_flash = sprites.image('target', 1)
+    image_bomber       = sprites.image('bomber')
+    image_bomber_flash = sprites.image('bomber', 1)
+    image_brute        = sprites.image('brute')
+    image_brute_flash  = sprites.image('brute', 1)
+    image_blocker      = sprites.image('blocker')
+    image_base_horz    = sprites.image('base_horizontal')
+    image_base_vert    = sprites.image('base_vertical')
+    image_reticule     = sprites.image('reticule')
+    image_tank         = sprites.image('tank')
+    image_tank2        = sprites.image('tank2')
+    image_bunny1       = sprites.image('bunny1')
+    
+    # cannonballs are solid squares
+    mask_ball = pygame.mask.Mask((8, 8), fill=True)
+
+#=======================================================================
+# Score Partical class
+#=======================================================================
+
+class ScorePartical():
+    
+    def __init__(self, pos, angle, speed, image):
+        
+        self.pos = Vector2(0, 0)
+        self.vel = Vector2(0, 0)
+        self.acc = Vector2(0,0)     
+        self.reset(pos, angle, speed, image)
+        
+    def reset(self, pos, angle, speed, image):
+        
+        # called by the pool to reuse a dead partical
+        self.pos.setFromValues(pos.x, pos.y)
+        self.vel.setFromValues(0, 0)
+        self.alpha = 255   
+        self.acc.setFromDegrees(angle)
+        self.acc.mult(speed)
+        self.image = image
+        self.image.set_alpha(self.alpha)
+        
+    def update(self):
+        
+        self.vel.add(self.acc)
+        self.pos.add(self.vel)
+        self.alpha -= abs(self.vel.y)
+        self.alpha = max(0,self.alpha)
+        self.image.set_alpha(self.alpha)
+        
+        # gravity hack
+        self.vel.y += 0.5
+        
+    def draw(self):
+        
+        screen.blit(self.image, (self.pos.x, self.pos.y))
+        
+    def isOffScreen(self):
+        
+        return (self.pos.x < 0) or (self.pos.x > SCREEN_WIDTH) or (self.pos.y < 0) or (self.pos.y > SCREEN_HEIGHT)
+        
+    def isDead(self):
+        
+        return (self.alpha <= 0) or (self.isOffScreen())
+
+
+#=======================================================================
+# Partical class
+#=======================================================================
+
+class Partical():
+    
+    def __init__(self, pos, angle, speed, size, colour):
+        
+        self.pos = Vector2(0, 0)
+        self.vel = Vector2(0, 0)
+        self.acc = Vector2(0,0)     
+        self.size = size
+        self.image = pygame.Surface([self.size, self.size])
+        self.reset(pos, angle, speed, size, colour)
+        
+    def reset(self, pos, angle, speed, size, colour):
+        
+        # called by the pool to reuse a dead partical, the pool only hands
+        # out particals of the right size so the surface can be kept
+        self.pos.setFromValues(pos.x, pos.y)
+        self.vel.setFromValues(0, 0)
+        self.alpha = 255   
+        self.acc.setFromDegrees(angle)
+        self.acc.mult(speed)
+        self.image.fill(colour)
+        self.image.set_alpha(self.alpha)
+        screen.forget(self.image)
+        
+    def update(self):
+        
+        self.vel.add(self.acc)
+        self.pos.add(self.vel)
+        self.alpha -= abs(self.vel.y)
+        self.alpha = max(0,self.alpha)
+        self.image.set_alpha(self.alpha)
+        
+        # gravity hack
+        self.vel.y += 0.2
+        
+    def draw(self):
+        
+        screen.blit(self.image, (self.pos.x, self.pos.y))
+        
+    def isOffScreen(self):
+        
+        return (self.pos.x < 0) or (self.pos.x > SCREEN_WIDTH) or (self.pos.y < 0) or (self.pos.y > SCREEN_HEIGHT)
+        
+    def isDead(self):
+        
+        return (self.alpha <= 0) or (self.isOffScreen())
+    
+
+#=======================================================================
+# particlepool class
+#=======================================================================
+
+class ParticlePool():
+    
+    # keeps dead particals for reuse and counts the live ones against
+    # the global budget. Particals are kept in free lists by size so a
+    # reused one never needs a new surface.
+    
+    def __init__(self, budget):
+        
+        self.budget = budget
+        self.live = 0
+        self.free = {}
+        self.free_score = []
+        
+    def room(self):
+        
+        return self.budget - self.live
+        
+    def partical(self, pos, angle, speed, size, colour):
+        
+        self.live += 1
+        free = self.free.get(size)
+        if free:
+            p = free.pop()
+            p.reset(pos, angle, speed, size, colour)
+            return p
+        return Partical(pos, angle, speed, size, colour)
+        
+    def scorePartical(self, pos, angle, speed, image):
+        
+        self.live += 1
+        if self.free_score:
+            p = self.free_score.pop()
+            p.reset(pos, angle, speed, image)
+            return p
+        return ScorePartical(pos, angle, speed, image)
+        
+    def release(self, p):
+        
+        self.live -= 1
+        if isinstance(p, ScorePartical):
+            self.free_score.append(p)
+        else:
+            self.free.setdefault(p.size, []).append(p)
+    
+
+#=======================================================================
+# particlesystem class
+#=======================================================================
+
+class ParticleSystem():
+    
+    def __init__(self, x, y, mx, pool, priority = 0):
+        
+        self.pos = Vector2(x, y)
+        self.particles = []
+        self.pool = pool
+        self.reset(x, y, mx, priority)
+        
+    def reset(self, x, y, mx, priority):
+        
+        self.pos.setFromValues(x, y)
+        self.max_particles = mx
+        self.priority = priority
+        
+    def killAll(self):
+        
+        for p in self.particles:
+            self.pool.release(p)
+        self.particles = []
+        
+    def burstDirection(self, angle, spread, colour):
+        
+        self.killAll()
+        for n in range(0, self.max_particles):
+            if colour is None:
+                c = COLOUR_PALETTE[effects_random.randint(0, 15)]
+            else:
+                c = colour
+            # vary the angle a little bit, particals take whole degrees
+            angle = (angle + effects_random.uniform(-spread, spread)) % 360
+            speed = effects_random.uniform(0.1, 0.7)
+            size = effects_random.randint(4, 16)
+            p = self.pool.partical(self.pos, int(angle), speed, size, c)
+            self.particles.append(p)
+            
+    def burstCircle(self, colour):
+        
+        self.killAll()
+        step = 360 // self.max_particles
+        for n in range(0, self.max_particles):
+            if colour is None:
+                c = COLOUR_PALETTE[effects_random.randint(0, 15)]
+            else:
+                c = colour
+                
+            angle = n * step
+            speed = effects_random.uniform(0.1, 0.7)
+            size = effects_random.randint(4, 16)
+            if size < 5 and effects_random.random() > 0.6:
+                c = COLOUR_WHITE
+            
+            p = self.pool.partical(self.pos, angle, speed, size, c)
+            self.particles.append(p)
+    
+    def scoreBurst(self, scoreimage):
+        
+        self.killAll()
+        step = 360 // self.max_particles
+        for n in range(0, self.max_particles):
+            angle = n * step
+            speed = 0.5
+            p = self.pool.scorePartical(self.pos, angle, speed, scoreimage)
+            self.particles.append(p)
+            
+    def update(self):
+        
+        cp = []
+        for p in self.particles:
+            if p.isDead():
+                self.pool.release(p)
+            else:
+                cp.append(p)
+        self.particles = cp
+        for p in self.particles:
+            p.update()
+            
+    def draw(self):
+        
+        for p in self.particles:
+            p.draw()
+        
+    def isDead(self):
+        
+        return len(self.particles) == 0
+        
+
+#=======================================================================
+# particlesystemController class
+#=======================================================================
+
+class ParticleSystemController():
+    
+    def __init__(self, budget = PARTICLE_BUDGET):
+        
+        self.systems = []
+        self.free_systems = []
+        self.pool = ParticlePool(budget)
+        self.particle_scale = 1.0   # set by the quality governor
+        self.score_bursts = True
+        self.enabled = True         # off while netplay re-simulates
+        
+    def scaled(self, n):
+        
+        return max(1, int(n * self.particle_scale))
+        
+    def makeRoom(self, n, priority):
+        
+        # evicts systems, lowest priority then oldest first, until n more
+        # particals fit in the budget. Never evicts anything with a higher
+        # priority than the new system. Returns how many particals can
+        # actually be spawned.
+        if n <= self.pool.room():
+            return n
+        # pick the victims first and rebuild the list once, removing them
+        # one at a time is quadratic with the many systems this is for
+        need = n - self.pool.room()
+        victims = set()
+        for p in range(0, priority + 1):
+            for system in self.systems:
+                if need <= 0:
+                    break
+                if system.priority == p:
+                    victims.add(id(system))
+                    need -= len(system.particles)
+        cp = []
+        for system in self.systems:
+            if id(system) in victims:
+                self.recycle(system)
+            else:
+                cp.append(system)
+        self.systems = cp
+        return min(n, self.pool.room())
+        
+    def recycle(self, system):
+        
+        system.killAll()
+        self.free_systems.append(system)
+        
+    def spawn(self, x, y, mx, priority = PARTICLE_PRIORITY_NORMAL):
+        
+        if not self.enabled:
+            return None
+        mx = self.makeRoom(mx, priority)
+        if mx <= 0:
+            return None
+        if self.free_systems:
+            system = self.free_systems.pop()
+            system.reset(x, y, mx, priority)
+        else:
+            system = ParticleSystem(x, y, mx, self.pool, priority)
+        self.systems.append(system)
+        return system
+        
+    def spawnBurstDirection(self, x, y, angle, spread, max_particles = 20, colour=None, priority = PARTICLE_PRIORITY_NORMAL):
+        
+        system = self.spawn(x, y, self.scaled(max_particles), priority)
+        if system is not None:
+            system.burstDirection(angle, spread, colour)
+        
+    def spawnBurstCircle(self, x, y, max_particles = 20, colour=None, priority = PARTICLE_PRIORITY_NORMAL):
+        
+        system = self.spawn(x, y, self.scaled(max_particles), priority)
+        if system is not None:
+            system.burstCircle(colour)
+        
+    def spawnScoreBurst(self, x, y, scoreimage):
+        
+        if not self.score_bursts:
+            return
+        system = self.spawn(x, y, SCORE_PARTICAL_LIMIT, PARTICLE_PRIORITY_HIGH)
+        if system is not None:
+            system.scoreBurst(scoreimage)
+        
+    def killAll(self):
+        
+        for s in self.systems:
+            self.recycle(s)
+        self.systems = []
+    
+    def update(self):
+        
+        if not self.enabled:
+            return
+        cp = []
+        for s in self.systems:
+            if s.isDead():
+                self.free_systems.append(s)
+            else:
+                cp.append(s)
+        self.systems = cp
+        for s in self.systems:
+            s.update()
+            
+    def draw(self):
+        
+        # one blits() call for every live partical
+        screen.blits([(p.image, (p.pos.x, p.pos.y)) for s in self.systems for p in s.particles], False)
+
+        
+#=======================================================================
+# Star class
+#=======================================================================
+
+class Star():
+    
+    def __init__(self):
+        
+        self.position = Vector2(effects_random.randint(0, SCREEN_WIDTH), effects_random.randint(0, SCREEN_HEIGHT))
+        self.velocity = Vector2(0.0, 1 + effects_random.random() * 10)
+        self.size = effects_random.randint(1,4)
+        self.image = pygame.Surface([self.size, self.size])
+        self.rect = self.image.get_rect()
+        self.image.fill(COLOUR_BLUE)
+
+    def reset(self):
+        
+        self.position.y = 0
+        self.position.x = effects_random.randint(0, SCREEN_WIDTH)
+        self.velocity.y = 1 + effects_random.random() * 10
+        
+    def update(self):
+        
+        # add a little to vel each frame to make it look a bit 
+        # like gravity is pulling it down like rain
+        # reset() will set vel back to a baseline
+        
+        self.velocity.y += 0.02
+        self.position.add(self.velocity)
+        self.rect.x = self.position.x
+        self.rect.y = self.position.y
+        
+    def draw(self):
+        
+        screen.blit(self.image, self.rect)
+
+
+#=======================================================================
+# Starfield class
+#=======================================================================
+
+class StarField():
+    
+    def __init__(self):
+        
+        self.stars = []
+        self.max_stars = 40
+        self.enabled = True
+        
+        for i in range(0, self.max_stars):
+            star = Star()
+            self.stars.append(star)
+            
+    def setStarCount(self, n):
+        
+        self.max_stars = n
+        while len(self.stars) < n:
+            self.stars.append(Star())
+        del self.stars[n:]
+            
+    def update(self):
+        
+        if not self.enabled:
+            return
+        for star in self.stars:
+            star.update()
+            
+            if star.position.y > SCREEN_HEIGHT:
+                star.reset()
+                
+    def draw(self):
+        
+        for star in self.stars:
+            star.draw()
+
+
+# ======================================================================
+# cannonball class
+# ======================================================================
+class Cannonball():
+
+    def __init__(self, x, y, owner=0):
+        
+        self.pos = Vector2(x, y)
+        self.vel = Vector2(0, 0)
+        self.acc = Vector2(0, 0)
+        self.size = 8
+        self.mass = 20
+        self.rect = pygame.Rect(x, y, self.size, self.size)
+        self.image = pygame.Surface([self.size, self.size])
+        self.image.fill(COLOUR_PINK)
+        self.isflying = False
+        self.dead = False
+        self.owner = owner  # which player fired it
+        self.uid = next(entity_ids)
+        
+    def launch(self, f):
+        
+        self.applyForce(f)
+        self.isflying = True
+        
+    def advance(self, fraction):
+        
+        # moves on part of a tick at the speed the next update() gives
+        # it, for a ball fired between ticks
+        self.pos.x += (self.vel.x + self.acc.x) * fraction
+        self.pos.y += (self.vel.y + self.acc.y) * fraction
+        self.rect.x = self.pos.x
+        self.rect.y = self.pos.y
+        
+    def applyForce(self, f):
+        
+        # make a copy to preserve the original vector values
+        fcopy = f.getCopy()
+        fcopy.div(self.mass)
+        self.acc.add(fcopy)
+        
+    def update(self):
+        
+        self.vel.add(self.acc)
+        self.pos.add(self.vel)
+        self.acc.mult(0)
+        self.constrain()
+        self.rect.x = self.pos.x
+        self.rect.y = self.pos.y
+        
+    def constrain(self):
+        
+        if self.pos.y > SCREEN_HEIGHT - self.size:
+            self.pos.y = SCREEN_HEIGHT - self.size
+            self.vel.mult(0)
+            
+    def outOfPlay(self):
+        
+        return self.pos.x < 0 or self.pos.x > SCREEN_WIDTH or self.pos.y >= SCREEN_HEIGHT - self.size
+            
+    def isDead(self):
+        
+        return self.outOfPlay() or self.dead
+        
+    def draw(self):
+        
+        if not self.isDead():
+            screen.blit(self.image, self.rect)
+
+# ======================================================================
+# entity snapshots
+# ======================================================================
+# a copy of any enemy, base or cannonball for Game.snapshot(). Images are
+# shared, the vectors and rect update() changes in place are not
+
+def cloneEntity(entity):
+
+    clone = object.__new__(type(entity))
+    clone.__dict__.update(entity.__dict__)
+    clone.pos = entity.pos.getCopy()
+    clone.vel = entity.vel.getCopy()
+    clone.rect = entity.rect.copy()
+    if isinstance(entity, Cannonball):
+        clone.acc = entity.acc.getCopy()
+    return clone
+
+# ======================================================================
+# dormant entity helpers
+# ======================================================================
+# Each enemy has ticksUntilVisible(), how many update()s before it could
+# be seen or hit, and fastForward(n), which leaves it exactly as n
+# update()s would. fastForward repeats the same float sums update() does
+# rather than multiplying through, so replays come out the same.
+
+def ticksUntilBelow(pos, vel, limit):
+
+    # ticks moving at vel (< 0) until pos <= limit
+    if pos <= limit:
+        return 0
+    return int(math.ceil((pos - limit) / -vel))
+
+# ======================================================================
+# target class
+# ======================================================================
+
+class Target():
+
+    def __init__(self, x, y, w, h):
+        
+        self.pos = Vector2(x, y)
+        self.vel = Vector2(-0.5 + random.random() * -2.5, 0)
+        self.width = w
+        self.height = h
+        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.dead = False
+        
+    def isDead(self):
+        
+        return self.dead == True
+        
+    def update(self):
+        
+        self.pos.add(self.vel)
+        if self.pos.x < 0:
+            self.pos.x = SCREEN_WIDTH
+            
+        self.rect.x = self.pos.x
+        self.rect.y = self.pos.y
+        
+    def ticksUntilVisible(self):
+        
+        return ticksUntilBelow(self.pos.x, self.vel.x, SCREEN_WIDTH)
+        
+    def fastForward(self, n):
+        
+        # only called while off screen right, so no wrap around
+        x = self.pos.x
+        vx = self.vel.x
+        for i in range(0, n):
+            x += vx
+        self.pos.x = x
+        
+        self.rect.x = self.pos.x
+        self.rect.y = self.pos.y
+        
+    def draw(self, tick=0):
+        
+        screen.blit(sprites.animation('target').frame(tick), self.rect)
+
+# ======================================================================
+# blocker class
+# ======================================================================
+
+class Blocker():
+
+    def __init__(self, x, y, w, h):
+        
+        self.pos = Vector2(x, y)
+        self.vel = Vector2(-1 + random.random() * -0.5, 0)
+        self.width = w
+        self.height = h
+        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.image = image_blocker
+        self.dead = False
+        self.uid = next(entity_ids)
+        
+    def isDead(self):
+        
+        return self.dead == True
+        
+    def update(self):
+        
+        self.pos.add(self.vel)
+        if self.pos.x < 0:
+            self.pos.x = SCREEN_WIDTH
+            
+        self.rect.x = self.pos.x
+        self.rect.y = self.pos.y
+        
+    def ticksUntilVisible(self):
+        
+        return ticksUntilBelow(self.pos.x, self.vel.x, SCREEN_WIDTH)
+        
+    def fastForward(self, n):
+        
+        x = self.pos.x
+        vx = self.vel.x
+        for i in range(0, n):
+            x += vx
+        self.pos.x = x
+        
+        self.rect.x = self.pos.x
+        self.rect.y = self.pos.y
+        
+    def draw(self):
+        
+        screen.blit(self.image, self.rect)
+        
+# ======================================================================
+# bomber class
+# ======================================================================
+
+class Bomber():
+
+    def __init__(self, x, y, w, h, vy, a):
+        
+        self.pos = Vector2(x, y)
+        self.vel = Vector2(0, vy)
+        self.width = w
+        self.height = h
+        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.dead = False
+        self.angle = a
+        
+    def isDead(self):
+        
+        return self.dead == True
+        
+    def isOffScreen(self):
+        
+        return self.pos.y > SCREEN_HEIGHT
+        
+    def update(self):
+        
+        self.angle += 1
+        if self.angle > 360:
+            self.angle = 0
+        
+        if self.isOffScreen():
+            self.pos.y = 0
+        
+        self.pos.add(self.vel)
+        
+        offset = 2 * COS_TABLE[self.angle]
+        self.pos.x += offset
+        
+        self.rect.x = self.pos.x 
+        self.rect.y = self.pos.y
+        
+    def ticksUntilVisible(self):
+        
+        # until the bottom edge comes down past the top of the screen
+        return ticksUntilBelow(-self.pos.y, -self.vel.y, self.height)
+        
+    def fastForward(self, n):
+        
+        # only called while above the screen, so no wrap around
+        angle = self.angle
+        x = self.pos.x
+        y = self.pos.y
+        vx = self.vel.x
+        vy = self.vel.y
+        for i in range(0, n):
+            angle += 1
+            if angle > 360:
+                angle = 0
+            y += vy
+            x += vx
+            x += 2 * COS_TABLE[angle]
+        self.angle = angle
+        self.pos.x = x
+        self.pos.y = y
+        
+        self.rect.x = self.pos.x 
+        self.rect.y = self.pos.y
+        
+    def draw(self, tick=0):
+        
+        screen.blit(sprites.animation('bomber').frame(tick), self.rect)
+        
+# ======================================================================
+# brute class
+# ======================================================================
+
+class Brute():
+
+    def __init__(self, x, y, tx, ty, a):
+        
+        self.pos    = Vector2(x, y)
+        self.vel    = Vector2(0, 0)
+        self.width  = 32
+        self.height = 24
+        self.rect   = pygame.Rect(x, y, self.width, self.height)
+        self.dead   = False
+        self.angle  = a
+        self.radius = 1
+        self.radius_step = 0.1
+        
+        # get a vector to carry us to the target
+        tv = Vector2(tx,ty)
+        tv.sub(self.pos)
+        tv.normalise()
+        tv.mult(BRUTE_SPEED)
+        self.vel.set(tv)
+        
+    def isDead(self):
+        
+        return self.dead == True
+        
+    def update(self, flow=None):
+        
+        # turn towards the flow field's direction under the middle of the sprite
+        if flow is not None:
+            way = flow.direction(self.pos.x + 16, self.pos.y + 12)
+            if way != NO_DIRECTION:
+                dx, dy = DIRECTION_VECTORS[way]
+                self.vel.x += (dx * BRUTE_SPEED - self.vel.x) * BRUTE_STEER
+                self.vel.y += (dy * BRUTE_SPEED - self.vel.y) * BRUTE_STEER
+        
+        self.radius += self.radius_step
+        if self.radius < 0 or self.radius > 40:
+            self.radius_step = -self.radius_step
+        
+        self.angle += 1
+        if self.angle > 360:
+            self.angle = 0
+            
+        xoff = COS_TABLE[self.angle]
+        yoff = SIN_TABLE[self.angle]
+        
+        self.pos.add(self.vel)
+        #self.dead = self.pos.y > SCREEN_HEIGHT or self.pos.y < 0 or self.pos.x < 0 or self.pos.x > SCREEN_WIDTH
+
+        self.rect.x = self.pos.x + (xoff * self.radius)
+        self.rect.y = self.pos.y + (yoff * self.radius)
+        
+    def ticksUntilVisible(self):
+        
+        # first tick the position is inside the screen grown by how far
+        # the wobble can carry the sprite, taking each axis separately.
+        # Lobbed balls fly above the screen and can hit brutes up there,
+        # so there's no top edge
+        first = 0
+        last = None
+        for p, v, lo, hi in ((self.pos.x, self.vel.x, -self.width - BRUTE_MARGIN, SCREEN_WIDTH + BRUTE_MARGIN),
+                             (self.pos.y, self.vel.y, -math.inf, SCREEN_HEIGHT + BRUTE_MARGIN)):
+            if v == 0:
+                if not lo < p < hi:
+                    return 0
+                continue
+            enter = (lo - p) / v
+            leave = (hi - p) / v
+            if enter > leave:
+                enter, leave = leave, enter
+            first = max(first, enter)
+            if last is None or leave < last:
+                last = leave
+        if last is not None and last < first:
+            # never crosses the screen, nothing to wait for
+            return 0
+        return int(first)
+        
+    def fastForward(self, n):
+        
+        # only called before it's on the playfield, where there's no
+        # steering, so it goes in a straight line
+        radius = self.radius
+        radius_step = self.radius_step
+        angle = self.angle
+        x = self.pos.x
+        y = self.pos.y
+        vx = self.vel.x
+        vy = self.vel.y
+        for i in range(0, n):
+            radius += radius_step
+            if radius < 0 or radius > 40:
+                radius_step = -radius_step
+            angle += 1
+            if angle > 360:
+                angle = 0
+            x += vx
+            y += vy
+        self.radius = radius
+        self.radius_step = radius_step
+        self.angle = angle
+        self.pos.x = x
+        self.pos.y = y
+        
+        self.rect.x = self.pos.x + (COS_TABLE[self.angle] * self.radius)
+        self.rect.y = self.pos.y + (SIN_TABLE[self.angle] * self.radius)
+        
+    def draw(self, tick=0):
+        
+        screen.blit(sprites.animation('brute').frame(tick), self.rect)
+
+
+# ======================================================================
+# base class
+# ======================================================================
+
+class Base():
+
+    def __init__(self, x, y, w, h, img):
+        
+        self.pos = Vector2(x, y)
+        self.vel = Vector2(0, 0)
+        self.width = w
+        self.height = h
+        self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.image = img
+        self.dead = False
+        
+    def isDead(self):
+        
+        return self.dead == True
+        
+    def update(self):
+        
+        self.pos.add(self.vel)
+        if self.pos.x < 0:
+            self.pos.x = SCREEN_WIDTH
+            
+        self.rect.x = self.pos.x
+        self.rect.y = self.pos.y
+        
+    def draw(self):
+        
+        screen.blit(self.image, self.rect)
+        
+# ======================================================================
+# scoreboard class
+# ======================================================================
+
+class Scoreboard():
+    
+    def __init__(self, io):
+        
+        self.io = io
+        self.score = 0
+        self.targetscore = 0 # lerp to this
+        self.needTableUpdate = True
+        self.player = HIGHSCORE_PLAYER
+        self.rank = 0
+        self.save_error = None  # shown under the table if a save failed
+        
+        self.store = HighScoreStore(HIGHSCORE_STORE, HIGHSCORE_ROWS)
+        if self.store.count() == 0 and os.path.exists(HIGHSCORE_LEGACY):
+            try:
+                self.store.importPickle(HIGHSCORE_LEGACY)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+                
+        self.loadTable()
+        
+    def loadTable(self):
+        
+        self.highscores = [e.score for e in self.store.top(HIGHSCORE_ROWS)]
+        
+        # pad a new table out with the old placeholder scores
+        if len(self.highscores) < HIGHSCORE_ROWS:
+            placeholders = [i * 250 for i in range(HIGHSCORE_ROWS - 1, -1, -1)]
+            self.highscores += placeholders[:HIGHSCORE_ROWS - len(self.highscores)]
+            self.highscores.sort(reverse=True)
+        
+    def add(self, n):
+        
+        self.targetscore += n
+        
+    def reset(self):
+        
+        self.score = 0
+        self.targetscore = 0
+        self.needTableUpdate = True
+        
+    def finish(self, wave, accuracy, record=True, replay=None):
+        
+        # in case the lerping didn't get time to finish
+        self.score = self.targetscore
+        
+        if self.needTableUpdate:
+            # every live game is kept, replays are not
+            if record:
+                self.save(wave, accuracy, replay)
+            self.rank = self.store.rank(self.score)
+            self.needTableUpdate = False
+    
+    def drawHighScoreTable(self):
+            
+        alpha = 200
+        xoff = 760
+        yoff = 40
+        highlight_done = False
+        
+        textsurf = myfont30.render('HIGHSCORES.', 0, COLOUR_RED)
+        textsurf.set_alpha(255)
+        screen.blit(textsurf, (xoff,yoff))
+        
+        yoff += 40
+        
+        for i, line in enumerate(self.highscores):
+            
+            alpha -= 14
+            msg = '{:02d} ... {}'.format(i+1, line)
+            textsurf = myfont30.render(msg, 0, COLOUR_RED)
+            
+            if line == self.score and not highlight_done:
+                textsurf.set_alpha(255)
+                highlight_done = True
+            else:
+                textsurf.set_alpha(alpha)
+                
+            screen.blit(textsurf, (xoff, yoff + (i * 40)))
+            
+        if self.save_error is not None:
+            textsurf = myfont10.render(self.save_error, 0, COLOUR_RED)
+            screen.blit(textsurf, (xoff, yoff + (len(self.highscores) * 40)))
+        
+    def save(self, wave, accuracy, replay):
+        
+        # the table updates now, the journal write happens on the io
+        # worker. It waits for room in the queue rather than be dropped,
+        # once a game, and the store's writes have to stay in order
+        entry = self.store.record(self.score, self.player, wave, accuracy, replay)
+        self.io.submit(self.store.write, (entry,), self.saved, block=True)
+        self.loadTable()
+        
+    def saved(self, entry, error):
+        
+        if error is not None:
+            self.save_error = 'HIGH SCORE NOT SAVED: {}'.format(error)
+        else:
+            self.save_error = None
+        
+    def update(self):
+        
+        if self.score != self.targetscore:
+            self.score = self.lerp(self.score, self.targetscore, 0.02)
+        
+    def lerp(self, mn, mx, norm):
+    
+        return math.ceil(((mx - mn) * norm + mn))
+        
+    def draw(self, fired, maxballs, wavenumber, seconds):
+        
+        msg = 'WAVE {} ::: FIRED {}/{} ::: SCORE {} ::: {}'.format(wavenumber, fired, maxballs, self.score, seconds)
+        textsurf = myfont20.render(msg, 0, COLOUR_RED)
+        textsurf.set_alpha(160)
+        screen.blit(textsurf, (40,20))
+
+# ======================================================================
+# reticule/crosshair class
+# ======================================================================
+
+class Reticule():
+    
+    def __init__(self, tank_image=None, tank_pos=(10,550)):
+        
+        self.pos = Vector2(0,0)
+        self.image = image_reticule
+        self.tank_image = tank_image if tank_image is not None else image_tank
+        self.tank_pos = tank_pos
+        self.bullets_loaded = 0
+        self.smoothing = RETICULE_SMOOTHING
+        
+        
+    def lerp(self, mn, mx, norm):
+        
+        return math.ceil(((mx - mn) * norm + mn))
+        
+    def update(self, mousex, mousey, bullets_loaded):
+        
+        self.pos.x = self.lerp(self.pos.x, mousex, self.smoothing)
+        self.pos.y = self.lerp(self.pos.y, mousey, self.smoothing)
+        self.bullets_loaded = bullets_loaded
+        
+    def draw(self):
+        
+        screen.blit(self.tank_image, self.tank_pos)
+        
+        x = 0
+        for n in range(0, self.bullets_loaded):
+            screen.rect(COLOUR_PINK, [self.pos.x-32, (self.pos.y - 20) + x, 8, 8])
+            x += 10
+            
+        screen.blit(self.image,(self.pos.x -16,self.pos.y-16))
+
+
+# ======================================================================
+# the telemetry log this run's games write to. The pid keeps runs
+# started in the same second (a benchmark's worker processes) apart
+
+def telemetryPath():
+
+    name = time.strftime('events-%Y%m%d-%H%M%S') + '-{}.{}'.format(os.getpid(), TELEMETRY_FORMAT)
+    return os.path.join(TELEMETRY_DIR, name)
+
+def clickLead(click):
+
+    # a click is True or 1 + how many 1/CLICK_LEAD_STEPS of a tick it
+    # came before the tick that fires it, returns that part of a tick
+    if click is True or click <= 1:
+        return 0.0
+    return (click - 1) / CLICK_LEAD_STEPS
+
+def memoryPath():
+
+    name = time.strftime('memory-%Y%m%d-%H%M%S') + '-{}.jsonl'.format(os.getpid())
+    return os.path.join(MEMORY_DIR, name)
+
+def loadedSounds():
+
+    # (effects, music), whichever have been loaded
+    effects = [sound_boom, sound_big_boom, sound_gunfire, sound_dryfire, sound_blocker, sound_base_boom]
+    music = [sound_track_main, sound_track_main_game_over]
+    return [s for s in effects if s is not None], [s for s in music if s is not None]
+
+# ======================================================================
+# game class
+# ======================================================================
+
+class Game():
+
+    def __init__(self):
+        
+        init()
+        
+        self.gamemode           = GAME_MODE_LIVE
+        self.gamestate          = GAME_STATE_INTRO
+        self.replay_speed       = 1
+        self.replay_ticks       = 0.0       # part ticks carried over at odd speeds
+        self.quiet              = False     # no sounds from ticks that won't be drawn
+        self.fps                = 50
+        self.random_seed        = RANDOM_SEED
+        self.replay_length      = 0
+        self.gamestate_delay    = 0
+        self.current_tick       = 0
+        self.wave_start_tick    = 0
+        self.wave_seconds       = 60
+        self.wave_number        = 0
+        self.maxballs           = 50
+        self.balls_per_player   = 50
+        self.max_burst_fire     = 4
+        self.shots_fired        = 0
+        self.shots_fired_total  = 0
+        self.shot_accuracy      = 0
+        self.targets_killed     = 0
+        self.bombers_killed     = 0
+        self.brutes_killed      = 0
+        self.blockers_hit       = 0
+        self.bullet_bonus       = 0
+        self.cannon_pos_x       = 30
+        self.cannon_pos_y       = 550
+        self.cannon_firepower   = 180
+        self.cannon2_pos_x      = COOP_CANNON_X
+        self.cannon2_pos_y      = COOP_CANNON_Y
+        self.coop               = False     # a second cannon, see netplay.py
+        self.effects            = True      # sounds and particles
+        self.swarm              = False
+        self.mask_collisions    = MASK_COLLISIONS
+        self.brute_flow_field   = BRUTE_FLOW_FIELD
+        self.flow_field         = None
+        self.friendly_fire      = True      # balls can take out bases
+        self.friendly_hits      = 0         # balls that didn't, with it off
+        self.swarm_counts       = {'targets'  : SWARM_TARGETS,
+                                   'blockers' : SWARM_BLOCKERS,
+                                   'bombers'  : SWARM_BOMBERS,
+                                   'brutes'   : SWARM_BRUTES}
+        
+        self.targets_killed_this_wave = 0
+        self.bombers_killed_this_wave = 0
+        self.brutes_killed_this_wave  = 0
+        self.shot_accuracy_this_wave  = 0
+
+        self.reticule   = Reticule()
+        self.reticule2  = Reticule(image_tank2, (COOP_TANK_X, 550))
+        self.starfield  = StarField()
+        self.psc        = ParticleSystemController()
+        self.io         = IOWorker(IO_QUEUE_SIZE)
+        self.scoreboard = Scoreboard(self.io)
+        self.telemetry  = TelemetryLog(self.io, telemetryPath(), TELEMETRY_FORMAT, TELEMETRY_RING, TELEMETRY_BATCH)
+        self.profiler   = FrameProfiler(PROFILER_PHASES, PROFILER_COLOURS, PROFILER_FRAMES, 1000.0 / self.fps)
+        self.governor   = QualityGovernor(len(QUALITY_LEVELS), 1000.0 / self.fps)
+        self.quality_level = self.governor.level
+        self.pipelined  = PIPELINE_RENDER
+        self.render_profiler = None
+        self.input_clock = EventClock(INPUT_POLL_INTERVAL)
+        self.latency    = LatencyMeter(size=LATENCY_SAMPLES)
+        self.click_event  = None    # (time, pos) of this frame's click
+        self.motion_event = None    # (time, pos) of its last mouse move
+        self.setLowLatency(LOW_LATENCY_INPUT)
+        
+        self.balls     = []
+        self.bases     = []
+        self.targets   = []
+        self.blockers  = []
+        self.bombers   = []
+        self.brutes    = []
+        self.dormant   = ActivationQueue()
+        self.contacts  = ContactManager()   # balls touching blockers
+        self.recording = []
+        self.replay_file = None
+        self.last_mouse = (0, 0)
+        self.game_number = 0
+        self.broadcaster = None
+        self.sampler = None
+        self.spikes_captured = 0
+        self.last_spike_capture = 0.0
+        self.memory_path = memoryPath()
+        self.memory_visible = False
+        self.memory_panel = None
+        self.memory_checked = 0.0
+        self.memory_dumped = time.perf_counter()
+        self.leaks = None
+        if MEMORY_TRACE:
+            self.leaks = LeakTracker(MEMORY_TRACE_FRAMES)
+            self.leaks.start()
+        
+        self.gravity = Vector2(0,0.3)
+        
+        self.startGame()
+        
+        if SPIKE_CAPTURE:
+            self.toggleSampler()
+
+    def applyQuality(self):
+        
+        self.quality_level = self.governor.level
+        quality = QUALITY_LEVELS[self.quality_level]
+        self.psc.particle_scale = quality['particles']
+        self.psc.score_bursts = quality['score_bursts']
+        self.starfield.setStarCount(quality['stars'])
+        
+    def checkQuality(self):
+        
+        # the governor can be fed from the draw thread, so the level it
+        # picks is applied here, on the simulation side
+        if self.governor.level != self.quality_level:
+            self.applyQuality()
+        
+    def toggleGovernor(self):
+        
+        self.governor.toggle()
+        
+    def setEffects(self, on):
+        
+        # netplay turns sounds and particles off while it re-simulates
+        self.effects = on
+        self.psc.enabled = on
+        self.starfield.enabled = on
+        
+    def playSound(self, sound):
+        
+        if self.effects and not self.quiet and sound is not None:
+            sound.play()
+
+    def logEvent(self, event, player=0, a=0, b=0, c=0):
+        
+        if self.telemetry.enabled:
+            self.telemetry.record((event, self.game_number, self.current_tick, self.wave_number, player, a, b, c))
+
+    def setReplaySpeed(self, speed):
+        
+        if self.gamemode == GAME_MODE_REPLAY:
+            self.replay_speed = speed
+            self.replay_ticks = 0.0
+            
+    def stepReplaySpeed(self, step):
+        
+        i = REPLAY_SPEEDS.index(self.replay_speed) + step
+        self.setReplaySpeed(REPLAY_SPEEDS[max(0, min(i, len(REPLAY_SPEEDS) - 1))])
+        
+    def toggleSlowMotion(self):
+        
+        if self.replay_speed == 1:
+            self.setReplaySpeed(REPLAY_SPEEDS[0])
+        else:
+            self.setReplaySpeed(1)
+            
+    def ticksThisFrame(self):
+        
+        # how many ticks to simulate before the next frame is drawn
+        if self.gamemode != GAME_MODE_REPLAY or self.gamestate == GAME_STATE_OVER:
+            return 1
+        self.replay_ticks += self.replay_speed
+        ticks = int(self.replay_ticks)
+        self.replay_ticks -= ticks
+        return ticks
+        
+    def stepFrame(self, mousex, mousey, click):
+        
+        # simulates this frame's ticks, only the last of them is heard
+        ticks = self.ticksThisFrame()
+        for n in range(0, ticks):
+            self.quiet = n < ticks - 1
+            mousex, mousey, click = self.stepInput(mousex, mousey, click)
+            self.profiler.mark('input')
+            self.update(mousex, mousey, click)
+        self.quiet = False
+
+    def getDrag(self, ball):
+        
+        c = 0.012
+        speed = ball.vel.mag()
+        dragMag = c * speed * speed
+        drag = ball.vel.getCopy()
+        drag.mult(-1)
+        drag.normalise()
+        drag.mult(dragMag)
+        return drag
+        
+    def startReplay(self):
+        
+        if self.gamestate == GAME_STATE_OVER:
+            self.gamemode = GAME_MODE_REPLAY
+            self.replay_length = len(self.recording)
+            self.setReplaySpeed(1)
+            self.startGame()
+            self.playGameMainSong()
+            self.gamestate = GAME_STATE_IN_PROGRESS   
+        
+    def startNetplay(self, seed, swarm):
+        
+        # both ends of a co-op game start here with the same seed, and from
+        # then on only update() with the same input moves things on
+        self.gamemode = GAME_MODE_NETPLAY
+        self.coop = True
+        self.random_seed = seed
+        self.swarm = swarm
+        self.startGame()
+        self.playGameMainSong()
+        self.gamestate = GAME_STATE_IN_PROGRESS
+        
+    def startGame(self):
+        
+        self.thisframe          = 0
+        self.current_tick       = 0
+        self.wave_number        = 0
+        self.shots_fired        = 0
+        self.shots_fired_total  = 0
+        self.friendly_hits      = 0
+        self.shot_accuracy      = 0
+        self.targets_killed     = 0
+        self.bombers_killed     = 0
+        self.brutes_killed      = 0
+        self.blockers_hit       = 0
+        
+        self.targets_killed_this_wave = 0
+        self.bombers_killed_this_wave = 0
+        self.brutes_killed_this_wave  = 0
+        
+        # in co-op the players share twice the shots
+        if self.coop:
+            self.maxballs = self.balls_per_player * 2
+        else:
+            self.maxballs = self.balls_per_player
+        
+        # replays and netplay re-simulation would log the same game again
+        self.telemetry.enabled = TELEMETRY and self.gamemode == GAME_MODE_LIVE
+        
+        self.scoreboard.reset()
+        self.psc.killAll()
+        self.spawnBases()
+        self.spawnWave()
+
+    def spawnBases(self):
+        
+        self.bases = []
+        for x in range(0, 2):
+            b = Base(400 + x * 300, 580, 120, 16, image_base_horz)
+            self.bases.append(b)
+        for y in range(0, 2):
+            b = Base(10, 60 + y * 200, 16, 120, image_base_vert)
+            self.bases.append(b)        
+        
+    def clearOldWave(self):
+        
+        self.targets  = []
+        self.blockers = []
+        self.bombers  = []
+        self.brutes   = []
+        self.dormant.clear()
+        self.contacts.clear()
+        self.flow_field = None
+
+    def prepareWave(self):
+        
+        self.clearOldWave()
+        self.balls = []
+        self.wave_start_tick = self.current_tick
+        self.wave_seconds = MAX_WAVE_TIME
+        self.bullet_bonus = 0
+        self.wave_number += 1
+        
+        # reset wave target hits
+        self.targets_killed_this_wave = 0
+        self.bombers_killed_this_wave = 0
+        self.brutes_killed_this_wave  = 0  
+        self.shot_accuracy_this_wave  = 0  
+        self.shots_fired              = 0 
+
+        
+    def waveCount(self, kind, normal):
+        
+        # how many of kind to spawn this wave
+        if self.swarm:
+            return self.swarm_counts[kind]
+        return normal
+        
+    def toggleSwarm(self):
+        
+        if self.gamestate in [GAME_STATE_INTRO, GAME_STATE_OVER]:
+            self.swarm = not self.swarm
+            
+    def spawnTargets(self):
+        
+        for x in range(0, self.waveCount('targets', 5 + self.wave_number)):
+            t = Target(random.randint(SCREEN_WIDTH, SCREEN_WIDTH * 2), random.randint(10, SCREEN_HEIGHT-200), 40, 24)
+            self.addEnemy(t, 'targets')
+            
+    def spawnBlockers(self):
+        
+        for x in range(0, self.waveCount('blockers', min(self.wave_number, MAX_BLOCKERS))):
+            b = Blocker(random.randint(SCREEN_WIDTH, SCREEN_WIDTH * 2), random.randint(10, SCREEN_HEIGHT-200), 32, 40)
+            self.addEnemy(b, 'blockers')
+            
+    def spawnBombers(self):
+        
+        for x in range(0, self.waveCount('bombers', min(self.wave_number, MAX_BOMBERS))):
+            b = Bomber(random.randint(300, 900), random.randint(-400, 0), 32, 28, 0.1 + (random.random() * 0.4), random.randint(0,360))
+            self.addEnemy(b, 'bombers')
+            
+    def spawnBrutes(self):
+        
+        # if only 1 base remains, spawn a 'brute' wave
+        # swarm mode always spawns them, each picks a base to go for
+        
+        if self.swarm:
+            
+            for x in range(0, self.swarm_counts['brutes']):
+                base = random.choice(self.bases)
+                self.spawnBrute(base.pos.x, base.pos.y)
+        
+        elif len(self.bases) == 1:
+            
+            tx = self.bases[0].pos.x
+            ty = self.bases[0].pos.y
+            
+            for x in range(0, min(self.wave_number, MAX_BRUTES)):
+                self.spawnBrute(tx, ty)
+                
+    def spawnBrute(self, tx, ty):
+        
+        if tx == 10:
+            # base is on screen left
+            x = SCREEN_WIDTH + random.randrange(0, SCREEN_WIDTH)
+            y = random.randrange(-200, SCREEN_HEIGHT + 200)
+        else:
+            x = random.randrange(-500, SCREEN_WIDTH + 500)
+            y = random.randrange(-1000, 0)
+        
+        b = Brute(x, y, tx, ty, random.randint(0,360))
+        self.addEnemy(b, 'brutes')
+        
+    def updateFlowField(self):
+        
+        # returns the field brutes steer by this tick, or None. Only built
+        # while there are brutes on the go, and kept in snapshots as it's
+        # never changed once built
+        if not self.brute_flow_field or len(self.brutes) == 0 or len(self.bases) == 0:
+            return None
+        key = tuple([tuple(base.rect) for base in self.bases])
+        flow = self.flow_field
+        if flow is None or flow.key != key or self.current_tick - flow.tick >= FLOW_FIELD_TICKS:
+            # brutes look the field up at their centre, so grow the blockers
+            # by half the sprite on each side to keep the whole brute clear
+            blocked = [blocker.rect.inflate(32, 24) for blocker in self.blockers if blocker.pos.x <= SCREEN_WIDTH]
+            flow = FlowField(SCREEN_WIDTH, SCREEN_HEIGHT, FLOW_FIELD_CELL, self.current_tick, key)
+            self.flow_field = flow.build([base.rect for base in self.bases], blocked)
+        return flow
+        
+    def addEnemy(self, enemy, group):
+        
+        # group is the name of the list it goes in. Anything not due on
+        # screen for a while waits in the dormant queue instead
+        ticks = enemy.ticksUntilVisible()
+        if ticks > ACTIVATION_LEAD:
+            self.dormant.push(self.current_tick + ticks - ACTIVATION_LEAD, self.current_tick, enemy, group)
+        else:
+            getattr(self, group).append(enemy)
+            
+    def activateDormant(self):
+        
+        # call after current_tick is advanced, before anything is updated.
+        # An enemy pushed on tick t has missed the updates for ticks t + 1
+        # up to this one, which is about to update it as normal
+        for spawn_tick, enemy, group in self.dormant.popDue(self.current_tick):
+            enemy.fastForward(self.current_tick - 1 - spawn_tick)
+            getattr(self, group).append(enemy)
+            
+    def targetsLeft(self):
+        
+        return len(self.targets) + self.dormant.count('targets')
+    
+    def spawnWave(self):
+        
+        random.seed(self.random_seed)
+        
+        self.prepareWave()
+        self.spawnTargets()
+        self.spawnBlockers()
+        self.spawnBombers()
+        self.spawnBrutes()
+
+    def checkCollisions(self):
+        
+        self.collideBrutesWithBases()
+        self.collideBrutesWithBalls()
+        self.collideBallsWithBases()
+        self.collideTargetsWithBases()
+        self.collideBombersWithBases()
+        self.collideBombersWithBalls()
+        self.collideBlockersWithBalls()
+        self.collideTargetsWithBalls()
+        self.clearTheDead()   
+        
+    def ballHits(self, ball, rects, animation):
+        
+        # indices of the rects ball hits. The rect test runs in C over the
+        # whole group, only the few rects that pass it have their sprite's
+        # mask (the frame showing this tick) checked against the ball
+        hits = ball.rect.collidelistall(rects)
+        if not self.mask_collisions or len(hits) == 0:
+            return hits
+        mask = sprites.animation(animation).mask(self.current_tick)
+        x = ball.rect.x
+        y = ball.rect.y
+        return [i for i in hits if mask.overlap(mask_ball, (x - rects[i].x, y - rects[i].y))]
+        
+    def collideBrutesWithBases(self):
+        
+        # do brute collisions
+        # there are only ever a few bases and balls, so loop over those and
+        # let collidelistall() test the (possibly thousands of) enemies in C
+        rects = [brute.rect for brute in self.brutes]
+        for base in self.bases:
+            for i in base.rect.collidelistall(rects):
+                brute = self.brutes[i]
+                brute.dead = True
+                base.dead  = True
+                self.psc.spawnBurstDirection(brute.pos.x, brute.pos.y, 270, 2, 50, priority=PARTICLE_PRIORITY_HIGH)
+                self.playSound(sound_base_boom)      
+        
+    def collideBrutesWithBalls(self):
+        
+        rects = [brute.rect for brute in self.brutes]
+        for ball in self.balls:
+            for i in self.ballHits(ball, rects, 'brute'):
+                brute = self.brutes[i]
+                brute.dead = True
+                ball.dead  = True
+                self.brutes_killed += 1
+                self.brutes_killed_this_wave += 1
+                self.logEvent(EVENT_HIT, ball.owner, HIT_BRUTE, int(ball.pos.x), int(ball.pos.y))
+                self.scoreboard.add(SCORE_BRUTE_HIT)
+                self.psc.spawnBurstDirection(ball.pos.x, ball.pos.y, 270, 2, 50)
+                self.psc.spawnScoreBurst(ball.pos.x, ball.pos.y,SCOREFONT_BRUTE_HIT)
+                self.playSound(sound_big_boom)
+    
+    def collideBallsWithBases(self):
+        
+        for ball in self.balls:
+            for base in self.bases:
+                if ball.rect.colliderect(base.rect):
+                    if not self.friendly_fire:
+                        # the ball goes, the base stays
+                        ball.dead = True
+                        self.friendly_hits += 1
+                        break
+                    base.dead = True
+                    ball.dead = True
+                    self.psc.spawnBurstDirection(ball.pos.x, ball.pos.y, 270, 2, 100, priority=PARTICLE_PRIORITY_HIGH)
+                    self.playSound(sound_base_boom)
+        
+    def collideTargetsWithBases(self):
+        
+        onscreen = [target for target in self.targets if target.pos.x <= SCREEN_WIDTH] # check only if onscreen
+        rects = [target.rect for target in onscreen]
+        for base in self.bases:
+            for i in base.rect.collidelistall(rects):
+                target = onscreen[i]
+                base.dead = True
+                target.dead = True
+                self.psc.spawnBurstCircle(target.pos.x, target.pos.y, 50, COLOUR_YELLOW, PARTICLE_PRIORITY_HIGH)
+                self.playSound(sound_base_boom)
+        
+    def collideBombersWithBases(self):
+        
+        onscreen = [bomber for bomber in self.bombers if bomber.pos.y > 0] # check only if onscreen
+        rects = [bomber.rect for bomber in onscreen]
+        for base in self.bases:
+            for i in base.rect.collidelistall(rects):
+                bomber = onscreen[i]
+                base.dead = True
+                bomber.dead = True
+                self.psc.spawnBurstDirection(bomber.pos.x, bomber.pos.y, 270, 20, 200, priority=PARTICLE_PRIORITY_HIGH)
+                self.playSound(sound_base_boom)
+        
+    def collideBombersWithBalls(self):
+        
+        onscreen = [bomber for bomber in self.bombers if bomber.pos.y > 0] # check only if onscreen
+        rects = [bomber.rect for bomber in onscreen]
+        for ball in self.balls:
+            for i in self.ballHits(ball, rects, 'bomber'):
+                bomber = onscreen[i]
+                bomber.dead = True
+                ball.dead = True
+                self.bombers_killed += 1
+                self.bombers_killed_this_wave += 1
+                self.logEvent(EVENT_HIT, ball.owner, HIT_BOMBER, int(ball.pos.x), int(ball.pos.y))
+                self.scoreboard.add(SCORE_BOMBER_HIT)
+                self.psc.spawnBurstDirection(ball.pos.x, ball.pos.y, 270, 20, 50, COLOUR_YELLOW)
+                self.psc.spawnScoreBurst(ball.pos.x, ball.pos.y,SCOREFONT_BOMBER_HIT)
+                self.playSound(sound_big_boom)        
+        
+    def collideBlockersWithBalls(self):
+        
+        onscreen = [blocker for blocker in self.blockers if blocker.pos.x <= SCREEN_WIDTH] # only do collision checks if is onscreen
+        rects = [blocker.rect for blocker in onscreen]
+        for ball in self.balls:
+            for i in ball.rect.collidelistall(rects):
+                blocker = onscreen[i]
+                
+                # bounce once when they first touch, a ball can still be
+                # overlapping for a tick or two after and flipping it
+                # again would send it back into the blocker
+                if self.contacts.touch(ball.uid, blocker.uid) == CONTACT_STAY:
+                    continue
+                
+                # check bottom hit
+                if abs(blocker.rect.bottom - ball.rect.top) < 10 and ball.vel.y < 0:
+                    ball.vel.y *= -1
+                    
+                # check top hit
+                if abs(blocker.rect.top - ball.rect.bottom) < 10 and ball.vel.y > 0:
+                    ball.vel.y *= -1
+                    
+                # check left hit
+                if abs(blocker.rect.left - ball.rect.right) < 10 and ball.vel.x > 0:
+                    ball.vel.x *= -1
+                    ball.pos.x -= 8
+                    
+                 # check right hit
+                if abs(blocker.rect.right - ball.rect.left) < 10 and ball.vel.x < 0:
+                    ball.vel.x *= -1 
+                    ball.pos.x += 8
+                
+                self.blockers_hit += 1
+                self.logEvent(EVENT_HIT, ball.owner, HIT_BLOCKER, int(ball.pos.x), int(ball.pos.y))
+                self.playSound(sound_blocker)
+                
+        self.contacts.endTick()
+        
+    def collideTargetsWithBalls(self):
+        
+        onscreen = [target for target in self.targets if target.pos.x <= SCREEN_WIDTH] # only do collision checks if the target is onscreen
+        rects = [target.rect for target in onscreen]
+        for ball in self.balls:
+            for i in self.ballHits(ball, rects, 'target'):
+                target = onscreen[i]
+                if not target.isDead():
+                    target.dead = True
+                    ball.dead = True
+                    self.targets_killed += 1
+                    self.targets_killed_this_wave += 1
+                    self.logEvent(EVENT_HIT, ball.owner, HIT_TARGET, int(ball.pos.x), int(ball.pos.y))
+                    self.scoreboard.add(SCORE_TARGET_HIT)
+                    boomsize = effects_random.randint(5, 30)
+                    self.psc.spawnBurstCircle(ball.pos.x, ball.pos.y, boomsize, COLOUR_RED)
+                    self.psc.spawnScoreBurst(ball.pos.x, ball.pos.y,SCOREFONT_TARGET_HIT)
+                    if boomsize > 20:
+                        self.playSound(sound_big_boom)
+                    else:
+                        self.playSound(sound_boom)        
+        
+    def clearTheDead(self):
+        
+        tc = [t for t in self.targets if not t.isDead()]
+        self.targets = tc
+        
+        bc = [b for b in self.balls if not b.isDead()]
+        self.balls = bc
+        
+        bl = [b for b in self.bombers if not b.isDead()]
+        self.bombers = bl
+        
+        ba = [b for b in self.bases if not b.isDead()]
+        if len(ba) < len(self.bases):
+            for b in self.bases:
+                if b.isDead():
+                    self.logEvent(EVENT_BASE_LOST, 0, int(b.pos.x), int(b.pos.y), len(ba))
+        self.bases = ba
+        
+        br = [b for b in self.brutes if not b.isDead()]
+        self.brutes = br
+        
+        
+    def ballsLoaded(self, player):
+        
+        # each cannon can have max_burst_fire balls in the air at once
+        return self.max_burst_fire - len([b for b in self.balls if b.owner == player])
+        
+    def fireCannon(self, mousex, mousey, player=0, lead=0.0):
+        
+        if self.shots_fired < self.maxballs and self.ballsLoaded(player) > 0:
+            if player == 0:
+                b = Cannonball(self.cannon_pos_x, self.cannon_pos_y, player)
+            else:
+                b = Cannonball(self.cannon2_pos_x, self.cannon2_pos_y, player)
+            f = Vector2(mousex, mousey)
+            f.sub(b.pos)
+            f.normalise()
+            f.mult(self.cannon_firepower) 
+            b.launch(f)
+            if lead > 0:
+                b.advance(lead)
+            self.balls.append(b)
+            self.playSound(sound_gunfire)
+            self.shots_fired += 1
+            self.logEvent(EVENT_SHOT, player, int(mousex), int(mousey))
+        else:
+            self.playSound(sound_dryfire)
+            self.logEvent(EVENT_DRYFIRE, player, int(mousex), int(mousey))
+
+    def spacebarPressed(self):
+        
+        # handles when spacebar is pressed
+        if self.gamestate in [GAME_STATE_INTRO, GAME_STATE_OVER] or self.gamemode == GAME_MODE_REPLAY:
+            self.gamemode = GAME_MODE_LIVE
+            self.clearReplayRecording()
+            self.game_number += 1
+            self.startGame()
+            self.playGameMainSong()
+            self.gamestate = GAME_STATE_IN_PROGRESS
+    
+    def clearReplayRecording(self):
+        
+        self.recording = []
+            
+    def updateGameStats(self):
+
+        # _this_wave fields are reset to zero in prepareWave()
+    
+        if self.shots_fired > 0:
+            self.shot_accuracy_this_wave = ((self.targets_killed_this_wave + self.bombers_killed_this_wave + self.brutes_killed_this_wave) / self.shots_fired) * 100
+        else:
+            self.shot_accuracy_this_wave = 0
+        
+        # calculates the bonus and stats at wave end
+        self.bullet_bonus = (self.maxballs - self.shots_fired) * (10 * len(self.bases))
+        self.shots_fired_total += self.shots_fired
+        total_kills_so_far = self.targets_killed + self.bombers_killed + self.brutes_killed
+        
+        if self.shots_fired_total > 0:
+            self.shot_accuracy = (total_kills_so_far / self.shots_fired_total) * 100
+        else:
+            self.shot_accuracy = 0
+            
+        self.scoreboard.add(self.bullet_bonus)
+        
+        kills = self.targets_killed_this_wave + self.bombers_killed_this_wave + self.brutes_killed_this_wave
+        self.logEvent(EVENT_WAVE_END, 0, self.shots_fired, kills, self.bullet_bonus)
+        if len(self.bases) == 0:
+            self.logEvent(EVENT_GAME_OVER, 0, self.scoreboard.targetscore, self.shots_fired_total)
+        self.telemetry.flush()
+        
+        if self.leaks is not None and self.effects:
+            self.traceGrowth()
+        
+        if self.gamemode == GAME_MODE_LIVE:
+            self.saveWaveStats()
+            
+    def saveWaveStats(self):
+        
+        stats = {'time'            : time.time(),
+                 'wave'            : self.wave_number,
+                 'swarm'           : self.swarm,
+                 'shots_fired'     : self.shots_fired,
+                 'targets_killed'  : self.targets_killed_this_wave,
+                 'bombers_killed'  : self.bombers_killed_this_wave,
+                 'brutes_killed'   : self.brutes_killed_this_wave,
+                 'wave_accuracy'   : self.shot_accuracy_this_wave,
+                 'game_accuracy'   : self.shot_accuracy,
+                 'bullet_bonus'    : self.bullet_bonus,
+                 'bases_left'      : len(self.bases),
+                 'score'           : self.scoreboard.targetscore}
+        self.io.submit(appendLine, (STATS_FILE, json.dumps(stats)))
+        
+    def saveReplay(self):
+        
+        # returns the file name the replay will be written to
+        path = os.path.join(REPLAY_DIR, time.strftime('replay-%Y%m%d-%H%M%S.json'))
+        replay = {'version'   : 1,
+                  'seed'      : self.random_seed,
+                  'swarm'     : self.swarm,
+                  'masks'     : self.mask_collisions,
+                  'flow'      : self.brute_flow_field,
+                  'recording' : list(self.recording)}
+        self.io.submit(writeFileAtomic, (path, json.dumps(replay)))
+        return path
+               
+    def drawIntroScreen(self):
+        
+        textsurf = myfont80.render('LAST', 0, COLOUR_RED)
+        textsurf.set_alpha(160)
+        screen.blit(textsurf, (20,20))
+        textsurf = myfont80.render('BUNNER!', 0, COLOUR_RED)
+        textsurf.set_alpha(255)
+        screen.blit(textsurf, (20,120))
+        textsurf = myfont30.render('press spacebar!', 0, COLOUR_RED)
+        textsurf.set_alpha(255)
+        screen.blit(textsurf, (20,540))
+        if self.swarm:
+            textsurf = myfont30.render('SWARM MODE', 0, COLOUR_YELLOW)
+            textsurf.set_alpha(255)
+            screen.blit(textsurf, (20,500))
+        self.scoreboard.drawHighScoreTable()
+        screen.blit(image_bunny1, (486, 64))
+        
+    def updateWaveOver(self):
+        
+        self.gamestate_delay += 1
+        
+        if self.gamestate_delay == 1:
+            self.updateGameStats()
+            
+        if self.gamestate_delay > self.fps * 5:
+            self.gamestate = GAME_STATE_IN_PROGRESS
+            self.gamestate_delay = 0
+            self.spawnWave()
+            
+    def drawWaveOver(self):
+        
+        if self.gamestate_delay > 1:
+            textsurf = myfont80.render('Wave Cleared!', 0, COLOUR_RED)
+            textsurf.set_alpha(150)
+            screen.blit(textsurf, (20,20))
+            
+            textsurf = myfont20.render('Targets killed ... ' + str(self.targets_killed), 0, COLOUR_RED)
+            textsurf.set_alpha(150)
+            screen.blit(textsurf, (20,140))
+            
+            textsurf = myfont20.render('Bombers killed ... ' + str(self.bombers_killed), 0, COLOUR_RED)
+            textsurf.set_alpha(150)
+            screen.blit(textsurf, (20,180))
+            
+            textsurf = myfont20.render('Brutes killed ... ' + str(self.brutes_killed), 0, COLOUR_RED)
+            textsurf.set_alpha(150)
+            screen.blit(textsurf, (20,220))
+            
+            msg = 'Wave accuracy ... {:.2f}'.format(self.shot_accuracy_this_wave)
+            textsurf = myfont20.render(msg, 0, COLOUR_RED)
+            textsurf.set_alpha(150)
+            screen.blit(textsurf, (20,260))
+        
+            msg = 'Game accuracy ... {:.2f}'.format(self.shot_accuracy)
+            textsurf = myfont20.render(msg, 0, COLOUR_RED)
+            textsurf.set_alpha(150)
+            screen.blit(textsurf, (20,300))
+
+            textsurf = myfont20.render('Bullet bonus ... ' + str(self.bullet_bonus), 0, COLOUR_RED)
+            textsurf.set_alpha(100)
+            screen.blit(textsurf, (20,340))
+            
+    def updateLastBaseLost(self):
+        
+        self.gamestate_delay += 1
+        
+        if self.gamestate_delay == 1:
+            self.updateGameStats() 
+            self.playGameOverSong()
+            
+        elif self.gamestate_delay > self.fps * 4:
+            self.gamestate = GAME_STATE_OVER
+            self.gamestate_delay = 0
+            if self.gamemode == GAME_MODE_LIVE:
+                self.replay_file = self.saveReplay()
+       
+    def playGameOverSong(self):
+        
+        if not self.effects or sound_track_main is None:
+            return
+        sound_track_main.fadeout(500)
+        sound_track_main_game_over.set_volume(0.2)
+        sound_track_main_game_over.play()
+        
+    def playGameMainSong(self):
+        
+        if sound_track_main is None:
+            return
+        sound_track_main_game_over.stop()
+        sound_track_main.set_volume(0.2)
+        sound_track_main.play(-1)
+        
+    def drawGameOver(self):
+        
+        textsurf = myfont80.render('DEDZ !!!', 0, COLOUR_RED)
+        textsurf.set_alpha(255)
+        screen.blit(textsurf, (20,20))
+        
+        textsurf = myfont20.render('Targets killed ... ' + str(self.targets_killed), 0, COLOUR_RED)
+        textsurf.set_alpha(200)
+        screen.blit(textsurf, (20,140))
+        
+        textsurf = myfont20.render('Bombers killed ... ' + str(self.bombers_killed), 0, COLOUR_RED)
+        textsurf.set_alpha(200)
+        screen.blit(textsurf, (20,180))
+        
+        textsurf = myfont20.render('Brutes killed ... ' + str(self.brutes_killed), 0, COLOUR_RED)
+        textsurf.set_alpha(200)
+        screen.blit(textsurf, (20,220))
+    
+        msg = 'Accuracy ... {:.2f}'.format(self.shot_accuracy)
+        textsurf = myfont20.render(msg, 0, COLOUR_RED)
+        textsurf.set_alpha(200)
+        screen.blit(textsurf, (20,260))
+        
+        textsurf = myfont30.render('You Scored ... {}'.format(self.scoreboard.score), 0, COLOUR_RED)
+        textsurf.set_alpha(200)
+        screen.blit(textsurf, (20,300))
+        
+        msg = 'Rank ... {} of {}'.format(self.scoreboard.rank, self.scoreboard.store.count())
+        textsurf = myfont20.render(msg, 0, COLOUR_RED)
+        textsurf.set_alpha(200)
+        screen.blit(textsurf, (20,350))
+        
+        textsurf = myfont30.render('R = View Replay.', 0, COLOUR_RED)
+        textsurf.set_alpha(255)
+        screen.blit(textsurf, (20, 480))
+        
+        textsurf = myfont30.render('Spacebar = Play Again.', 0, COLOUR_RED)
+        textsurf.set_alpha(255)
+        screen.blit(textsurf, (20, 540))
+        
+        self.scoreboard.drawHighScoreTable()
+            
+    def updateGameState(self):
+        
+        if len(self.bases) > 0:
+            if self.targetsLeft() == 0 or self.wave_seconds == 0:
+                self.gamestate = GAME_STATE_WAVE_OVER
+        else:
+            if self.gamestate == GAME_STATE_IN_PROGRESS:
+                self.gamestate = GAME_STATE_LAST_BASE_LOST
+            
+    def update(self, mousex, mousey, click, second=None):
+        
+        # advances the simulation by one tick, nothing is drawn here.
+        # In co-op second is player 2's (mousex, mousey, click)
+        
+        self.updateGameState()
+        
+        if self.gamestate == GAME_STATE_INTRO:
+            
+            self.starfield.update()
+            self.profiler.mark('entities')
+            
+        elif self.gamestate == GAME_STATE_IN_PROGRESS:
+            
+            self.current_tick += 1
+            self.activateDormant()
+            
+            self.wave_seconds = MAX_WAVE_TIME - (self.current_tick - self.wave_start_tick) // 60
+            
+            self.reticule.update(mousex, mousey, self.ballsLoaded(0))
+            
+            if click:
+                self.fireCannon(mousex, mousey, 0, clickLead(click))
+                
+            if self.coop:
+                mousex2, mousey2, click2 = second
+                self.reticule2.update(mousex2, mousey2, self.ballsLoaded(1))
+                if click2:
+                    self.fireCannon(mousex2, mousey2, 1)
+                
+            self.scoreboard.update()
+            self.starfield.update()
+            self.profiler.mark('entities')
+            
+            self.psc.update()
+            self.profiler.mark('particles')
+            
+            for ball in self.balls:
+                if ball.isflying:
+                    ball.applyForce(self.gravity)
+                    ball.applyForce(self.getDrag(ball))
+                ball.update()
+                
+            for target in self.targets:
+                target.update()
+                
+            for blocker in self.blockers:
+                blocker.update()
+                
+            for bomber in self.bombers:
+                bomber.update()
+                
+            for base in self.bases:
+                base.update()
+                
+            flow = self.updateFlowField()
+            for brute in self.brutes:
+                brute.update(flow)
+            
+            self.profiler.mark('entities')
+                
+            self.checkCollisions()
+            self.profiler.mark('collisions')
+        
+        elif self.gamestate == GAME_STATE_WAVE_OVER:
+            
+            self.starfield.update()
+            self.profiler.mark('entities')
+            self.psc.update()
+            self.profiler.mark('particles')
+            self.updateWaveOver()
+            
+        elif self.gamestate == GAME_STATE_LAST_BASE_LOST:
+            
+            self.starfield.update()
+            self.profiler.mark('entities')
+            self.psc.update()
+            self.profiler.mark('particles')
+            self.updateLastBaseLost()
+            if pygame.mixer.get_init():
+                pygame.mixer.music.stop()
+            
+        elif self.gamestate == GAME_STATE_OVER:
+            
+            self.scoreboard.finish(self.wave_number, self.shot_accuracy, self.gamemode == GAME_MODE_LIVE, self.replay_file)
+            self.starfield.update()
+            self.profiler.mark('entities')
+            
+    def drawAll(self, entities, animation=None):
+        
+        # one blits() call per group instead of a draw() call per entity,
+        # anything off screen is skipped (most of a swarm wave to start with).
+        # An animated group all shows the atlas frame for this tick
+        if animation is None:
+            screen.blits([(e.image, e.rect) for e in entities if e.rect.colliderect(SCREEN_RECT)], False)
+        else:
+            image = sprites.animation(animation).frame(self.current_tick)
+            screen.blits([(image, e.rect) for e in entities if e.rect.colliderect(SCREEN_RECT)], False)
+        
+    def draw(self):
+        
+        if self.gamestate == GAME_STATE_INTRO:
+            
+            self.starfield.draw()
+            self.drawIntroScreen()
+            
+        elif self.gamestate == GAME_STATE_IN_PROGRESS:
+            
+            self.psc.draw()
+            self.starfield.draw()
+            self.reticule.draw()
+            if self.coop:
+                self.reticule2.draw()
+            self.scoreboard.draw(self.shots_fired, self.maxballs, self.wave_number, self.wave_seconds)
+            
+            self.drawAll(self.targets, 'target')
+            self.drawAll(self.blockers)
+            self.drawAll(self.bombers, 'bomber')
+            self.drawAll(self.brutes, 'brute')
+                
+            for ball in self.balls:
+                ball.draw()
+                
+            for base in self.bases:
+                base.draw()
+        
+        elif self.gamestate == GAME_STATE_WAVE_OVER:
+            
+            self.starfield.draw()
+            self.psc.draw()
+            self.drawWaveOver()
+            
+        elif self.gamestate == GAME_STATE_LAST_BASE_LOST:
+            
+            self.starfield.draw()
+            self.psc.draw()
+            
+        elif self.gamestate == GAME_STATE_OVER:
+            
+            self.starfield.draw()
+            self.drawGameOver()
+            
+        if self.gamemode == GAME_MODE_REPLAY and self.gamestate != GAME_STATE_OVER:
+            self.drawReplaySpeed()
+            
+    def drawReplaySpeed(self):
+        
+        # only off 1x, so spectators and exported video don't show it
+        if self.replay_speed != 1:
+            textsurf = myfont20.render('REPLAY {:g}X'.format(self.replay_speed), 0, COLOUR_YELLOW)
+            textsurf.set_alpha(200)
+            screen.blit(textsurf, (SCREEN_WIDTH - textsurf.get_width() - 20, 40))
+            
+    def drawDebug(self):
+        
+        # debug overlays go straight on the window at full resolution,
+        # after the playfield has been scaled up to it
+        window = screen.window
+        x = window.get_width() - PROFILER_FRAMES - 10
+        
+        if self.profiler.visible:
+            self.profiler.drawOverlay(window, myfont10, x, 60, COLOUR_WHITE)
+            if self.render_profiler is not None:
+                # the simulation thread's phases above, this thread's below
+                self.render_profiler.drawOverlay(window, myfont10, x, 70 + self.profiler.overlayHeight(), COLOUR_WHITE)
+            if self.governor.enabled:
+                msg = 'quality {} (auto)'.format(QUALITY_LEVELS[self.governor.level]['name'])
+            else:
+                msg = 'quality {} (governor off)'.format(QUALITY_LEVELS[self.governor.level]['name'])
+            msg += '  render {}x{}'.format(screen.surface.get_width(), screen.surface.get_height())
+            if self.render_profiler is not None:
+                msg += '  pipelined'
+            if self.broadcaster is not None:
+                msg += '  broadcasting to {}'.format(len(self.broadcaster.clients))
+            if self.sampler is not None:
+                msg += '  sampling, {} spikes saved'.format(self.spikes_captured)
+            window.blit(myfont10.render(msg, 0, COLOUR_WHITE), (x, 46))
+            window.blit(myfont10.render(self.latencyText(), 0, COLOUR_WHITE), (x, 32))
+            
+        if self.memory_visible and self.memory_panel is not None:
+            y = 60
+            if self.profiler.visible:
+                y += self.profiler.overlayHeight() + 10
+                if self.render_profiler is not None:
+                    y += self.render_profiler.overlayHeight() + 10
+            window.blit(self.memory_panel, (x, y))
+            
+    def latencyText(self):
+        
+        # input to flip, p50/p99 ms. Outside low latency mode input is
+        # stamped when the frame reads it, so the time it sat in the
+        # queue before that is missing
+        msg = 'input latency' + ('' if self.low_latency else ' (from frame start)')
+        for kind in ['click', 'motion']:
+            stats = self.latency.stats(kind)
+            if stats is not None:
+                msg += '  {} {:.1f}/{:.1f}ms'.format(kind, stats[0], stats[1])
+        return msg
+        
+    # ======================================================================
+    # memory accounting
+    # ======================================================================
+    # memoryUsage() walks the game for counts and byte estimates, a few
+    # milliseconds in a busy swarm wave, so the overlay only refreshes
+    # every MEMORY_OVERLAY_SECONDS and is rendered to a panel then. Both
+    # it and the dumps run on the main thread, in the pipelined loop that
+    # reads the simulation's lists while they change, which is fine for
+    # numbers this rough
+    
+    def memoryUsage(self):
+        
+        usage = MemoryUsage()
+        
+        for group in SNAPSHOT_GROUPS:
+            entities = getattr(self, group)
+            usage.add('entities', group, len(entities), groupBytes(entities))
+        dormant = self.dormant.entities()
+        usage.add('entities', 'dormant', len(dormant), groupBytes(dormant))
+        
+        psc = self.psc
+        systems = psc.systems + psc.free_systems
+        live = [p for s in psc.systems for p in s.particles]
+        pooled = [p for free in psc.pool.free.values() for p in free] + psc.pool.free_score
+        usage.add('particles', 'systems', len(systems), groupBytes(systems))
+        usage.add('particles', 'live', len(live), groupBytes(live))
+        usage.add('particles', 'pooled', len(pooled), groupBytes(pooled))
+        
+        # score particals share the font's images, only particals own one
+        frames = [frame for animation in sprites.animations.values() for frame in animation.frames] + [sprites.sheet]
+        owned = [p.image for p in live + pooled if isinstance(p, Partical)]
+        stars = [star.image for star in self.starfield.stars]
+        balls = [ball.image for ball in self.balls]
+        scaled = list(screen.cache.values())
+        if screen.surface is not screen.window:
+            scaled.append(screen.surface)
+        for name, surfaces in (('sprites', frames), ('particles', owned), ('stars', stars), ('balls', balls),
+                               ('render', scaled), ('window', [screen.window])):
+            usage.add('surfaces', name, len(surfaces), sum([surfaceBytes(s) for s in surfaces]))
+        
+        usage.add('replay', 'recording', len(self.recording), sys.getsizeof(self.recording) + groupBytes(self.recording, tupleBytes))
+        
+        mixer = pygame.mixer.get_init()
+        for name, sounds in zip(('effects', 'music'), loadedSounds()):
+            usage.add('sounds', name, len(sounds), sum([soundBytes(s, mixer) for s in sounds]) if mixer else 0)
+        
+        events = [e for e in self.telemetry.ring if e is not None]
+        usage.add('logs', 'telemetry', len(events), sys.getsizeof(self.telemetry.ring) + groupBytes(events, tupleBytes))
+        if self.sampler is not None:
+            samples = list(self.sampler.samples)
+            usage.add('logs', 'samples', len(samples), sys.getsizeof(samples) + groupBytes(samples, lambda s: tupleBytes(s) + tupleBytes(s[2])))
+        return usage
+        
+    def checkMemory(self):
+        
+        now = time.perf_counter()
+        if self.memory_visible and now - self.memory_checked >= MEMORY_OVERLAY_SECONDS:
+            self.memory_checked = now
+            self.memory_panel = self.drawMemoryPanel(self.memoryUsage())
+        if now - self.memory_dumped >= MEMORY_DUMP_SECONDS:
+            self.memory_dumped = now
+            self.dumpMemory()
+            
+    def drawMemoryPanel(self, usage):
+        
+        lines = ['memory {:.1f}MB estimated'.format(usage.total() / (1024 * 1024))]
+        if self.leaks is not None:
+            current, peak = self.leaks.traced()
+            lines.append('python heap {:.1f}MB, peak {:.1f}MB'.format(current / (1024 * 1024), peak / (1024 * 1024)))
+        lines += usage.lines()
+        panel = pygame.Surface([PROFILER_FRAMES, len(lines) * 12 + 8])
+        panel.set_alpha(200)
+        for i, line in enumerate(lines):
+            panel.blit(myfont10.render(line, 0, COLOUR_WHITE), (4, 4 + i * 12))
+        return panel
+        
+    def dumpMemory(self):
+        
+        usage = self.memoryUsage()
+        record = {'kind'  : 'usage',
+                  'time'  : time.time(),
+                  'game'  : self.game_number,
+                  'wave'  : self.wave_number,
+                  'tick'  : self.current_tick,
+                  'total' : usage.total(),
+                  'usage' : usage.asDict()}
+        if self.leaks is not None:
+            record['traced'] = list(self.leaks.traced())
+        self.io.submit(writeRecord, (self.memory_path, record))
+        
+    def traceGrowth(self):
+        
+        # at each wave end, what the python heap gained since the last one
+        label = 'game {} wave {}'.format(self.game_number, self.wave_number)
+        previous, old, new = self.leaks.snapshot(label)
+        if old is not None:
+            record = {'kind' : 'growth', 'time' : time.time(), 'from' : previous, 'to' : label}
+            self.io.submit(writeGrowth, (self.memory_path, record, old, new, MEMORY_TRACE_TOP))
+            
+    def toggleMemoryOverlay(self):
+        
+        self.memory_visible = not self.memory_visible
+        self.memory_checked = 0.0
+            
+    def cycleRenderScale(self):
+        
+        if screen.scale in RENDER_SCALES:
+            i = (RENDER_SCALES.index(screen.scale) + 1) % len(RENDER_SCALES)
+        else:
+            i = 0
+        screen.configure(RENDER_SCALES[i], screen.fullscreen)
+        
+    def toggleFullscreen(self):
+        
+        screen.configure(screen.scale, not screen.fullscreen)
+                     
+    def toggleBroadcast(self):
+        
+        if self.broadcaster is None:
+            broadcaster = BroadcastServer(BROADCAST_HOST, BROADCAST_PORT)
+            try:
+                broadcaster.start()
+            except OSError as e:
+                print('broadcast failed to start: {}'.format(e))
+                return
+            self.broadcaster = broadcaster
+        else:
+            self.broadcaster.stop()
+            self.broadcaster = None
+            
+    def toggleSampler(self):
+        
+        if self.sampler is None:
+            sampler = StackSampler()
+            sampler.watch()
+            sampler.start()
+            self.sampler = sampler
+        else:
+            self.sampler.stop()
+            self.sampler = None
+            
+    def checkSpike(self, profiler):
+        
+        # call after profiler.endFrame(), on the thread that ran the frame.
+        # Over the threshold, that frame's stack samples and the state of
+        # the game go to the io worker to be written out
+        sampler = self.sampler
+        if sampler is None:
+            return
+        sampler.watch()
+        number, phases, busy, wall = profiler.frames[-1]
+        now = time.perf_counter()
+        if busy < SPIKE_THRESHOLD_MS or self.spikes_captured >= SPIKE_MAX_REPORTS:
+            return
+        if now - self.last_spike_capture < SPIKE_COOLDOWN:
+            return
+        self.last_spike_capture = now
+        self.spikes_captured += 1
+        
+        start = profiler.frame_start
+        samples = [((t - start) * 1000.0, stack) for t, stack in sampler.between(threading.get_ident(), start, now)]
+        report = {'time'   : time.time(),
+                  'frame'  : {'number'       : number,
+                              'thread'       : threading.current_thread().name,
+                              'busy_ms'      : busy,
+                              'wall_ms'      : wall,
+                              'threshold_ms' : SPIKE_THRESHOLD_MS,
+                              'phases'       : dict(zip(profiler.phases, phases))},
+                  'state'  : {'tick'         : self.current_tick,
+                              'wave'         : self.wave_number,
+                              'gamestate'    : self.gamestate,
+                              'gamemode'     : self.gamemode,
+                              'swarm'        : self.swarm,
+                              'balls'        : len(self.balls),
+                              'targets'      : len(self.targets),
+                              'blockers'     : len(self.blockers),
+                              'bombers'      : len(self.bombers),
+                              'brutes'       : len(self.brutes),
+                              'bases'        : len(self.bases),
+                              'dormant'      : len(self.dormant),
+                              'particle_systems' : len(self.psc.systems),
+                              'particles'    : self.psc.pool.live,
+                              'quality'      : QUALITY_LEVELS[self.quality_level]['name'],
+                              'render_scale' : screen.scale,
+                              'pipelined'    : self.render_profiler is not None,
+                              'io_pending'   : self.io.pending()},
+                  'samples' : samples}
+        path = os.path.join(SPIKE_DIR, time.strftime('spike-%Y%m%d-%H%M%S') + '-{:06d}.json'.format(number))
+        self.io.submit(writeReport, (path, report))
+        
+    def publishBroadcast(self):
+        
+        # hands this frame's new live input to the spectators, never blocks
+        if self.broadcaster is not None and self.game_number > 0 and self.gamemode == GAME_MODE_LIVE:
+            self.broadcaster.publish(self.game_number, self.random_seed, self.swarm, self.recording,
+                                     self.mask_collisions, self.brute_flow_field)
+            
+    # ======================================================================
+    # snapshots
+    # ======================================================================
+    # netplay keeps a snapshot per tick for the last few ticks and goes
+    # back to one when the other player's input turns out not to be what
+    # it guessed. Everything update() reads or changes is in it apart from
+    # particles and stars, which are only for show.
+    
+    def snapshot(self):
+        
+        sb = self.scoreboard
+        return (tuple([getattr(self, name) for name in SNAPSHOT_FIELDS]),
+                [[cloneEntity(e) for e in getattr(self, group)] for group in SNAPSHOT_GROUPS],
+                self.dormant.copy(cloneEntity),
+                (self.reticule.pos.getCopy(), self.reticule.bullets_loaded),
+                (self.reticule2.pos.getCopy(), self.reticule2.bullets_loaded),
+                (sb.score, sb.targetscore, sb.needTableUpdate, sb.rank),
+                random.getstate(),
+                set(self.contacts.contacts))
+                
+    def restore(self, snapshot):
+        
+        # the snapshot is copied again, so it can be restored more than once
+        fields, groups, dormant, reticule, reticule2, score, state, contacts = snapshot
+        for name, value in zip(SNAPSHOT_FIELDS, fields):
+            setattr(self, name, value)
+        for name, entities in zip(SNAPSHOT_GROUPS, groups):
+            setattr(self, name, [cloneEntity(e) for e in entities])
+        self.dormant = dormant.copy(cloneEntity)
+        self.reticule.pos = reticule[0].getCopy()
+        self.reticule.bullets_loaded = reticule[1]
+        self.reticule2.pos = reticule2[0].getCopy()
+        self.reticule2.bullets_loaded = reticule2[1]
+        sb = self.scoreboard
+        sb.score, sb.targetscore, sb.needTableUpdate, sb.rank = score
+        random.setstate(state)
+        self.contacts.contacts = set(contacts)
+        
+    def checksum(self, snapshot=None):
+        
+        # crc of the gameplay state now, or in a snapshot. Both ends of a
+        # netplay game compare these to spot a desync
+        if snapshot is None:
+            fields = [getattr(self, name) for name in SNAPSHOT_FIELDS]
+            groups = [getattr(self, group) for group in SNAPSHOT_GROUPS]
+            dormant = self.dormant
+            score = self.scoreboard.targetscore
+        else:
+            fields, groups, dormant = snapshot[:3]
+            score = snapshot[5][1]
+        state = [list(fields), score, len(dormant)]
+        for entities in groups:
+            state.append([(e.pos.x, e.pos.y, e.vel.x, e.vel.y) for e in entities])
+        return zlib.crc32(repr(state).encode('ascii'))
+            
+    def togglePipeline(self):
+        
+        # the running loop hands over to the other one at the end of the frame
+        self.pipelined = not self.pipelined
+        if self.pipelined:
+            self.setLowLatency(False)
+        
+    def setLowLatency(self, on):
+        
+        # the pipelined loop puts input a frame behind, so it goes off
+        self.low_latency = on
+        if on:
+            self.pipelined = False
+        smoothing = LOW_LATENCY_SMOOTHING if on else RETICULE_SMOOTHING
+        self.reticule.smoothing = smoothing
+        self.reticule2.smoothing = smoothing
+        
+    def toggleLowLatency(self):
+        
+        self.setLowLatency(not self.low_latency)
+        
+    def handleKey(self, key):
+        
+        if (key == pygame.K_SPACE):
+            self.spacebarPressed()
+        elif (key == pygame.K_r):
+            self.startReplay()
+        elif (key == pygame.K_s):
+            self.toggleSlowMotion()
+        elif key in REPLAY_SPEED_DOWN:
+            self.stepReplaySpeed(-1)
+        elif key in REPLAY_SPEED_UP:
+            self.stepReplaySpeed(1)
+        elif (key == pygame.K_w):
+            self.toggleSwarm()
+        elif (key == pygame.K_t):
+            self.togglePipeline()
+        elif (key == pygame.K_h):
+            self.cycleRenderScale()
+        elif (key == pygame.K_f):
+            self.toggleFullscreen()
+        elif (key == pygame.K_p):
+            self.profiler.toggle()
+        elif (key == pygame.K_c):
+            self.profiler.exportCSV(PROFILER_CSV)
+        elif (key == pygame.K_q):
+            self.toggleGovernor()
+        elif (key == pygame.K_b):
+            self.toggleBroadcast()
+        elif (key == pygame.K_k):
+            self.toggleSampler()
+        elif (key == pygame.K_m):
+            self.toggleMemoryOverlay()
+        elif (key == pygame.K_l):
+            self.toggleLowLatency()
+            
+    def pollEvents(self, events=None):
+        
+        # returns (done, click, keys pressed). events are (time, event)
+        # from the input clock in low latency mode, otherwise the queue
+        # is read and stamped now. The first click and the last mouse
+        # move are kept in click_event and motion_event
+        done = False
+        click = False
+        keys = []
+        self.click_event = None
+        self.motion_event = None
+        
+        if events is None:
+            now = time.perf_counter()
+            events = [(now, event) for event in pygame.event.get()]
+        
+        for stamp, event in events: 
+            if event.type == pygame.QUIT:  
+                done = True
+                
+            if event.type == pygame.KEYDOWN:
+                if (event.key == pygame.K_ESCAPE):
+                    done = True
+                else:
+                    keys.append(event.key)
+                    
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1: # left click
+                    if not click:
+                        self.click_event = (stamp, event.pos)
+                    click = True
+                    
+            if event.type == pygame.MOUSEMOTION:
+                self.motion_event = (stamp, event.pos)
+                    
+        return done, click, keys
+        
+    def lowLatencyInput(self, click):
+        
+        # returns this tick's (mousex, mousey, click). A click aims where
+        # it was made and carries how long ago that was, the tick it
+        # fires in is simulated now
+        if click:
+            stamp, pos = self.click_event
+            steps = int((time.perf_counter() - stamp) * self.fps * CLICK_LEAD_STEPS)
+            mousex, mousey = screen.toLogical(pos)
+            return mousex, mousey, 1 + min(CLICK_LEAD_STEPS - 1, max(0, steps))
+        mousex, mousey = screen.toLogical(pygame.mouse.get_pos())
+        return mousex, mousey, False
+        
+    def measureLatency(self):
+        
+        # the input this frame used, timed to its flip by frameShown()
+        if self.click_event is not None:
+            self.latency.used('click', self.click_event[0])
+        if self.motion_event is not None:
+            self.latency.used('motion', self.motion_event[0])
+        
+    def stepInput(self, mousex, mousey, click):
+        
+        # the state can change at the top of update() so check the
+        # same conditions here before deciding to record/replay input.
+        # Returns the input update() should use this tick
+        self.updateGameState()
+                    
+        if self.gamemode == GAME_MODE_LIVE:
+            if self.gamestate == GAME_STATE_IN_PROGRESS:
+                self.recording.append( (mousex, mousey, click) )
+            self.last_mouse = (mousex, mousey)
+        else:
+            # game is showing a replay of last game, the reticule stays
+            # where the replay left it
+            if self.gamestate == GAME_STATE_IN_PROGRESS and self.thisframe < self.replay_length:
+                mousex, mousey, click = self.recording[self.thisframe]
+                self.thisframe += 1
+                self.last_mouse = (mousex, mousey)
+            else:
+                mousex, mousey = self.last_mouse
+                
+        return mousex, mousey, click
+                     
+    def run(self):
+        
+        done = False
+        while not done:
+            if self.pipelined:
+                done = self.runPipelined()
+            else:
+                done = self.runSerial()
+        
+        if self.broadcaster is not None:
+            self.broadcaster.stop()
+        if self.sampler is not None:
+            self.sampler.stop()
+        
+        # let any saves still queued finish before we go
+        self.telemetry.flush()
+        self.dumpMemory()
+        self.io.stop()
+        if self.leaks is not None:
+            self.leaks.stop()
+        self.scoreboard.store.close()
+        
+    def runSerial(self):
+        
+        # returns True on quit, False if switched to the pipelined loop
+        done = False
+        self.last_mouse = screen.toLogical(pygame.mouse.get_pos())
+        
+        while not done and not self.pipelined:
+            
+            self.profiler.startFrame()
+            
+            if self.low_latency:
+                done, click, keys = self.pollEvents(self.input_clock.events())
+                mousex, mousey, click = self.lowLatencyInput(click)
+            else:
+                mousex, mousey = screen.toLogical(pygame.mouse.get_pos())
+                done, click, keys = self.pollEvents()
+            self.measureLatency()
+            for key in keys:
+                self.handleKey(key)
+                
+            self.stepFrame(mousex, mousey, click)
+            
+            screen.fill(COLOUR_BLACK)
+            self.draw()
+            screen.present()
+            self.drawDebug()
+            self.profiler.mark('draw')
+            
+            # low latency mode flips as soon as the frame is drawn and
+            # waits for the next one after, reading input meanwhile
+            if not self.low_latency:
+                clock.tick(self.fps)
+                self.profiler.skip()
+            
+            pygame.display.flip()
+            self.latency.shown()
+            self.profiler.mark('flip')
+            if self.low_latency:
+                self.input_clock.tick(self.fps)
+                self.profiler.skip()
+            self.profiler.endFrame()
+            self.checkSpike(self.profiler)
+            
+            self.governor.addFrame(self.profiler.last_busy)
+            self.checkQuality()
+                
+            self.publishBroadcast()
+            self.io.poll()
+            self.checkMemory()
+            
+        return done
+            
+    # ======================================================================
+    # pipelined loop
+    # ======================================================================
+    # The simulation runs on its own thread one tick ahead of drawing. The
+    # main thread keeps events, the window and flip (SDL wants those on the
+    # thread that made the window) and sends each tick's input over. The
+    # simulation thread runs update() and then draw() with the render
+    # target recording, and hands the recorded commands back as that
+    # tick's snapshot. While it works on tick n the main thread plays back
+    # and flips tick n - 1, so a frame costs the slower of the two rather
+    # than both. Input reaches the screen one frame later than serial.
+    #
+    # Keys that change game state are sent to the simulation thread, the
+    # RENDER_KEYS ones are handled here. Pooled particle surfaces are
+    # refilled in place, so a recycled one can show its new colour a frame
+    # early.
+            
+    def runPipelined(self):
+        
+        self.render_profiler = FrameProfiler(PIPELINE_PHASES, PIPELINE_COLOURS, PROFILER_FRAMES, 1000.0 / self.fps)
+        self.last_mouse = screen.toLogical(pygame.mouse.get_pos())
+        inputs = queue.Queue(maxsize=1)
+        snapshots = queue.Queue(maxsize=1)
+        simulation = threading.Thread(target=self.simulate, args=(inputs, snapshots), name='simulation', daemon=True)
+        
+        screen.startRecording()
+        simulation.start()
+        
+        snapshot = None
+        done = False
+        
+        try:
+            while not done and self.pipelined:
+                
+                self.render_profiler.startFrame()
+                    
+                mousex, mousey = screen.toLogical(pygame.mouse.get_pos())
+                done, click, keys = self.pollEvents()
+                sim_keys = []
+                for key in keys:
+                    if key in RENDER_KEYS:
+                        self.handleKey(key)
+                    else:
+                        sim_keys.append(key)
+                
+                # start the next tick, then draw the last one while it runs
+                inputs.put((mousex, mousey, click, sim_keys))
+                self.render_profiler.mark('input')
+                
+                if snapshot is not None:
+                    screen.playback(snapshot)
+                    screen.present()
+                    self.drawDebug()
+                self.render_profiler.mark('draw')
+                
+                clock.tick(self.fps)
+                self.render_profiler.skip()
+                
+                pygame.display.flip()
+                self.render_profiler.mark('flip')
+                
+                # waiting on the simulation isn't work for this thread
+                snapshot = snapshots.get()
+                if isinstance(snapshot, Exception):
+                    raise snapshot
+                self.render_profiler.skip()
+                self.render_profiler.endFrame()
+                self.checkSpike(self.render_profiler)
+                
+                # a frame takes as long as the slower thread
+                self.governor.addFrame(max(self.profiler.last_busy, self.render_profiler.last_busy))
+                
+                self.publishBroadcast()
+                self.io.poll()
+                self.checkMemory()
+        finally:
+            inputs.put(None)
+            simulation.join()
+            screen.stopRecording()
+            self.render_profiler = None
+            
+        return done
+            
+    def simulate(self, inputs, snapshots):
+        
+        while True:
+            item = inputs.get()
+            if item is None:
+                break
+            
+            try:
+                self.profiler.startFrame()
+                
+                mousex, mousey, click, keys = item
+                for key in keys:
+                    self.handleKey(key)
+                self.checkQuality()
+                    
+                self.stepFrame(mousex, mousey, click)
+                
+                screen.fill(COLOUR_BLACK)
+                self.draw()
+                snapshot = screen.takeCommands()
+                self.profiler.mark('draw')
+                self.profiler.endFrame()
+                self.checkSpike(self.profiler)
+            except Exception as e:
+                snapshots.put(e)
+                break
+            
+            snapshots.put(snapshot)
+        
+def main():
+    
+    init()
+    game = Game()
+    game.run()
+    pygame.quit()
+    return 0
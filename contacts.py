@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  contacts.py
+#
+
+CONTACT_ENTER = 0
+CONTACT_STAY  = 1
+
+# ======================================================================
+# ContactManager class
+# ======================================================================
+# Remembers which pairs of things were touching last tick, so a collision
+# can be responded to once when the contact starts rather than on every
+# tick the two overlap. Each tick the caller touch()es every overlapping
+# pair, which says whether it's a new contact or one carrying on, then
+# calls endTick(), which returns the pairs that stopped touching. Pairs
+# are whatever hashable keys the caller uses (the game uses entity uids).
+
+class ContactManager():
+
+    def __init__(self):
+
+        self.contacts = set()   # pairs touching as of the last endTick()
+        self.touching = set()   # pairs touch()ed this tick
+
+    def touch(self, a, b):
+
+        pair = (a, b)
+        self.touching.add(pair)
+        if pair in self.contacts:
+            return CONTACT_STAY
+        return CONTACT_ENTER
+
+    def endTick(self):
+
+        # returns the pairs that stopped touching this tick, sorted so
+        # anything done with them happens in the same order every time
+        exited = sorted(self.contacts - self.touching)
+        self.contacts = self.touching
+        self.touching = set()
+        return exited
+
+    def clear(self):
+
+        self.contacts = set()
+        self.touching = set()
+
+    def __len__(self):
+
+        return len(self.contacts)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  coop.py
+#
+# two player co-op over the network, each player on their own machine
+# with a cannon defending the same bases. One hosts and the other joins
+#
+#   python coop.py --host
+#   python coop.py 192.168.1.20
+#
+# Both machines run the game, only input crosses the network (see
+# netplay.py). --latency/--jitter/--loss add a fake bad connection on
+# top of the real one, for trying it out with both ends on one machine.
+
+import sys
+import random
+import argparse
+import pygame
+import cannon
+import netplay
+
+# ======================================================================
+# CoopGame class
+# ======================================================================
+
+class CoopGame():
+
+    def __init__(self, session):
+
+        self.session = session
+        self.game    = session.game
+        self.click   = False    # a click on a frame we had to wait out
+
+    def draw(self, status):
+
+        game = self.game
+        cannon.screen.fill(cannon.COLOUR_BLACK)
+        game.draw()
+        cannon.screen.present()
+        game.drawDebug()
+
+        msg = 'PLAYER {}  {}  {}'.format(self.session.player + 1, status, self.session.status())
+        cannon.screen.window.blit(cannon.myfont10.render(msg, 0, cannon.COLOUR_WHITE), (10, 4))
+
+    def run(self):
+
+        game = self.game
+        session = self.session
+        done = False
+        while not done:
+            mousex, mousey = cannon.screen.toLogical(pygame.mouse.get_pos())
+            done, click, keys = game.pollEvents()
+            for key in keys:
+                # only what doesn't touch the game, both ends must agree on that
+                if key in [pygame.K_h, pygame.K_f, pygame.K_p]:
+                    game.handleKey(key)
+
+            self.click = self.click or click
+            if session.advance((mousex, mousey, self.click)):
+                self.click = False
+
+            if session.disconnected():
+                status = 'the other player has gone'
+            elif game.gamestate == cannon.GAME_STATE_OVER:
+                status = 'game over, escape to quit'
+            else:
+                status = ''
+            self.draw(status)
+
+            cannon.clock.tick(game.fps)
+            pygame.display.flip()
+
+        session.channel.close()
+        game.io.stop()
+        game.scoreboard.store.close()
+
+def waiting():
+
+    # keeps the window alive while connecting, False once it's closed
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            return False
+    cannon.screen.fill(cannon.COLOUR_BLACK)
+    textsurf = cannon.myfont30.render('waiting for the other player...', 0, cannon.COLOUR_RED)
+    cannon.screen.blit(textsurf, (20, 540))
+    cannon.screen.present()
+    pygame.display.flip()
+    return True
+
+def main():
+
+    parser = argparse.ArgumentParser(description='two player co-op cannon over the network')
+    parser.add_argument('host', nargs='?', help='join the game hosted here')
+    parser.add_argument('--host', dest='hosting', action='store_true', help='host a game')
+    parser.add_argument('--port', type=int, default=cannon.NETPLAY_PORT)
+    parser.add_argument('--seed', type=int, default=None, help='host only, random if not given')
+    parser.add_argument('--swarm', action='store_true', help='host only')
+    parser.add_argument('--delay', type=int, default=netplay.INPUT_DELAY, help='input delay in ticks')
+    parser.add_argument('--latency', type=float, default=0.0, help='ms added to everything sent')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many ms more')
+    parser.add_argument('--loss', type=float, default=0.0, help='fraction of datagrams dropped')
+    args = parser.parse_args()
+    if args.hosting == (args.host is not None):
+        parser.error('either --host or the host to join')
+
+    cannon.init()
+    options = {'latency' : args.latency / 1000.0,
+               'jitter'  : args.jitter / 1000.0,
+               'loss'    : args.loss}
+    if args.hosting:
+        pygame.display.set_caption('Cannon - co-op, hosting on port {}'.format(args.port))
+        seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+        swarm = args.swarm
+        channel = netplay.hostGame(args.port, seed, swarm, waiting=waiting, **options)
+        player = 0
+    else:
+        pygame.display.set_caption('Cannon - co-op with {}'.format(args.host))
+        joined = netplay.joinGame(args.host, args.port, waiting=waiting, **options)
+        channel, seed, swarm = joined if joined is not None else (None, None, None)
+        player = 1
+
+    if channel is not None:
+        game = cannon.Game()
+        game.startNetplay(seed, swarm)
+        CoopGame(netplay.RollbackSession(game, channel, player, args.delay)).run()
+    pygame.quit()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
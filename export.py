@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  export.py
+#
+# turns a saved replay into video without playing it on screen. The game
+# runs headless as fast as it can, each tick is drawn offscreen and the
+# raw frame handed to a pool of worker processes to encode, either as a
+# PNG sequence or as one uncompressed Y4M stream (ffmpeg reads it, or
+# pipe it straight in with -o -)
+#
+#   python export.py replays/replay-20200101-120000.json -o frames/
+#   python export.py replay.json -o highlight.y4m -j 4 --scale 0.5
+#   python export.py replay.json -o - --every 2 | ffmpeg -i - highlight.mp4
+#
+# The encoders only use the standard library, so the workers never load
+# pygame. Nothing here imports the game until main() runs, which keeps
+# it light for the workers to import.
+
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+import argparse
+import collections
+import multiprocessing
+
+FORMAT_PNG  = 'png'
+FORMAT_Y4M  = 'y4m'
+PNG_LEVEL   = 6         # zlib level, 1 is quicker and bigger
+PNG_NAME    = 'frame-{:06d}.png'
+TAIL_TICKS  = 500       # a replay that never ends stops this long after its input runs out
+
+# ======================================================================
+# encoders
+# ======================================================================
+# each takes a frame as width, height and packed RGB bytes, row by row
+
+def pngChunk(kind, data):
+
+    return struct.pack('!I', len(data)) + kind + data + struct.pack('!I', zlib.crc32(kind + data))
+
+def encodePNG(width, height, rgb, level=PNG_LEVEL):
+
+    # 8 bit RGB, no filtering, every row starts with filter type 0
+    stride = width * 3
+    raw = b''.join([b'\x00' + rgb[y * stride:(y + 1) * stride] for y in range(0, height)])
+    header = struct.pack('!IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' +
+            pngChunk(b'IHDR', header) +
+            pngChunk(b'IDAT', zlib.compress(raw, level)) +
+            pngChunk(b'IEND', b''))
+
+def lanes(channel):
+
+    # every byte of channel in the low half of its own 16 bit lane of one
+    # big int, so a whole plane can be multiplied and added at once
+    spread = bytearray(len(channel) * 2)
+    spread[1::2] = channel
+    return int.from_bytes(spread, 'big')
+
+def highBytes(n, pixels):
+
+    # the high byte of every lane, which is the lane divided by 256
+    return n.to_bytes(pixels * 2, 'big')[0::2]
+
+def encodeYUV444(width, height, rgb):
+
+    # full range BT.601 (as JPEG uses) in 8 bit fixed point, weights *256.
+    # Each lane's result stays inside 0-65535 so lanes never carry into
+    # each other: Y tops out at 255 * 256, and U and V start from 128 * 256
+    # with weights summing to 0
+    pixels = width * height
+    r = lanes(rgb[0::3])
+    g = lanes(rgb[1::3])
+    b = lanes(rgb[2::3])
+    half = lanes(b'\x80' * pixels) * 256
+    y = 77 * r + 150 * g + 29 * b
+    u = half - 43 * r - 85 * g + 128 * b
+    v = half + 128 * r - 107 * g - 21 * b
+    return highBytes(y, pixels) + highBytes(u, pixels) + highBytes(v, pixels)
+
+def y4mHeader(width, height, fps, every=1):
+
+    # frame rate fps / every. 4:4:4 so no chroma subsampling pass is needed
+    return 'YUV4MPEG2 W{} H{} F{}:{} Ip A1:1 C444 XCOLORRANGE=FULL\n'.format(width, height, fps, every).encode('ascii')
+
+def encodeFrame(task):
+
+    # runs on a worker. PNGs are written here, Y4M frames go back to be
+    # written in order. Returns the bytes to write (or b'')
+    index, width, height, rgb, fmt, out, level = task
+    if fmt == FORMAT_PNG:
+        data = encodePNG(width, height, rgb, level)
+        with open(os.path.join(out, PNG_NAME.format(index)), 'wb') as f:
+            f.write(data)
+        return b''
+    return b'FRAME\n' + encodeYUV444(width, height, rgb)
+
+# ======================================================================
+# rendering
+# ======================================================================
+
+def loadReplay(path):
+
+    with open(path) as f:
+        return json.load(f)
+
+def renderFrames(cannon, game, replay, scale=1.0, every=1):
+
+    # plays the replay on game and yields (index, width, height, rgb) for
+    # every every'th tick, until the game over screen
+    import pygame
+
+    cannon.screen.configure(scale, False)
+    game.random_seed = replay['seed']
+    game.swarm = replay['swarm']
+    game.mask_collisions = replay.get('masks', False)
+    game.brute_flow_field = replay.get('flow', False)
+    game.gamemode = cannon.GAME_MODE_REPLAY
+    game.recording = [tuple(tick) for tick in replay['recording']]
+    game.replay_length = len(game.recording)
+    game.startGame()
+    game.gamestate = cannon.GAME_STATE_IN_PROGRESS
+
+    tick = 0
+    index = 0
+    tail = 0
+    while game.gamestate != cannon.GAME_STATE_OVER and tail < TAIL_TICKS:
+        mousex, mousey, click = game.stepInput(0, 0, False)
+        game.update(mousex, mousey, click)
+        if game.thisframe >= game.replay_length:
+            tail += 1
+
+        if tick % every == 0:
+            cannon.screen.fill(cannon.COLOUR_BLACK)
+            game.draw()
+            surface = cannon.screen.surface
+            width, height = surface.get_size()
+            yield index, width, height, pygame.image.tostring(surface, 'RGB')
+            index += 1
+        tick += 1
+
+# ======================================================================
+# exporting
+# ======================================================================
+# The main process simulates and draws while the pool encodes, with at
+# most in_flight frames handed over and not yet back so a slow encoder
+# can't fill memory with raw frames. Y4M frames are written as they come
+# back, in order.
+
+def export(frames, fmt, out, pool=None, in_flight=8, fps=50, every=1, level=PNG_LEVEL):
+
+    # returns how many frames were exported
+    stream = None
+    if fmt == FORMAT_Y4M:
+        stream = sys.stdout.buffer if out == '-' else open(out, 'wb')
+    else:
+        os.makedirs(out, exist_ok=True)
+
+    pending = collections.deque()
+    count = 0
+    try:
+        for index, width, height, rgb in frames:
+            if stream is not None and index == 0:
+                stream.write(y4mHeader(width, height, fps, every))
+            task = (index, width, height, rgb, fmt, out, level)
+            if pool is None:
+                data = encodeFrame(task)
+                if stream is not None:
+                    stream.write(data)
+            else:
+                pending.append(pool.apply_async(encodeFrame, (task,)))
+                while len(pending) >= in_flight:
+                    data = pending.popleft().get()
+                    if stream is not None:
+                        stream.write(data)
+            count += 1
+        while pending:
+            data = pending.popleft().get()
+            if stream is not None:
+                stream.write(data)
+    finally:
+        if stream is not None and stream is not sys.stdout.buffer:
+            stream.close()
+    return count
+
+def loadGame():
+
+    # an offscreen window and no mixer, video has no sound anyway. pygame
+    # prints a banner to stdout when imported, which may be the video
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    import cannon
+    cannon.init(audio=False)
+    return cannon
+
+def main():
+
+    parser = argparse.ArgumentParser(description='export a replay as a PNG sequence or Y4M video')
+    parser.add_argument('replay')
+    parser.add_argument('-o', '--out', required=True, help='a directory for PNGs, a .y4m file, or - for Y4M on stdout')
+    parser.add_argument('-f', '--format', choices=[FORMAT_PNG, FORMAT_Y4M], default=None,
+                        help='default y4m if --out ends .y4m or is -, else png')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(), help='encoder processes, 0 encodes in this one')
+    parser.add_argument('--scale', type=float, default=1.0, help='of the 1200x600 playfield')
+    parser.add_argument('--every', type=int, default=1, help='keep every nth tick, the game runs at 50')
+    parser.add_argument('--level', type=int, default=PNG_LEVEL, help='PNG compression level')
+    args = parser.parse_args()
+
+    fmt = args.format
+    if fmt is None:
+        fmt = FORMAT_Y4M if args.out == '-' or args.out.endswith('.y4m') else FORMAT_PNG
+    replay_path = os.path.abspath(args.replay)
+    out = args.out if args.out == '-' else os.path.abspath(args.out)
+
+    # the pool starts before the game is imported so the workers don't
+    # inherit a window
+    pool = multiprocessing.Pool(args.jobs) if args.jobs > 0 else None
+    try:
+        cannon = loadGame()
+        game = cannon.Game()
+        start = time.perf_counter()
+        frames = renderFrames(cannon, game, loadReplay(replay_path), args.scale, args.every)
+        count = export(frames, fmt, out, pool, max(2, args.jobs * 2), game.fps, args.every, args.level)
+        seconds = time.perf_counter() - start
+        game.io.stop()
+        game.scoreboard.store.close()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # stdout may be the video
+    rate = game.fps / args.every
+    sys.stderr.write('{} frames in {:.1f}s, {:.1f} fps ({:.1f}x real time)\n'.format(
+        count, seconds, count / seconds, count / seconds / rate))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
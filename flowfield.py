@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  flowfield.py
+#
+# grid flow field. The playfield is cut into square cells and a breadth
+# first search out from the goal cells (the bases) gives every cell its
+# distance to the nearest goal, going round the blocked ones. Each cell
+# then stores the direction to its closest neighbour as one byte, so
+# anything steering by the field costs one bytearray lookup a tick
+# however many of them there are.
+
+import math
+import collections
+
+# the 8 ways out of a cell, straight ones first so they win ties
+DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1), (1, 1), (-1, 1), (-1, -1), (1, -1)]
+NO_DIRECTION = 255      # goal cells, cells that can't reach a goal, off the grid
+
+UNREACHED = 0xFFFFFFFF
+
+# unit vectors for DIRECTIONS
+DIRECTION_VECTORS = [(dx / math.hypot(dx, dy), dy / math.hypot(dx, dy)) for dx, dy in DIRECTIONS]
+
+# (cols, rows) -> per cell [(direction, neighbour index), ...], the grid
+# never changes size during a game so each one is worked out once
+neighbour_tables = {}
+
+def neighbourTable(cols, rows):
+
+    table = neighbour_tables.get((cols, rows))
+    if table is None:
+        table = []
+        for r in range(0, rows):
+            for c in range(0, cols):
+                table.append([(n, (r + dy) * cols + c + dx) for n, (dx, dy) in enumerate(DIRECTIONS)
+                              if 0 <= c + dx < cols and 0 <= r + dy < rows])
+        neighbour_tables[(cols, rows)] = table
+    return table
+
+# ======================================================================
+# FlowField class
+# ======================================================================
+# Built once and never changed after, so a game snapshot can keep a
+# reference to it. tick and key say what it was built from, the caller
+# decides when that's out of date.
+
+class FlowField():
+
+    def __init__(self, width, height, cell, tick=0, key=None):
+
+        self.width      = width
+        self.height     = height
+        self.cell       = cell
+        self.cols       = int(math.ceil(width / cell))
+        self.rows       = int(math.ceil(height / cell))
+        self.tick       = tick
+        self.key        = key
+        self.directions = bytearray([NO_DIRECTION]) * (self.cols * self.rows)
+
+    def __repr__(self):
+
+        # what it was built from, the game's checksum repr()s its state
+        return 'FlowField({}, {}, {})'.format(self.cell, self.tick, self.key)
+
+    def cellsIn(self, rect):
+
+        # indices of the cells rect (x, y, w, h) covers, clipped to the grid
+        x, y, w, h = rect
+        c0 = max(0, int(x // self.cell))
+        c1 = min(self.cols - 1, int((x + w - 1) // self.cell))
+        r0 = max(0, int(y // self.cell))
+        r1 = min(self.rows - 1, int((y + h - 1) // self.cell))
+        return [r * self.cols + c for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+    def build(self, goals, obstacles):
+
+        # goals and obstacles are lists of rects. A goal cell is never
+        # blocked. The search only steps straight, so the distances are
+        # city block, and picking the lowest of all 8 neighbours after
+        # lets paths cut across diagonally
+        cols = self.cols
+        rows = self.rows
+        size = cols * rows
+        blocked = bytearray(size)
+        for rect in obstacles:
+            for i in self.cellsIn(rect):
+                blocked[i] = 1
+
+        distance = [UNREACHED] * size
+        frontier = collections.deque()
+        for rect in goals:
+            for i in self.cellsIn(rect):
+                if distance[i] != 0:
+                    distance[i] = 0
+                    blocked[i] = 0
+                    frontier.append(i)
+
+        table = neighbourTable(cols, rows)
+        while frontier:
+            i = frontier.popleft()
+            d = distance[i] + 1
+            for n, j in table[i]:
+                if n < 4 and distance[j] == UNREACHED and not blocked[j]:
+                    distance[j] = d
+                    frontier.append(j)
+
+        # blocked cells get a direction too, a blocker can drift over
+        # something already inside it
+        directions = self.directions
+        for i in range(0, size):
+            best = distance[i]
+            if best == 0:
+                continue
+            way = NO_DIRECTION
+            for n, j in table[i]:
+                if distance[j] < best:
+                    best = distance[j]
+                    way = n
+            directions[i] = way
+        return self
+
+    def direction(self, x, y):
+
+        # index into DIRECTIONS at playfield position x, y
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.directions[int(y // self.cell) * self.cols + int(x // self.cell)]
+        return NO_DIRECTION
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  governor.py
+#
+import collections
+
+# ======================================================================
+# QualityGovernor class
+# ======================================================================
+# Watches recent frame times against the frame budget and moves a
+# quality level between 0 (lowest) and levels - 1 (highest). What a level
+# means is up to the caller.
+#
+# Dropping is quick: if the slowest 10% of the last few frames are over
+# budget the level goes down. Raising is slow: the whole of a longer
+# window has to be comfortably under budget. After any change the level
+# is held for a while so one explosion doesn't make it flap.
+
+class QualityGovernor():
+
+    def __init__(self, levels, budget_ms, down_frames=15, up_frames=150, hold_frames=100):
+
+        self.levels      = levels
+        self.level       = levels - 1
+        self.budget_ms   = budget_ms
+        self.down_frames = down_frames
+        self.up_frames   = up_frames
+        self.hold_frames = hold_frames
+        self.hold        = 0
+        self.enabled     = True
+        self.samples     = collections.deque(maxlen=max(down_frames, up_frames))
+
+        # ratios of the budget that trigger a change
+        self.down_ratio  = 0.9
+        self.up_ratio    = 0.5
+
+    def toggle(self):
+
+        # switched off means full quality
+        self.enabled = not self.enabled
+        self.reset(self.levels - 1)
+
+    def reset(self, level):
+
+        self.level = level
+        self.hold = self.hold_frames
+        self.samples.clear()
+
+    def addFrame(self, ms):
+
+        # returns True if the level changed
+        self.samples.append(ms)
+
+        if not self.enabled:
+            return False
+
+        if self.hold > 0:
+            self.hold -= 1
+            return False
+
+        if self.level > 0 and len(self.samples) >= self.down_frames:
+            recent = sorted(list(self.samples)[-self.down_frames:])
+            p90 = recent[int((len(recent) - 1) * 0.9)]
+            if p90 > self.budget_ms * self.down_ratio:
+                self.reset(self.level - 1)
+                return True
+
+        if self.level < self.levels - 1 and len(self.samples) >= self.up_frames:
+            if max(self.samples) < self.budget_ms * self.up_ratio:
+                self.reset(self.level + 1)
+                return True
+
+        return False
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  highscores.py
+#
+import os
+import json
+import time
+import bisect
+import heapq
+import pickle
+import collections
+
+# one submitted score. id is a sequence number, timestamp is unix time
+HighScore = collections.namedtuple('HighScore', ['id', 'score', 'player', 'wave', 'accuracy', 'timestamp', 'replay'])
+
+BOARD_ALL = 'all'
+
+_day_boards = {}
+
+def boardForDay(timestamp=None):
+
+    # the board name for the local day timestamp falls on, e.g. day:2020-05-01
+    # every timezone offset is a whole number of quarter hours so the name
+    # can be cached per quarter hour, localtime() is slow over millions
+    if timestamp is None:
+        timestamp = time.time()
+    quarter = int(timestamp // 900)
+    board = _day_boards.get(quarter)
+    if board is None:
+        board = time.strftime('day:%Y-%m-%d', time.localtime(quarter * 900))
+        _day_boards[quarter] = board
+    return board
+
+# ======================================================================
+# HighScoreStore class
+# ======================================================================
+# Keeps every submitted score. On disk there are two files:
+#
+#   <name>.db       snapshot, a header line then one JSON array per entry
+#   <name>.journal  one JSON array per entry appended since the snapshot
+#
+# submit() appends to the journal and fsyncs, so a crash loses at most
+# the score being written. A line that doesn't parse is skipped on load,
+# and a torn one at the end is cut off there so the next append starts on
+# a line of its own rather than being joined onto it. The game
+# splits that in two: record() updates the in-memory indexes straight
+# away and write() does the disk work on the io worker. Writes must all
+# happen on one thread, in order. Once the
+# journal gets long compact() writes a new snapshot to a temp file and
+# os.replace()s it over the old one, then empties the journal. The
+# snapshot header records the last id it holds so journal entries that
+# made it into the snapshot are skipped if we crash before the journal
+# is emptied.
+#
+# In memory each board (all, and one per day) has every score in a sorted
+# list for rank() and the top_k best entries for top().
+
+class HighScoreStore():
+
+    def __init__(self, name='highscores', top_k=10, compact_every=10000):
+
+        self.snapshot_path = name + '.db'
+        self.journal_path  = name + '.journal'
+        self.top_k         = top_k
+        self.compact_every = compact_every
+        self.entries       = []
+        self.scores        = {}     # board -> ascending list of scores
+        self.top_entries   = {}     # board -> best top_k entries, best first
+        self.top_keys      = {}     # board -> sort keys matching top_entries
+        self.last_id       = 0
+        self.journal_count = 0
+        self.journal       = None
+
+        self.load()
+
+    def load(self):
+
+        snapshot_last_id = 0
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                header = json.loads(f.readline())
+                snapshot_last_id = header['last_id']
+                for line in f:
+                    self.entries.append(HighScore(*json.loads(line)))
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+            offset = 0
+            good = 0    # bytes up to the end of the last line that loaded
+            for line in data.splitlines(keepends=True):
+                offset += len(line)
+                try:
+                    entry = HighScore(*json.loads(line))
+                except (ValueError, TypeError):
+                    # torn write from a crash
+                    continue
+                good = offset
+                if entry.id > snapshot_last_id:
+                    self.entries.append(entry)
+                    self.journal_count += 1
+            newline = good > 0 and not data[:good].endswith(b'\n')
+            if good < len(data) or newline:
+                self.repairJournal(good, newline)
+
+        self.rebuild()
+
+    def repairJournal(self, size, newline):
+
+        # cuts whatever follows the last good line, and ends that line if
+        # the crash came before its newline, before anything is appended
+        with open(self.journal_path, 'r+b') as f:
+            f.truncate(size)
+            if newline:
+                f.seek(size)
+                f.write(b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def rebuild(self):
+
+        # builds every index from self.entries in one go, inserting one at
+        # a time is quadratic once there are millions of scores
+        self.scores = {}
+        self.top_entries = {}
+        self.top_keys = {}
+        boards = {BOARD_ALL: self.entries}
+        for entry in self.entries:
+            boards.setdefault(boardForDay(entry.timestamp), []).append(entry)
+            self.last_id = max(self.last_id, entry.id)
+
+        for board, entries in boards.items():
+            self.scores[board] = sorted(e.score for e in entries)
+            best = heapq.nsmallest(self.top_k, entries, key=lambda e: (-e.score, e.id))
+            self.top_entries[board] = best
+            self.top_keys[board] = [(-e.score, e.id) for e in best]
+
+    def index(self, entry):
+
+        self.entries.append(entry)
+        self.last_id = max(self.last_id, entry.id)
+        for board in (BOARD_ALL, boardForDay(entry.timestamp)):
+            bisect.insort(self.scores.setdefault(board, []), entry.score)
+            self.indexTop(board, entry)
+
+    def indexTop(self, board, entry):
+
+        entries = self.top_entries.setdefault(board, [])
+        keys = self.top_keys.setdefault(board, [])
+
+        # higher score first, earlier entry wins a tie
+        key = (-entry.score, entry.id)
+        if len(keys) < self.top_k or key < keys[-1]:
+            i = bisect.bisect(keys, key)
+            keys.insert(i, key)
+            entries.insert(i, entry)
+            if len(keys) > self.top_k:
+                keys.pop()
+                entries.pop()
+
+    def submit(self, score, player='', wave=0, accuracy=0.0, replay=None, timestamp=None):
+
+        entry = self.record(score, player, wave, accuracy, replay, timestamp)
+        self.write(entry)
+        return entry
+
+    def record(self, score, player='', wave=0, accuracy=0.0, replay=None, timestamp=None):
+
+        if timestamp is None:
+            timestamp = time.time()
+        entry = HighScore(self.last_id + 1, score, player, wave, accuracy, timestamp, replay)
+        self.index(entry)
+        return entry
+
+    def write(self, entry):
+
+        if self.journal is None:
+            self.journal = open(self.journal_path, 'a')
+        self.journal.write(json.dumps(list(entry)) + '\n')
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+        self.journal_count += 1
+        if self.journal_count >= self.compact_every:
+            self.compact()
+
+        return entry
+
+    def compact(self):
+
+        # entries can be record()ed on another thread while this runs, so
+        # work from a copy. Anything recorded but not yet written lands in
+        # the snapshot and is then skipped when its journal line loads.
+        entries = list(self.entries)
+        if len(entries) > 0:
+            last_id = entries[-1].id
+        else:
+            last_id = 0
+
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(json.dumps({'last_id': last_id}) + '\n')
+            for entry in entries:
+                f.write(json.dumps(list(entry)) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        # everything in the journal is in the snapshot now
+        self.close()
+        open(self.journal_path, 'w').close()
+        self.journal_count = 0
+
+    def close(self):
+
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def top(self, n=10, board=BOARD_ALL):
+
+        if n <= self.top_k:
+            return self.top_entries.get(board, [])[:n]
+
+        # bigger than the index, fall back to a full sort of the board
+        if board == BOARD_ALL:
+            entries = self.entries
+        else:
+            entries = [e for e in self.entries if boardForDay(e.timestamp) == board]
+        return sorted(entries, key=lambda e: (-e.score, e.id))[:n]
+
+    def rank(self, score, board=BOARD_ALL):
+
+        # 1 based position score would take on the board
+        scores = self.scores.get(board, [])
+        return len(scores) - bisect.bisect_right(scores, score) + 1
+
+    def count(self, board=BOARD_ALL):
+
+        return len(self.scores.get(board, []))
+
+    def importPickle(self, path):
+
+        # bring the scores over from the old highscores.pkl, a flat list
+        with open(path, 'rb') as f:
+            scores = pickle.load(f)
+        for score in sorted(scores, reverse=True):
+            self.submit(score, player='legacy')
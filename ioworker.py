@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  ioworker.py
+#
+import os
+import queue
+import threading
+
+# ======================================================================
+# IOWorker class
+# ======================================================================
+# Runs file writes on a background thread so the frame loop never waits
+# on disk. Jobs run one at a time in the order they were submitted.
+# Completion callbacks are queued back and run on the main thread from
+# poll(), so they can touch game state safely.
+
+class IOWorker():
+
+    def __init__(self, maxsize=64):
+
+        self.jobs = queue.Queue(maxsize)
+        self.done = queue.Queue()
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.work, name='io-worker', daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, args=(), callback=None, block=False):
+
+        # callback(result, error) runs on the main thread from poll().
+        # Never blocks, returns False if the queue is full and the job
+        # was dropped. With block it waits for room instead, for a write
+        # that mustn't be lost
+        if block:
+            self.jobs.put((fn, args, callback))
+            return True
+        try:
+            self.jobs.put_nowait((fn, args, callback))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def work(self):
+
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                break
+
+            fn, args, callback = job
+            result = None
+            error = None
+            try:
+                result = fn(*args)
+            except Exception as e:
+                error = e
+
+            if callback is not None:
+                self.done.put((callback, result, error))
+            self.jobs.task_done()
+
+    def poll(self):
+
+        # run any completion callbacks, call once per frame
+        while True:
+            try:
+                callback, result, error = self.done.get_nowait()
+            except queue.Empty:
+                break
+            callback(result, error)
+
+    def pending(self):
+
+        return self.jobs.unfinished_tasks
+
+    def flush(self):
+
+        # wait for everything queued so far, only for exit/tools
+        self.jobs.join()
+        self.poll()
+
+    def stop(self):
+
+        self.flush()
+        self.jobs.put(None)
+        self.thread.join()
+
+
+# ======================================================================
+# jobs
+# ======================================================================
+
+def writeFileAtomic(path, text):
+
+    # write to a temp file then rename over path, readers never see half
+    # a file and a crash leaves the old one in place
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+def appendLine(path, line):
+
+    with open(path, 'a') as f:
+        f.write(line + '\n')
+    return path
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  latency.py
+#
+# low latency input. pygame's events carry no time of their own and
+# clock.tick() sleeps through the end of every frame, so a click made
+# then waits in the queue until the next frame reads it. In low latency
+# mode an EventClock does the waiting instead, reading the queue every
+# millisecond or so and stamping each event as it comes out. The game
+# aims with the click's own position and uses the stamp to start the
+# ball part of a tick on. A LatencyMeter times stamped input to the flip
+# of the frame that first showed it.
+
+import time
+import collections
+import pygame
+
+# ======================================================================
+# EventClock class
+# ======================================================================
+# stands in for pygame.time.Clock.tick(). events() hands over everything
+# read since the last call as (time, event) pairs, oldest first.
+
+class EventClock():
+
+    def __init__(self, interval=0.001):
+
+        self.interval = interval
+        self.pending  = []
+        self.last     = time.perf_counter()
+
+    def collect(self):
+
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            self.pending.append((now, event))
+
+    def events(self):
+
+        self.collect()
+        events = self.pending
+        self.pending = []
+        return events
+
+    def tick(self, fps):
+
+        # waits until 1 / fps after the last tick(), reading events meanwhile
+        deadline = self.last + 1.0 / fps
+        while True:
+            self.collect()
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(self.interval, deadline - now))
+        self.last = now
+
+# ======================================================================
+# LatencyMeter class
+# ======================================================================
+# used(kind, stamp) for each stamped input that went into the frame being
+# drawn, shown() once it has been flipped. Keeps the last size samples of
+# each kind in ms. Stamps taken when the frame read the queue (not low
+# latency mode) leave out however long the input waited there, so they
+# only give a lower bound.
+
+class LatencyMeter():
+
+    def __init__(self, kinds=('click', 'motion'), size=300):
+
+        self.samples = {kind : collections.deque(maxlen=size) for kind in kinds}
+        self.waiting = []
+
+    def used(self, kind, stamp):
+
+        self.waiting.append((kind, stamp))
+
+    def shown(self, now=None):
+
+        if now is None:
+            now = time.perf_counter()
+        for kind, stamp in self.waiting:
+            self.samples[kind].append((now - stamp) * 1000.0)
+        self.waiting = []
+
+    def stats(self, kind):
+
+        # (p50, p99, samples) in ms, None with no samples yet
+        samples = sorted(self.samples[kind])
+        if len(samples) == 0:
+            return None
+        n = len(samples)
+        return samples[n // 2], samples[min(n - 1, int(n * 0.99))], n
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  memory.py
+#
+# memory accounting. The game fills a MemoryUsage with how many of each
+# thing it holds and roughly how many bytes they take, by subsystem, to
+# show on the M overlay and to append to a JSONL file every so often.
+# With tracing on, a LeakTracker takes a tracemalloc snapshot at each
+# wave end and the io worker writes what grew since the last one. Run on
+# its own it reads that file back
+#
+#   python memory.py memory/memory-20200101-120000-4711.jsonl
+#   python memory.py memory/memory-20200101-120000-4711.jsonl --growth
+
+import os
+import sys
+import json
+import argparse
+import collections
+import tracemalloc
+import pygame
+
+from ioworker import appendLine
+
+# ======================================================================
+# sizes
+# ======================================================================
+# estimates, not exact. sys.getsizeof() only counts the object itself,
+# objectBytes() adds its __dict__ and any small objects it holds (the
+# Vector2s and Rects), but not surfaces or sounds, which are counted on
+# their own. A group of the same kind of thing is sized from its first
+# member so a thousand entities aren't walked every time
+
+def objectBytes(obj):
+
+    size = sys.getsizeof(obj)
+    attributes = getattr(obj, '__dict__', None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+        for value in attributes.values():
+            if hasattr(value, '__dict__') or isinstance(value, pygame.Rect):
+                size += sys.getsizeof(value) + sys.getsizeof(getattr(value, '__dict__', None) or {})
+    return size
+
+def groupBytes(items, sizeof=objectBytes):
+
+    if len(items) == 0:
+        return 0
+    return len(items) * sizeof(items[0])
+
+def tupleBytes(t):
+
+    # a tuple and what's in it, small ints are shared so this is high
+    return sys.getsizeof(t) + sum([sys.getsizeof(v) for v in t])
+
+def surfaceBytes(surface):
+
+    # pixels, pitch includes any padding at the end of each row
+    return surface.get_pitch() * surface.get_height()
+
+def soundBytes(sound, mixer):
+
+    # mixer is pygame.mixer.get_init(), (frequency, format, channels).
+    # Sounds are held decoded at the mixer's format
+    frequency, fmt, channels = mixer
+    return int(sound.get_length() * frequency) * channels * (abs(fmt) // 8)
+
+def formatBytes(n):
+
+    if n >= 1024 * 1024:
+        return '{:.1f}MB'.format(n / (1024 * 1024))
+    if n >= 1024:
+        return '{:.1f}KB'.format(n / 1024)
+    return '{}B'.format(n)
+
+# ======================================================================
+# MemoryUsage class
+# ======================================================================
+# one row per (subsystem, name) of count and bytes, in the order added
+
+class MemoryUsage():
+
+    def __init__(self):
+
+        self.rows = collections.OrderedDict()
+
+    def add(self, subsystem, name, count, nbytes):
+
+        self.rows.setdefault(subsystem, collections.OrderedDict())[name] = (count, nbytes)
+
+    def totals(self):
+
+        # subsystem -> (count, bytes)
+        return collections.OrderedDict([(subsystem, (sum([c for c, b in rows.values()]), sum([b for c, b in rows.values()])))
+                                        for subsystem, rows in self.rows.items()])
+
+    def total(self):
+
+        return sum([b for c, b in self.totals().values()])
+
+    def asDict(self):
+
+        return {subsystem : {name : list(row) for name, row in rows.items()} for subsystem, rows in self.rows.items()}
+
+    def lines(self):
+
+        # for the overlay, a subsystem's total then its rows
+        lines = []
+        for subsystem, (count, nbytes) in self.totals().items():
+            lines.append('{:<10} {:>7} {:>9}'.format(subsystem, count, formatBytes(nbytes)))
+            for name, (count, nbytes) in self.rows[subsystem].items():
+                lines.append('  {:<8} {:>7} {:>9}'.format(name, count, formatBytes(nbytes)))
+        return lines
+
+# ======================================================================
+# LeakTracker class
+# ======================================================================
+# tracemalloc slows every allocation down and its snapshots are big, so
+# this is opt-in. Only the latest snapshot is kept, snapshot() hands the
+# previous one and the new one back for diffing off the frame loop
+
+class LeakTracker():
+
+    def __init__(self, frames=1):
+
+        self.frames = frames
+        self.last = None
+        self.last_label = None
+
+    def start(self):
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self):
+
+        self.last = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def traced(self):
+
+        # (current, peak) bytes Python has allocated while tracing
+        return tracemalloc.get_traced_memory()
+
+    def snapshot(self, label):
+
+        # returns (previous label, previous snapshot, this one), the
+        # previous being None the first time
+        snapshot = tracemalloc.take_snapshot()
+        previous = (self.last_label, self.last)
+        self.last = snapshot
+        self.last_label = label
+        return previous[0], previous[1], snapshot
+
+def growth(old, new, top=20):
+
+    # [['file:line', bytes grown, blocks grown], ...] biggest first,
+    # leaving out tracemalloc's own allocations
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__),
+              tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+              tracemalloc.Filter(False, '<unknown>')]
+    stats = new.filter_traces(ignore).compare_to(old.filter_traces(ignore), 'lineno')
+    rows = []
+    for stat in stats[:top]:
+        frame = stat.traceback[0]
+        rows.append(['{}:{}'.format(frame.filename, frame.lineno), stat.size_diff, stat.count_diff])
+    return rows
+
+# ======================================================================
+# files
+# ======================================================================
+# every line is a JSON object with 'kind' of 'usage' or 'growth'. Both
+# writers are io worker jobs
+
+def writeRecord(path, record):
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return appendLine(path, json.dumps(record))
+
+def writeGrowth(path, record, old, new, top):
+
+    # the diff is worked out here rather than on the frame loop
+    record['growth'] = growth(old, new, top)
+    return writeRecord(path, record)
+
+def readRecords(path):
+
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main():
+
+    parser = argparse.ArgumentParser(description='show a cannon memory log')
+    parser.add_argument('log')
+    parser.add_argument('--growth', action='store_true', help='show what tracemalloc saw grow between waves')
+    parser.add_argument('-n', '--top', type=int, default=10)
+    args = parser.parse_args()
+
+    records = readRecords(args.log)
+    usage = [r for r in records if r['kind'] == 'usage']
+    if args.growth:
+        for record in [r for r in records if r['kind'] == 'growth']:
+            print('{} -> {}'.format(record['from'], record['to']))
+            for where, size, count in record['growth'][:args.top]:
+                print('  {:>10} {:>+7} blocks  {}'.format(formatBytes(size) if size >= 0 else '-' + formatBytes(-size), count, where))
+        return 0
+
+    if len(usage) == 0:
+        print('no usage records')
+        return 1
+    first, last = usage[0], usage[-1]
+    print('{} usage records over {:.0f}s'.format(len(usage), last['time'] - first['time']))
+    print('{:<24} {:>10} {:>10} {:>10}'.format('', 'first', 'last', 'peak'))
+    for subsystem, rows in last['usage'].items():
+        for name in rows:
+            series = [r['usage'].get(subsystem, {}).get(name, [0, 0])[1] for r in usage]
+            print('{:<24} {:>10} {:>10} {:>10}'.format('{}.{}'.format(subsystem, name), formatBytes(series[0]),
+                                                       formatBytes(series[-1]), formatBytes(max(series))))
+    if 'traced' in last:
+        print('python heap (tracemalloc) {} now, {} peak'.format(formatBytes(last['traced'][0]), formatBytes(last['traced'][1])))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
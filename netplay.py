@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  netplay.py
+#
+import time
+import heapq
+import socket
+import random
+import struct
+
+# Two player co-op with rollback. Both ends run the whole game from the
+# same seed and exchange nothing but per tick (mousex, mousey, click)
+# input over UDP. The other player's input for a tick is usually still in
+# flight when it's simulated, so it is guessed (they kept still and didn't
+# click) and the game goes on. When the real input arrives and the guess
+# was wrong, the game is put back to a snapshot from before that tick and
+# the ticks since are run again with it, quietly, inside the same frame.
+#
+# Every datagram starts with its type:
+#
+#   MSG_HELLO  version, joiner to host until it hears back
+#   MSG_START  version, seed (u32), swarm, host's reply to every hello
+#   MSG_INPUT  sender's frame (u32), how many of our inputs it has (u32),
+#              its frame advantage (i16), its latest checksum frame (u32)
+#              and crc (u32), first input frame (u32), input count (u8),
+#              then each input as x, y (i16) and click (u8)
+#
+# Inputs are sent again in every datagram until acknowledged, so a lost
+# one costs nothing as long as the next gets through.
+
+PROTOCOL_VERSION = 1
+MSG_HELLO        = 1
+MSG_START        = 2
+MSG_INPUT        = 3
+HELLO            = struct.Struct('!BB')
+START            = struct.Struct('!BBIB')
+INPUT_HEADER     = struct.Struct('!BIIhIIIB')
+INPUT            = struct.Struct('!hhB')
+
+INPUT_DELAY      = 2      # local input is used this many ticks after it's read
+MAX_ROLLBACK     = 8      # ticks of snapshots kept, stall rather than guess further ahead
+MAX_SEND         = 64     # inputs per datagram
+ADVANTAGE_SLACK  = 2      # let one end get this far ahead of the other
+CHECKSUM_EVERY   = 30     # ticks between desync checks
+HELLO_INTERVAL   = 0.25
+PEER_TIMEOUT     = 5.0    # seconds without hearing from the other end
+NEUTRAL_INPUT    = (600, 300, False)
+
+# ======================================================================
+# Channel class
+# ======================================================================
+# A non blocking UDP socket talking to one peer. latency, jitter (both in
+# seconds) and loss (0-1) are applied to everything sent, for trying
+# netplay out over loopback. Jitter can reorder datagrams, as the real
+# thing does.
+
+class Channel():
+
+    def __init__(self, sock, peer=None, latency=0.0, jitter=0.0, loss=0.0, noise_seed=None):
+
+        self.sock    = sock
+        self.peer    = peer
+        self.latency = latency
+        self.jitter  = jitter
+        self.loss    = loss
+        self.random  = random.Random(noise_seed)
+        self.delayed = []       # heap of (due time, n, datagram)
+        self.sent    = 0
+        self.start_packet = None   # the host answers late hellos with this
+        self.sock.setblocking(False)
+
+    def send(self, data):
+
+        if self.loss > 0 and self.random.random() < self.loss:
+            return
+        if self.latency <= 0 and self.jitter <= 0:
+            self.sendNow(data)
+            return
+        due = time.perf_counter() + self.latency + self.random.uniform(0, self.jitter)
+        heapq.heappush(self.delayed, (due, self.sent, data))
+        self.sent += 1
+
+    def sendNow(self, data):
+
+        try:
+            self.sock.sendto(data, self.peer)
+        except OSError:
+            # nobody listening yet (ICMP unreachable), UDP just drops it
+            pass
+
+    def flush(self):
+
+        now = time.perf_counter()
+        while self.delayed and self.delayed[0][0] <= now:
+            self.sendNow(heapq.heappop(self.delayed)[2])
+
+    def receive(self):
+
+        # returns every datagram waiting, from the peer only once known
+        self.flush()
+        datagrams = []
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # an earlier send bounced, nothing to read
+                continue
+            if self.peer is None:
+                self.peer = address
+            if address == self.peer:
+                datagrams.append(data)
+        return datagrams
+
+    def close(self):
+
+        self.sock.close()
+
+def openSocket(port):
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('0.0.0.0', port))
+    return sock
+
+def hostGame(port, seed, swarm=False, timeout=None, waiting=None, **options):
+
+    # waits for a player to join, returns a Channel to them or None if
+    # timeout seconds pass or waiting() (called while waiting) says stop
+    channel = Channel(openSocket(port), **options)
+    channel.start_packet = START.pack(MSG_START, PROTOCOL_VERSION, seed, 1 if swarm else 0)
+    give_up = None if timeout is None else time.perf_counter() + timeout
+    while True:
+        for data in channel.receive():
+            if data[0] == MSG_HELLO and HELLO.unpack_from(data)[1] == PROTOCOL_VERSION:
+                channel.send(channel.start_packet)
+                return channel
+        if give_up is not None and time.perf_counter() > give_up:
+            break
+        if waiting is not None and not waiting():
+            break
+        time.sleep(0.01)
+    channel.close()
+    return None
+
+def joinGame(host, port, timeout=None, waiting=None, **options):
+
+    # returns (channel, seed, swarm) once the host answers, or None
+    peer = (socket.gethostbyname(host), port)
+    channel = Channel(openSocket(0), peer, **options)
+    give_up = None if timeout is None else time.perf_counter() + timeout
+    next_hello = 0
+    while True:
+        now = time.perf_counter()
+        if now >= next_hello:
+            channel.send(HELLO.pack(MSG_HELLO, PROTOCOL_VERSION))
+            next_hello = now + HELLO_INTERVAL
+        for data in channel.receive():
+            if data[0] == MSG_START:
+                kind, version, seed, swarm = START.unpack_from(data)
+                if version == PROTOCOL_VERSION:
+                    return channel, seed, swarm == 1
+        if give_up is not None and now > give_up:
+            break
+        if waiting is not None and not waiting():
+            break
+        time.sleep(0.01)
+    channel.close()
+    return None
+
+def sameEffect(a, b):
+
+    # where the mouse is only matters on a tick that fires, so a guess
+    # that got the position wrong but the click right needs no rollback
+    return a[2] == b[2] and (not a[2] or a[:2] == b[:2])
+
+# ======================================================================
+# RollbackSession class
+# ======================================================================
+# Drives a co-op Game (see Game.startNetplay) one tick per advance(). The
+# frame numbers here count every update() since the start, whatever state
+# the game is in. local[frame] and remote[frame] are the two players'
+# input for a frame, this end's is known INPUT_DELAY frames ahead and the
+# other end's up to wherever has arrived, which is usually behind.
+# snapshots[frame] is the game just before that frame ran.
+#
+# Once both players' input is known for a frame the game after it can't
+# change any more. Every CHECKSUM_EVERY frames that state is checksummed
+# and the crc sent along, so the two ends can tell if they've drifted.
+
+class RollbackSession():
+
+    def __init__(self, game, channel, player, delay=INPUT_DELAY, max_rollback=MAX_ROLLBACK):
+
+        self.game         = game
+        self.channel      = channel
+        self.player       = player        # 0 hosts, 1 joined
+        self.delay        = delay
+        self.max_rollback = max_rollback
+        self.frame        = 0             # the next frame to simulate
+        self.local        = [NEUTRAL_INPUT] * delay
+        self.remote       = []            # confirmed, contiguous from frame 0
+        self.guesses      = {}            # frame -> remote input guessed for it
+        self.snapshots    = {}
+        self.remote_frame = 0             # the other end's frame, last we heard
+        self.remote_advantage = 0
+        self.acked        = 0             # the other end has local[:acked]
+        self.sent_times   = {}            # frame -> when its input first went
+        self.last_heard   = time.perf_counter()
+        self.next_check   = 0             # frames before this are checksummed
+        self.checksums    = {}            # frame -> crc, ours
+        self.remote_checksums = {}
+        self.last_checksum = (0, 0)
+        self.last_remote_checksum = 0
+        self.checksum_log = []            # every (frame, crc), for testing
+
+        # for the HUD and benchmarks/loopback.py
+        self.ping         = 0.0
+        self.rollbacks    = 0
+        self.resimulated  = 0
+        self.max_depth    = 0
+        self.rollback_times = []          # seconds each rollback took
+        self.snapshot_time = 0.0
+        self.stalls       = 0
+        self.checked      = 0
+        self.desyncs      = 0
+
+    def confirmed(self):
+
+        # frames with both players' input known
+        return min(len(self.remote), len(self.local))
+
+    def disconnected(self):
+
+        return time.perf_counter() - self.last_heard > PEER_TIMEOUT
+
+    def advance(self, local_input):
+
+        # reads and sends input, rolls back if need be and runs one new
+        # frame. Returns False without running it if this end has to wait
+        # for the other (too far ahead of it), local_input is dropped then
+        self.poll()
+        if self.mustWait():
+            self.stalls += 1
+            return False
+
+        self.local.append(local_input)
+        self.sent_times[len(self.local) - 1] = time.perf_counter()
+
+        start = time.perf_counter()
+        self.snapshots[self.frame] = self.game.snapshot()
+        self.snapshots.pop(self.frame - self.max_rollback - 1, None)
+        self.snapshot_time += time.perf_counter() - start
+
+        self.simulate(self.frame)
+        self.frame += 1
+        self.checkFrames()
+        self.send()
+        return True
+
+    def poll(self):
+
+        # everything but running a new frame, for when there isn't one
+        for data in self.channel.receive():
+            self.received(data)
+        self.rollback()
+        self.checkFrames()
+        self.send()
+
+    def mustWait(self):
+
+        # no guessing further ahead than the snapshots go back
+        if self.frame - len(self.remote) >= self.max_rollback:
+            return True
+        # both ends see the other behind by the latency, so comparing the
+        # two advantages leaves how far this end is really ahead
+        advantage = self.frame - self.remote_frame
+        return advantage - self.remote_advantage > ADVANTAGE_SLACK * 2
+
+    def guess(self, frame):
+
+        if frame < len(self.remote):
+            return self.remote[frame]
+        if self.remote:
+            x, y, click = self.remote[-1]
+        else:
+            x, y, click = NEUTRAL_INPUT
+        self.guesses[frame] = (x, y, False)
+        return self.guesses[frame]
+
+    def simulate(self, frame):
+
+        local = self.local[frame]
+        remote = self.guess(frame)
+        if self.player == 0:
+            self.game.update(local[0], local[1], local[2], remote)
+        else:
+            self.game.update(remote[0], remote[1], remote[2], local)
+
+    def rollback(self):
+
+        # finds the first frame run on a wrong guess, if any, and runs
+        # everything from there again with what's now known
+        first = None
+        for frame in sorted(self.guesses):
+            if frame >= len(self.remote):
+                break
+            if first is None and not sameEffect(self.guesses[frame], self.remote[frame]):
+                first = frame
+            del self.guesses[frame]
+        if first is None:
+            return
+
+        start = time.perf_counter()
+        self.game.restore(self.snapshots[first])
+        self.game.setEffects(False)
+        for frame in range(first, self.frame):
+            if frame > first:
+                self.snapshots[frame] = self.game.snapshot()
+            self.simulate(frame)
+        self.game.setEffects(True)
+
+        depth = self.frame - first
+        self.rollbacks += 1
+        self.resimulated += depth
+        self.max_depth = max(self.max_depth, depth)
+        self.rollback_times.append(time.perf_counter() - start)
+
+    def checkFrames(self):
+
+        # checksums the game after each newly confirmed frame that's due
+        # one, from the snapshot taken before the frame after it
+        end = min(len(self.remote), self.frame)
+        for frame in range(self.next_check, end):
+            if frame % CHECKSUM_EVERY != 0:
+                continue
+            if frame + 1 == self.frame:
+                crc = self.game.checksum()
+            else:
+                crc = self.game.checksum(self.snapshots[frame + 1])
+            self.checksums[frame] = crc
+            self.last_checksum = (frame, crc)
+            self.checksum_log.append((frame, crc))
+            self.compareChecksum(frame)
+        self.next_check = max(self.next_check, end)
+
+    def compareChecksum(self, frame):
+
+        if frame in self.checksums and frame in self.remote_checksums:
+            self.checked += 1
+            if self.checksums.pop(frame) != self.remote_checksums.pop(frame):
+                self.desyncs += 1
+
+    def send(self):
+
+        first = self.acked
+        inputs = self.local[first:first + MAX_SEND]
+        checksum_frame, crc = self.last_checksum
+        header = INPUT_HEADER.pack(MSG_INPUT, self.frame, len(self.remote), self.frame - self.remote_frame,
+                                   checksum_frame, crc, first, len(inputs))
+        body = b''.join([INPUT.pack(x, y, 1 if click else 0) for x, y, click in inputs])
+        self.channel.send(header + body)
+
+    def received(self, data):
+
+        kind = data[0]
+        if kind == MSG_HELLO:
+            # our start was lost, the joiner is still asking
+            if self.channel.start_packet is not None:
+                self.channel.send(self.channel.start_packet)
+            return
+        if kind != MSG_INPUT or len(data) < INPUT_HEADER.size:
+            return
+
+        self.last_heard = time.perf_counter()
+        kind, frame, ack, advantage, checksum_frame, crc, first, count = INPUT_HEADER.unpack_from(data)
+        if frame >= self.remote_frame:
+            # datagrams can arrive out of order, keep the newest
+            self.remote_frame = frame
+            self.remote_advantage = advantage
+
+        if ack > self.acked:
+            sent = self.sent_times.get(ack - 1)
+            if sent is not None:
+                self.ping = time.perf_counter() - sent
+            for n in range(self.acked, ack):
+                self.sent_times.pop(n, None)
+            self.acked = ack
+
+        if checksum_frame > self.last_remote_checksum:
+            self.last_remote_checksum = checksum_frame
+            self.remote_checksums[checksum_frame] = crc
+            self.compareChecksum(checksum_frame)
+
+        # only the inputs that carry on from what we have are any use
+        offset = INPUT_HEADER.size
+        for n in range(first, first + count):
+            if n == len(self.remote):
+                x, y, click = INPUT.unpack_from(data, offset)
+                self.remote.append((x, y, click == 1))
+            offset += INPUT.size
+
+    def status(self):
+
+        return 'ping {:.0f}ms  rollbacks {}  deepest {}  stalls {}  desyncs {}'.format(
+            self.ping * 1000.0, self.rollbacks, self.max_depth, self.stalls, self.desyncs)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  profiler.py
+#
+import time
+import csv
+import collections
+import pygame
+
+# ======================================================================
+# FrameProfiler class
+# ======================================================================
+# Times each phase of a frame. Call startFrame() at the top of the loop,
+# mark(phase) after each piece of work and endFrame() at the bottom.
+# mark() charges everything since the previous mark to the named phase,
+# skip() throws the time away (use it around clock.tick() so the sleep
+# isn't counted as work).
+#
+# Only one thread may mark a profiler, but another can read it: the
+# readers below copy the ring buffer first, list() of a deque is atomic.
+
+class FrameProfiler():
+
+    def __init__(self, phases, colours, size=300, budget_ms=20.0):
+
+        self.phases     = list(phases)
+        self.colours    = list(colours)
+        self.index      = {p: i for i, p in enumerate(self.phases)}
+        self.size       = size
+        self.budget_ms  = budget_ms
+        self.frames     = collections.deque(maxlen=size)
+        self.current    = [0.0] * len(self.phases)
+        self.frame_start = 0.0
+        self.last_mark  = 0.0
+        self.frame_number = 0
+        self.last_busy  = 0.0
+        self.last_spike = None
+        self.visible    = False
+
+    def toggle(self):
+
+        self.visible = not self.visible
+
+    def startFrame(self):
+
+        now = time.perf_counter()
+        self.frame_start = now
+        self.last_mark = now
+        self.current = [0.0] * len(self.phases)
+
+    def mark(self, phase):
+
+        now = time.perf_counter()
+        self.current[self.index[phase]] += (now - self.last_mark) * 1000.0
+        self.last_mark = now
+
+    def skip(self):
+
+        self.last_mark = time.perf_counter()
+
+    def endFrame(self):
+
+        wall = (time.perf_counter() - self.frame_start) * 1000.0
+        busy = sum(self.current)
+        self.last_busy = busy
+        self.frame_number += 1
+        self.frames.append((self.frame_number, self.current, busy, wall))
+
+        if busy > self.budget_ms:
+            # remember which phase ate the most of the spiked frame
+            worst = max(range(len(self.phases)), key=lambda i: self.current[i])
+            self.last_spike = (self.frame_number, self.phases[worst], self.current[worst], busy)
+
+    def percentile(self, values, pct):
+
+        if len(values) == 0:
+            return 0.0
+        s = sorted(values)
+        return s[int(round((len(s) - 1) * pct))]
+
+    def phaseStats(self):
+
+        # returns [(phase, p50, p99), ...] over the ring buffer
+        frames = list(self.frames)
+        stats = []
+        for i, phase in enumerate(self.phases):
+            values = [f[1][i] for f in frames]
+            stats.append((phase, self.percentile(values, 0.5), self.percentile(values, 0.99)))
+        busy = [f[2] for f in frames]
+        stats.append(('total', self.percentile(busy, 0.5), self.percentile(busy, 0.99)))
+        return stats
+
+    def exportCSV(self, path):
+
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame'] + self.phases + ['busy', 'wall'])
+            for number, phases, busy, wall in list(self.frames):
+                writer.writerow([number] + ['{:.4f}'.format(p) for p in phases] + ['{:.4f}'.format(busy), '{:.4f}'.format(wall)])
+
+    def overlayHeight(self):
+
+        return 80 + 16 + (len(self.phases) + 2) * 12
+
+    def drawOverlay(self, surface, font, x, y, colour):
+
+        graph_height = 80
+        ms_to_px = graph_height / (self.budget_ms * 2)
+        width = self.size
+        height = self.overlayHeight()
+
+        panel = pygame.Surface([width, height])
+        panel.set_alpha(200)
+        surface.blit(panel, (x, y))
+
+        # frame-time graph, one stacked bar per frame, coloured by phase
+        bottom = y + graph_height
+        for n, frame in enumerate(list(self.frames)):
+            top = bottom
+            for i, ms in enumerate(frame[1]):
+                h = ms * ms_to_px
+                if h >= 1:
+                    top -= h
+                    pygame.draw.line(surface, self.colours[i], (x + n, top), (x + n, top + h))
+
+        # budget line
+        budget_y = bottom - self.budget_ms * ms_to_px
+        pygame.draw.line(surface, colour, (x, budget_y), (x + width, budget_y))
+
+        # p50/p99 table
+        ty = bottom + 8
+        for i, (phase, p50, p99) in enumerate(self.phaseStats()):
+            if i < len(self.colours):
+                c = self.colours[i]
+            else:
+                c = colour
+            msg = '{:<10} p50 {:6.2f}  p99 {:6.2f}'.format(phase, p50, p99)
+            surface.blit(font.render(msg, 0, c), (x + 4, ty))
+            ty += 12
+
+        if self.last_spike is not None:
+            number, phase, ms, busy = self.last_spike
+            msg = 'spike #{} {:.1f}ms  {} {:.1f}ms'.format(number, busy, phase, ms)
+            surface.blit(font.render(msg, 0, colour), (x + 4, ty))
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  render.py
+#
+import weakref
+import pygame
+
+DRAW_FILL = 0
+DRAW_BLIT = 1
+DRAW_RECT = 2
+
+# ======================================================================
+# RenderTarget class
+# ======================================================================
+# Everything in the game is drawn in logical playfield coordinates
+# (SCREEN_WIDTH x SCREEN_HEIGHT). RenderTarget draws them into an
+# internal surface at logical size * scale, then present() scales that
+# to the window once per frame. A scale below 1 cuts the number of pixels
+# filled by every blit, which is what low end machines run out of.
+#
+# At scale 1 in a window the internal surface is the window itself and
+# blit/blits/fill are the surface's own methods, so it costs nothing.
+#
+# Scaled copies of images are cached per source surface. Anything that
+# redraws a surface in place (rather than changing its alpha) has to
+# call forget() on it.
+#
+# Between startRecording() and stopRecording() the draw calls are not
+# drawn but kept as a list of commands (with positions and alpha copied
+# at the time of the call). takeCommands() hands the list over, and
+# playback() draws it, which can happen on a different thread to the
+# one recording.
+
+class RenderTarget():
+
+    def __init__(self, logical_width, logical_height):
+
+        self.logical_width  = logical_width
+        self.logical_height = logical_height
+        self.scale          = 1.0
+        self.fullscreen     = False
+        self.window         = None
+        self.surface        = None
+        self.view           = None
+        self.window_view    = None
+        self.bars           = []    # window rects round the view
+        self.cache          = weakref.WeakKeyDictionary()
+        self.recording      = False
+        self.commands       = []
+
+    def configure(self, scale=1.0, fullscreen=False):
+
+        self.scale = scale
+        self.fullscreen = fullscreen
+
+        if fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode((self.logical_width, self.logical_height))
+
+        # fit the playfield into the window keeping its aspect ratio
+        ww, wh = self.window.get_size()
+        fit = min(ww / self.logical_width, wh / self.logical_height)
+        self.view = pygame.Rect(0, 0, int(self.logical_width * fit), int(self.logical_height * fit))
+        self.view.center = (ww // 2, wh // 2)
+        view = self.view
+        bars = [(0, 0, ww, view.top), (0, view.bottom, ww, wh - view.bottom),
+                (0, view.top, view.left, view.height), (view.right, view.top, ww - view.right, view.height)]
+        self.bars = [pygame.Rect(bar) for bar in bars if bar[2] > 0 and bar[3] > 0]
+
+        size = (int(self.logical_width * scale), int(self.logical_height * scale))
+        self.cache.clear()
+
+        if size == (ww, wh):
+            self.surface = self.window
+            self.window_view = None
+            self.draw_blit  = self.surface.blit
+            self.draw_blits = self.surface.blits
+        else:
+            self.surface = pygame.Surface(size).convert()
+            self.window_view = self.window.subsurface(self.view)
+            self.draw_blit  = self.scaledBlit
+            self.draw_blits = self.scaledBlits
+
+        self.bindMethods()
+
+    def bindMethods(self):
+
+        if self.recording:
+            self.blit  = self.recordBlit
+            self.blits = self.recordBlits
+            self.fill  = self.recordFill
+            self.rect  = self.recordRect
+        else:
+            self.blit  = self.draw_blit
+            self.blits = self.draw_blits
+            self.fill  = self.drawFill
+            self.rect  = self.drawRect
+
+    def isScaled(self):
+
+        return self.surface is not self.window
+
+    def drawFill(self, colour):
+
+        self.surface.fill(colour)
+
+    def forget(self, image):
+
+        self.cache.pop(image, None)
+
+    def scaledImage(self, image):
+
+        scaled = self.cache.get(image)
+        if scaled is None:
+            w, h = image.get_size()
+            scaled = pygame.transform.scale(image, (max(1, round(w * self.scale)), max(1, round(h * self.scale))))
+            self.cache[image] = scaled
+
+        # the game fades things by changing alpha on the source surface
+        alpha = image.get_alpha()
+        if alpha != scaled.get_alpha():
+            scaled.set_alpha(alpha)
+        return scaled
+
+    def scaledBlit(self, image, pos, area=None):
+
+        s = self.scale
+        if area is not None:
+            area = pygame.Rect(area[0] * s, area[1] * s, area[2] * s, area[3] * s)
+        return self.surface.blit(self.scaledImage(image), (pos[0] * s, pos[1] * s), area)
+
+    def scaledBlits(self, sequence, doreturn=True):
+
+        s = self.scale
+        items = []
+        for item in sequence:
+            image = self.scaledImage(item[0])
+            pos = (item[1][0] * s, item[1][1] * s)
+            if len(item) > 2 and item[2] is not None:
+                area = item[2]
+                items.append((image, pos, pygame.Rect(area[0] * s, area[1] * s, area[2] * s, area[3] * s)))
+            else:
+                items.append((image, pos))
+        return self.surface.blits(items, doreturn)
+
+    def drawRect(self, colour, rect):
+
+        s = self.scale
+        pygame.draw.rect(self.surface, colour, [rect[0] * s, rect[1] * s, max(1, rect[2] * s), max(1, rect[3] * s)])
+
+    def startRecording(self):
+
+        self.commands = []
+        self.recording = True
+        self.bindMethods()
+
+    def stopRecording(self):
+
+        self.recording = False
+        self.bindMethods()
+
+    def takeCommands(self):
+
+        commands = self.commands
+        self.commands = []
+        return commands
+
+    def recordFill(self, colour):
+
+        self.commands.append((DRAW_FILL, colour))
+
+    def recordBlit(self, image, pos, area=None):
+
+        if area is not None:
+            area = tuple(area)
+        self.commands.append((DRAW_BLIT, image, (pos[0], pos[1]), area, image.get_alpha()))
+
+    def recordBlits(self, sequence, doreturn=True):
+
+        for item in sequence:
+            self.recordBlit(*item)
+
+    def recordRect(self, colour, rect):
+
+        self.commands.append((DRAW_RECT, colour, tuple(rect)))
+
+    def playback(self, commands):
+
+        for command in commands:
+            kind = command[0]
+            if kind == DRAW_BLIT:
+                image = command[1]
+                # the recording thread may have faded it since
+                if image.get_alpha() != command[4]:
+                    image.set_alpha(command[4])
+                self.draw_blit(image, command[2], command[3])
+            elif kind == DRAW_FILL:
+                self.drawFill(command[1])
+            else:
+                self.drawRect(command[1], command[2])
+
+    def present(self):
+
+        # copy the internal surface to the window, call before flip().
+        # Nothing else clears the letterbox bars, and the debug overlays
+        # draw over them
+        if self.window_view is not None:
+            for bar in self.bars:
+                self.window.fill((0, 0, 0), bar)
+            pygame.transform.scale(self.surface, self.view.size, self.window_view)
+
+    def toLogical(self, pos):
+
+        # window (mouse) coordinates to playfield coordinates
+        x = (pos[0] - self.view.x) * self.logical_width / self.view.width
+        y = (pos[1] - self.view.y) * self.logical_height / self.view.height
+        return int(x), int(y)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  sampler.py
+#
+# frame spike capture. A StackSampler thread takes the Python stack of
+# each thread it watches every interval and keeps the last few seconds
+# of them. When a frame runs over budget the game pulls out the samples
+# taken during that frame and has them written, with what the game was
+# doing at the time, to a JSON report. Run on its own it reads one back
+#
+#   python sampler.py spikes/spike-20200101-120000-004711.json
+#   python sampler.py spikes/spike-20200101-120000-004711.json --folded > spike.folded
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import collections
+
+from ioworker import writeFileAtomic
+
+SAMPLE_INTERVAL = 0.001     # seconds
+SAMPLE_WINDOW   = 4000      # samples kept, across every watched thread
+SAMPLE_DEPTH    = 48        # frames kept from the innermost out
+
+# ======================================================================
+# StackSampler class
+# ======================================================================
+# Samples are (time, thread ident, stack) with the stack outermost first
+# as ('file:function', line) pairs. Readers copy the deque first, list()
+# of a deque is atomic.
+#
+# A waiting thread only gets the GIL when the running one lets go of it,
+# every sys.getswitchinterval() (5ms by default) when it's busy in Python,
+# so while sampling that's lowered to the sampling interval. That costs a
+# little, which is why this is opt-in.
+
+class StackSampler():
+
+    def __init__(self, interval=SAMPLE_INTERVAL, window=SAMPLE_WINDOW, depth=SAMPLE_DEPTH):
+
+        self.interval = interval
+        self.depth    = depth
+        self.samples  = collections.deque(maxlen=window)
+        self.watching = set()
+        self.names    = {}      # code object -> 'file:function', formatted once each
+        self.taken    = 0
+        self.running  = False
+        self.thread   = None
+        self.switch_interval = None
+
+    def watch(self, ident=None):
+
+        # cheap enough to call every frame from the thread to be watched
+        self.watching.add(threading.get_ident() if ident is None else ident)
+
+    def start(self):
+
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.switch_interval is not None:
+            sys.setswitchinterval(self.switch_interval)
+            self.switch_interval = None
+
+    def run(self):
+
+        while self.running:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for ident in list(self.watching):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.samples.append((now, ident, self.stack(frame)))
+                    self.taken += 1
+            frames = None
+
+    def stack(self, frame):
+
+        stack = []
+        while frame is not None and len(stack) < self.depth:
+            code = frame.f_code
+            name = self.names.get(code)
+            if name is None:
+                name = '{}:{}'.format(os.path.basename(code.co_filename), code.co_name)
+                self.names[code] = name
+            stack.append((name, frame.f_lineno))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def between(self, ident, start, end):
+
+        # [(time, stack), ...] for one thread, start <= time <= end
+        return [(t, stack) for t, i, stack in list(self.samples) if i == ident and start <= t <= end]
+
+# ======================================================================
+# reports
+# ======================================================================
+# a report is a dict with 'frame', 'state' and 'samples', each sample
+# being [ms into the frame, [[function, line], ...]]. writeReport() adds
+# the summaries, on the io worker so the frame loop doesn't pay for them
+
+def foldStacks(samples):
+
+    # 'outer;...;inner count' lines, the folded format flame graph tools read
+    counts = collections.Counter([';'.join([name for name, line in stack]) for ms, stack in samples])
+    return ['{} {}'.format(stack, n) for stack, n in counts.most_common()]
+
+def leafCounts(samples):
+
+    # where the frame was when sampled, by function and line
+    counts = collections.Counter(['{}:{}'.format(*stack[-1]) for ms, stack in samples if stack])
+    return counts.most_common()
+
+def writeReport(path, report):
+
+    report['leaves'] = leafCounts(report['samples'])
+    report['folded'] = foldStacks(report['samples'])
+    return writeFileAtomic(path, json.dumps(report, indent=1))
+
+def main():
+
+    parser = argparse.ArgumentParser(description='show a frame spike report')
+    parser.add_argument('report')
+    parser.add_argument('--folded', action='store_true', help='print only the folded stacks, for flame graph tools')
+    parser.add_argument('-n', '--top', type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.report) as f:
+        report = json.load(f)
+    if args.folded:
+        print('\n'.join(report['folded']))
+        return 0
+
+    frame = report['frame']
+    print('frame {} on {}: {:.1f}ms busy, {:.1f}ms wall (threshold {:.1f}ms)'.format(
+        frame['number'], frame['thread'], frame['busy_ms'], frame['wall_ms'], frame['threshold_ms']))
+    print('  ' + '  '.join(['{} {:.1f}ms'.format(phase, ms) for phase, ms in frame['phases'].items()]))
+    print('state')
+    for key, value in report['state'].items():
+        print('  {:<16} {}'.format(key, value))
+
+    total = max(1, len(report['samples']))
+    print('{} samples, where they were'.format(len(report['samples'])))
+    for leaf, n in report['leaves'][:args.top]:
+        print('  {:5.1f}%  {}'.format(n * 100.0 / total, leaf))
+    print('hottest stacks')
+    for line in report['folded'][:args.top]:
+        stack, n = line.rsplit(' ', 1)
+        print('  {:5.1f}%  {}'.format(int(n) * 100.0 / total, stack))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
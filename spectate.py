@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  spectate.py
+#
+# watch a game being played on another machine. The player presses B to
+# start broadcasting, then
+#
+#   python spectate.py cabinet-host
+#   python spectate.py 192.168.1.20 --port 5050
+#
+# The game is re-simulated here from the seed and the player's input, the
+# same way a replay is, so nothing but input crosses the network.
+
+import sys
+import queue
+import asyncio
+import argparse
+import threading
+import pygame
+import cannon
+from broadcast import SpectatorClient
+
+CATCHUP_TICKS = 20   # ticks per frame when well behind (joined late)
+
+# ======================================================================
+# Spectator class
+# ======================================================================
+# The network runs on its own thread and queues what it receives, the
+# main thread drains the queue each frame and feeds a Game in replay mode
+# whose recording grows as input arrives. The game only advances through
+# a playing tick once the input for it is here.
+
+class Spectator():
+
+    def __init__(self, host, port):
+
+        self.host     = host
+        self.port     = port
+        self.game     = cannon.Game()
+        self.messages = queue.Queue()
+        self.game_id  = None
+        self.status   = 'connecting to {}:{}'.format(host, port)
+        self.client   = SpectatorClient(self.receivedGame, self.receivedInputs)
+
+    def listen(self):
+
+        try:
+            asyncio.run(self.client.run(self.host, self.port))
+            self.messages.put(('status', 'disconnected'))
+        except OSError as e:
+            self.messages.put(('status', 'connection failed: {}'.format(e)))
+
+    # called on the network thread
+
+    def receivedGame(self, info):
+
+        self.messages.put(('game', info))
+
+    def receivedInputs(self, game, start, inputs):
+
+        self.messages.put(('inputs', game, start, inputs))
+
+    # main thread
+
+    def drainMessages(self):
+
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if message[0] == 'game':
+                self.startGame(message[1])
+            elif message[0] == 'inputs':
+                game_id, start, inputs = message[1:]
+                recording = self.game.recording
+                if game_id == self.game_id and start == len(recording):
+                    recording.extend(inputs)
+                    self.game.replay_length = len(recording)
+            else:
+                self.status = message[1]
+
+    def startGame(self, info):
+
+        game = self.game
+        game.random_seed = info['seed']
+        game.swarm = info['swarm']
+        game.mask_collisions = info.get('masks', False)
+        game.brute_flow_field = info.get('flow', False)
+        game.gamemode = cannon.GAME_MODE_REPLAY
+        game.recording = []
+        game.replay_length = 0
+        game.startGame()
+        game.playGameMainSong()
+        game.gamestate = cannon.GAME_STATE_IN_PROGRESS
+        self.game_id = info['game']
+        self.status = 'watching game {}'.format(self.game_id)
+
+    def behind(self):
+
+        return len(self.game.recording) - self.game.thisframe
+
+    def canTick(self):
+
+        # a playing tick needs its input, anything else runs on its own
+        game = self.game
+        game.updateGameState()
+        return game.gamestate != cannon.GAME_STATE_IN_PROGRESS or game.thisframe < game.replay_length
+
+    def ticksThisFrame(self):
+
+        behind = self.behind()
+        if behind > self.game.fps:
+            return CATCHUP_TICKS
+        if behind > self.game.fps // 5:
+            # drifting behind a batch or two, close the gap gently
+            return 2
+        return 1
+
+    def tick(self):
+
+        game = self.game
+        mousex, mousey, click = game.stepInput(0, 0, False)
+        game.update(mousex, mousey, click)
+
+    def draw(self):
+
+        game = self.game
+        cannon.screen.fill(cannon.COLOUR_BLACK)
+        game.draw()
+        cannon.screen.present()
+
+        msg = 'SPECTATING  ' + self.status
+        behind = self.behind()
+        if behind > game.fps:
+            msg += '  catching up {} ticks'.format(behind)
+        cannon.screen.window.blit(cannon.myfont10.render(msg, 0, cannon.COLOUR_WHITE), (10, 4))
+
+    def run(self):
+
+        threading.Thread(target=self.listen, name='spectator', daemon=True).start()
+
+        done = False
+        while not done:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    done = True
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    done = True
+
+            self.drainMessages()
+            for n in range(0, self.ticksThisFrame()):
+                if not self.canTick():
+                    break
+                self.tick()
+
+            self.draw()
+            cannon.clock.tick(self.game.fps)
+            pygame.display.flip()
+
+        self.game.io.stop()
+        self.game.scoreboard.store.close()
+
+def main():
+
+    parser = argparse.ArgumentParser(description='watch a broadcast cannon game')
+    parser.add_argument('host')
+    parser.add_argument('--port', type=int, default=cannon.BROADCAST_PORT)
+    args = parser.parse_args()
+
+    cannon.init()
+    pygame.display.set_caption('Cannon - spectating {}'.format(args.host))
+    Spectator(args.host, args.port).run()
+    pygame.quit()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
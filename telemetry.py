@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  telemetry.py
+#
+# game event log. The game records shots, hits, lost bases and wave ends
+# into a fixed size ring in memory, and every so often hands a batch of
+# them to the io worker to append to a file, as JSONL or packed binary.
+# Run on its own it summarises those files
+#
+#   python telemetry.py telemetry/
+#   python telemetry.py telemetry/events-20200101-120000-123.bin --by game
+#   python telemetry.py telemetry/ --json
+
+import os
+import sys
+import json
+import struct
+import argparse
+import collections
+
+# every event is (event, game, tick, wave, player, a, b, c), game being
+# the game's number since the program started. a, b and c depend on the
+# event
+#
+#   EVENT_SHOT       aim x, aim y
+#   EVENT_DRYFIRE    aim x, aim y                 (out of shots or reloading)
+#   EVENT_HIT        HIT_*, x, y                  (player is the ball's owner)
+#   EVENT_BASE_LOST  x, y, bases left
+#   EVENT_WAVE_END   shots fired, kills, bullet bonus
+#   EVENT_GAME_OVER  score, shots fired in all
+EVENT_SHOT      = 0
+EVENT_DRYFIRE   = 1
+EVENT_HIT       = 2
+EVENT_BASE_LOST = 3
+EVENT_WAVE_END  = 4
+EVENT_GAME_OVER = 5
+EVENT_NAMES     = ['shot', 'dryfire', 'hit', 'base_lost', 'wave_end', 'game_over']
+
+HIT_TARGET  = 0
+HIT_BOMBER  = 1
+HIT_BRUTE   = 2
+HIT_BLOCKER = 3
+HIT_NAMES   = ['target', 'bomber', 'brute', 'blocker']
+
+FORMAT_JSONL  = 'jsonl'
+FORMAT_BINARY = 'bin'
+BINARY_MAGIC  = b'CTEL\x01'
+RECORD        = struct.Struct('<BIIHBiii')  # 24 bytes an event
+
+# ======================================================================
+# TelemetryLog class
+# ======================================================================
+# record() only stores the event tuple in the ring. Once batch events
+# are waiting they're sliced out and submitted to the io worker, which
+# encodes and writes them. If the worker's queue is full they stay in
+# the ring until another batch has come in, and if the ring wraps before
+# then the oldest are overwritten and counted in lost. Nothing touches
+# the disk until the first batch, so a game that logs nothing makes no
+# file.
+
+class TelemetryLog():
+
+    def __init__(self, io, path, fmt=FORMAT_JSONL, size=4096, batch=256):
+
+        self.io      = io
+        self.path    = path
+        self.format  = fmt
+        self.size    = size
+        self.batch   = min(batch, size)
+        self.ring    = [None] * size
+        self.head    = 0        # where the next event goes
+        self.pending = 0        # events in the ring not yet submitted
+        self.flush_at = self.batch
+        self.recorded = 0
+        self.lost    = 0
+        self.batches = 0
+        self.enabled = True
+
+    def record(self, event):
+
+        self.ring[self.head] = event
+        self.head += 1
+        if self.head == self.size:
+            self.head = 0
+        self.pending += 1
+        self.recorded += 1
+        if self.pending >= self.flush_at:
+            self.flush()
+
+    def flush(self):
+
+        # returns False if the io worker was too busy to take them
+        if self.pending == 0:
+            return True
+        if self.pending > self.size:
+            self.lost += self.pending - self.size
+            self.pending = self.size
+
+        start = self.head - self.pending
+        if start >= 0:
+            events = self.ring[start:self.head]
+        else:
+            events = self.ring[start:] + self.ring[:self.head]
+        if not self.io.submit(writeEvents, (self.path, self.format, events)):
+            # give the worker another batch's worth of events to catch up
+            self.flush_at = self.pending + self.batch
+            return False
+        self.pending = 0
+        self.flush_at = self.batch
+        self.batches += 1
+        return True
+
+# ======================================================================
+# files
+# ======================================================================
+
+def writeEvents(path, fmt, events):
+
+    # an io worker job
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if fmt == FORMAT_BINARY:
+        with open(path, 'ab') as f:
+            if f.tell() == 0:
+                f.write(BINARY_MAGIC)
+            f.write(b''.join([RECORD.pack(*event) for event in events]))
+    else:
+        with open(path, 'a') as f:
+            f.write(''.join([json.dumps(event, separators=(',', ':')) + '\n' for event in events]))
+    return path
+
+def readEvents(path):
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(BINARY_MAGIC):
+        return list(RECORD.iter_unpack(data[len(BINARY_MAGIC):]))
+    return [tuple(json.loads(line)) for line in data.decode('utf-8').splitlines() if line]
+
+def findLogs(paths):
+
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.' + FORMAT_JSONL) or name.endswith('.' + FORMAT_BINARY):
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    return found
+
+# ======================================================================
+# aggregation
+# ======================================================================
+
+def newTotals():
+
+    totals = collections.OrderedDict()
+    totals['games'] = 0
+    totals['shots'] = 0
+    totals['dryfires'] = 0
+    for name in HIT_NAMES:
+        totals[name + '_hits'] = 0
+    totals['bases_lost'] = 0
+    totals['waves_ended'] = 0
+    totals['bullet_bonus'] = 0
+    totals['accuracy'] = 0.0
+    return totals
+
+def addEvent(totals, event):
+
+    kind, game, tick, wave, player, a, b, c = event
+    if kind == EVENT_SHOT:
+        totals['shots'] += 1
+    elif kind == EVENT_DRYFIRE:
+        totals['dryfires'] += 1
+    elif kind == EVENT_HIT:
+        totals[HIT_NAMES[a] + '_hits'] += 1
+    elif kind == EVENT_BASE_LOST:
+        totals['bases_lost'] += 1
+    elif kind == EVENT_WAVE_END:
+        totals['waves_ended'] += 1
+        totals['bullet_bonus'] += c
+
+def finishTotals(totals):
+
+    kills = totals['target_hits'] + totals['bomber_hits'] + totals['brute_hits']
+    if totals['shots'] > 0:
+        totals['accuracy'] = kills / totals['shots'] * 100
+    return totals
+
+def summarise(logs, by):
+
+    # by 'wave' (over every game), 'game' or 'all'. Returns rows of
+    # (key, totals) in order
+    rows = collections.OrderedDict()
+    games = set()
+    for path in logs:
+        for event in readEvents(path):
+            game = (os.path.basename(path), event[1])
+            if by == 'wave':
+                key = event[3]
+            elif by == 'game':
+                key = '{}#{}'.format(*game)
+            else:
+                key = 'all'
+            if key not in rows:
+                rows[key] = (newTotals(), set())
+            totals, seen = rows[key]
+            seen.add(game)
+            addEvent(totals, event)
+            if event[0] == EVENT_GAME_OVER:
+                totals.setdefault('score', event[5])
+            games.add(game)
+
+    result = []
+    for key in sorted(rows) if by == 'wave' else rows:
+        totals, seen = rows[key]
+        totals['games'] = len(seen)
+        result.append((key, finishTotals(totals)))
+    return result, len(games)
+
+def printTable(rows, by):
+
+    columns = ['games', 'shots', 'dryfires', 'target_hits', 'bomber_hits', 'brute_hits',
+               'blocker_hits', 'bases_lost', 'waves_ended', 'accuracy']
+    if by == 'game':
+        columns.append('score')
+    width = max([len(str(key)) for key, totals in rows] + [len(by)])
+    print(' '.join([by.ljust(width)] + [c.rjust(12) for c in columns]))
+    for key, totals in rows:
+        cells = []
+        for c in columns:
+            value = totals.get(c, '')
+            if isinstance(value, float):
+                value = '{:.1f}'.format(value)
+            cells.append(str(value).rjust(12))
+        print(' '.join([str(key).ljust(width)] + cells))
+
+def main():
+
+    parser = argparse.ArgumentParser(description='summarise cannon telemetry logs')
+    parser.add_argument('paths', nargs='+', help='log files, or directories of them')
+    parser.add_argument('--by', choices=['wave', 'game', 'all'], default='wave')
+    parser.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    args = parser.parse_args()
+
+    logs = findLogs(args.paths)
+    if len(logs) == 0:
+        print('no telemetry logs found')
+        return 1
+    rows, games = summarise(logs, args.by)
+    if args.json:
+        print(json.dumps({'logs' : len(logs), 'games' : games, args.by : rows}, indent=2))
+    else:
+        print('{} games in {} logs'.format(games, len(logs)))
+        printTable(rows, args.by)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_highscores.py
+#
+from highscores import HighScoreStore
+
+def scores(store):
+
+    return [e.score for e in store.top(10)]
+
+def test_torn_journal_tail_then_append(tmp_path):
+
+    # a crash mid write leaves a partial last line, the scores submitted
+    # after the restart must survive the next load
+    name = str(tmp_path / 'highscores')
+    store = HighScoreStore(name)
+    store.submit(100)
+    store.submit(200)
+    store.close()
+    with open(name + '.journal', 'a') as f:
+        f.write('[3, 30')
+
+    store = HighScoreStore(name)
+    assert scores(store) == [200, 100]
+    store.submit(300)
+    store.submit(400)
+    store.close()
+
+    store = HighScoreStore(name)
+    assert scores(store) == [400, 300, 200, 100]
+    store.close()
+
+def test_bad_line_is_skipped(tmp_path):
+
+    name = str(tmp_path / 'highscores')
+    store = HighScoreStore(name)
+    store.submit(100)
+    store.close()
+    with open(name + '.journal', 'a') as f:
+        f.write('[2, 50\n')
+    store = HighScoreStore(name)
+    store.submit(300)
+    store.close()
+
+    store = HighScoreStore(name)
+    assert scores(store) == [300, 100]
+    store.close()
@@ -5,6 +5,26 @@
 #  
 import math
 
+# sin/cos of every whole degree 0..360. Built with the same expression
+# as calling math directly, so SIN_TABLE[a] == math.sin(math.radians(a))
+# exactly and swapping one for the other doesn't change a replay.
+#
+# Only whole degrees (ints) win, and the win is in indexing the tables
+# straight from hot loops when the angle is already 0..360. sinDeg() and
+# cosDeg() wrap any whole number of degrees but the call costs about
+# what math does, and turning a float angle into an index costs more, so
+# keep using math for those (benchmarks/trig.py).
+SIN_TABLE = [math.sin(math.radians(a)) for a in range(0, 361)]
+COS_TABLE = [math.cos(math.radians(a)) for a in range(0, 361)]
+
+def sinDeg(angle_degrees):
+    
+    return SIN_TABLE[angle_degrees % 360]
+    
+def cosDeg(angle_degrees):
+    
+    return COS_TABLE[angle_degrees % 360]
+
 class Vector2(object):
     
     def __init__(self,x,y):
@@ -66,6 +86,13 @@ class Vector2(object):
         self.x = math.cos(math.radians(angle_degrees))
         self.y = math.sin(math.radians(angle_degrees))
         
+    def setFromDegrees(self, angle_degrees):
+        
+        # setFromAngle() from the tables, angle_degrees must be an int
+        a = angle_degrees % 360
+        self.x = COS_TABLE[a]
+        self.y = SIN_TABLE[a]
+        
     def rotate(self, angle_radians):
         
         # Rotate the vector by angle_radians radians
@@ -81,6 +108,17 @@ class Vector2(object):
         # rotate the vector by angle_degrees degrees
         self.rotate(math.radians(angle_degrees))
         
+    def rotateWholeDegrees(self, angle_degrees):
+        
+        # rotate_degrees() from the tables, angle_degrees must be an int
+        a = angle_degrees % 360
+        cos = COS_TABLE[a]
+        sin = SIN_TABLE[a]
+        x = self.x * cos - self.y * sin
+        y = self.x * sin + self.y * cos
+        self.x = x
+        self.y = y
+        
     def headingRadians(self):
         
         # returns the angle in radians of the vector